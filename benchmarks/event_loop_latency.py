@@ -0,0 +1,89 @@
+"""
+Event loop latency while several large uploads run concurrently.
+
+The "blocking" mode calls the backend directly from the coroutine, which is
+how the async methods used to behave, the "executor" mode uses the manager
+executor. Run it with:
+
+    PYTHONPATH=src python benchmarks/event_loop_latency.py
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from io import BytesIO
+
+from media_manager import Local_MediaManager, MUploadFile
+
+
+def upload_path(file: MUploadFile) -> str:
+    return f"{file.filename}"
+
+
+async def blocking_upload(media_manager: Local_MediaManager, file):
+    complete_path = media_manager.get_complete_path(file)
+    media_manager._backend_upload(file, complete_path)
+    return complete_path
+
+
+async def measure_lag(stop: asyncio.Event, interval: float) -> list[float]:
+    lags = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+    return lags
+
+
+async def run(mode: str, uploads: int, size: int, max_workers: int):
+    payload = os.urandom(size)
+    with tempfile.TemporaryDirectory() as folder:
+        media_manager = Local_MediaManager(
+            upload_path=upload_path,
+            root_folder=folder,
+            add_environment_as_prefix=False,
+            max_workers=max_workers,
+        )
+        files = [
+            MUploadFile(BytesIO(payload), filename=f"{i}.bin")
+            for i in range(uploads)
+        ]
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(measure_lag(stop, 0.001))
+        await asyncio.sleep(0.01)
+        started = time.perf_counter()
+        if mode == "blocking":
+            jobs = [blocking_upload(media_manager, f) for f in files]
+        else:
+            jobs = [media_manager.upload_file(f) for f in files]
+        await asyncio.gather(*jobs)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        lags = await lag_task
+        media_manager.close()
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    p99 = lags_ms[int(len(lags_ms) * 0.99) - 1] if lags_ms else 0.0
+    print(
+        f"{mode:>9}: total={elapsed * 1000:8.1f}ms "
+        f"ticks={len(lags_ms):5d} "
+        f"lag p50={statistics.median(lags_ms or [0]):7.2f}ms "
+        f"p99={p99:7.2f}ms max={max(lags_ms or [0]):7.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploads", type=int, default=8)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--max-workers", type=int, default=4)
+    args = parser.parse_args()
+    size = args.size_mb * 1024 * 1024
+    for mode in ("blocking", "executor"):
+        asyncio.run(run(mode, args.uploads, size, args.max_workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Reading a large local file into a BytesIO against mapping it with
+download_file(mmap=True). Every mode runs in a fresh process, the anonymous
+memory is the one that is not page cache shared with the other processes
+(Linux only). Run it with:
+
+    PYTHONPATH=src python benchmarks/local_reads.py
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import time
+
+from media_manager import Local_MediaManager
+
+
+def anonymous_memory() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def read(mode: str, path: str, queue: multiprocessing.Queue):
+    media_manager = Local_MediaManager(add_environment_as_prefix=False)
+    started = time.perf_counter()
+    if mode == "bytesio":
+        content = media_manager.sync_download_file(path).getbuffer()
+    else:
+        content = media_manager.sync_download_file(path, mmap=True)
+    # Consumed in slices like a response body written to a socket
+    digest = hashlib.sha256()
+    for start in range(0, len(content), 1024 * 1024):
+        digest.update(content[start : start + 1024 * 1024])
+    elapsed = time.perf_counter() - started
+    queue.put((elapsed, anonymous_memory()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=512)
+    args = parser.parse_args()
+    with tempfile.NamedTemporaryFile() as f:
+        for _ in range(args.size_mb):
+            f.write(os.urandom(1024 * 1024))
+        f.flush()
+        for mode in ("bytesio", "mmap"):
+            queue = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=read, args=(mode, f.name, queue)
+            )
+            process.start()
+            elapsed, anonymous = queue.get()
+            process.join()
+            print(
+                f"{mode:>8}: total={elapsed * 1000:8.1f}ms "
+                f"anonymous rss={anonymous:8.1f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
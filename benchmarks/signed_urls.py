@@ -0,0 +1,64 @@
+"""
+Presigning many keys, one signed_url call per key against one signed_urls
+call. The signed URL cache is cleared before every run so both modes sign
+every key. Signing is local so no bucket is needed. Run it with:
+
+    PYTHONPATH=src python benchmarks/signed_urls.py
+"""
+
+import argparse
+import asyncio
+import time
+
+from media_manager import AWS_MediaManager, MUploadFile
+
+
+def upload_path(file: MUploadFile) -> str:
+    return f"{file.filename}"
+
+
+async def sequential(media_manager: AWS_MediaManager, keys: list[str]):
+    return {key: await media_manager.signed_url(key) for key in keys}
+
+
+async def batch(media_manager: AWS_MediaManager, keys: list[str]):
+    return await media_manager.signed_urls(keys)
+
+
+async def run(mode: str, media_manager: AWS_MediaManager, keys: list[str]):
+    media_manager.signed_url_cache.clear()
+    started = time.perf_counter()
+    if mode == "sequential":
+        urls = await sequential(media_manager, keys)
+    else:
+        urls = await batch(media_manager, keys)
+    elapsed = time.perf_counter() - started
+    assert len(urls) == len(keys)
+    print(
+        f"{mode:>10}: total={elapsed * 1000:8.1f}ms "
+        f"per key={elapsed / len(keys) * 1e6:7.1f}us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keys", type=int, default=10_000)
+    args = parser.parse_args()
+    media_manager = AWS_MediaManager(
+        upload_path=upload_path,
+        root_folder="benchmark",
+        add_environment_as_prefix=False,
+        bucket="media-manager-benchmark",
+        aws_access_key_id="benchmark",
+        aws_secret_access_key="benchmark",
+        aws_region_name="us-east-1",
+        signed_url_cache_size=args.keys,
+    )
+    keys = [f"thumbnails/{i:06d}.webp" for i in range(args.keys)]
+    for mode in ("sequential", "batch"):
+        asyncio.run(run(mode, media_manager, keys))
+    media_manager.close()
+
+
+if __name__ == "__main__":
+    main()
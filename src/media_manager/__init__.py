@@ -1,17 +1,41 @@
 from .managers.aws import AWS_MediaManager
+from .managers.aws_async import AsyncAWS_MediaManager
 from .managers.local import Local_MediaManager
+from .managers.dedup import Dedup_MediaManager
+from .managers.disk_cache import DiskCache_MediaManager
+from .managers.memory_cache import MemoryCache_MediaManager
+from .managers.wrapper import Wrapper_MediaManager
 from .base.base import MediaManager
 from .base.datastructures import MUploadFile
+from .factory import MediaManagerFactory
+from .sync import MediaManagerSync
 import os
-from functools import lru_cache
 
 
-__all__ = ["AWS_MediaManager", "Local_MediaManager", "MediaManager", "MUploadFile"]
+__all__ = [
+    "AWS_MediaManager",
+    "AsyncAWS_MediaManager",
+    "Dedup_MediaManager",
+    "DiskCache_MediaManager",
+    "Local_MediaManager",
+    "MediaManager",
+    "MediaManagerFactory",
+    "MediaManagerSync",
+    "MemoryCache_MediaManager",
+    "MUploadFile",
+    "Wrapper_MediaManager",
+]
 
 
-@lru_cache
-def get_system_media_manager(*args, **kwargs) -> MediaManager:
+def _create_system_media_manager(*args, **kwargs) -> MediaManager:
     if os.getenv("MEDIA_MANAGER", "local") == "AWS":
         return AWS_MediaManager(*args, **kwargs)
     else:
         return Local_MediaManager(*args, **kwargs)
+
+
+system_media_managers = MediaManagerFactory(_create_system_media_manager)
+
+
+def get_system_media_manager(*args, **kwargs) -> MediaManager:
+    return system_media_managers.get(*args, **kwargs)
@@ -1,20 +1,244 @@
-from media_manager.base.datastructures import MUploadFile
-from typing_extensions import TypedDict
+from media_manager.base.datastructures import FileInfo, MUploadFile
+from media_manager.base.executor import BackendExecutor
+from media_manager.base.utils import map_in_threads, run_in_tasks, stream_size
+from typing_extensions import NotRequired, TypedDict
+from collections import deque
 from io import BytesIO
-from collections.abc import Callable
+from typing import BinaryIO
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import itertools
 import os
+import time
+import warnings
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_STREAM_CHUNK_SIZE = 256 * 1024
+LIST_BATCH_SIZE = 1000
 
 
 class DeletedFile(TypedDict):
     key: str
+    # Only present when the file could not be deleted
+    error: NotRequired[str]
+
+
+class CopiedFile(TypedDict):
+    key: str
+    destination: str
+    # Only present when the file could not be copied
+    error: NotRequired[str]
+
+
+class TransferError(TypedDict):
+    key: str
+    error: str
+
+
+class TransferReport(TypedDict):
+    # Keys of the files transferred, in the order they were given
+    files: list[str]
+    errors: list[TransferError]
+    bytes_transferred: int
+    seconds: float
+    # Bytes per second
+    throughput: float
+
+
+class DownloadReport(TransferReport):
+    downloads: dict[str, BytesIO]
+
+
+# (key, error) for every upload, error is None when it succeeded
+UploadResult = tuple[str, "Exception | None"]
+# (key, file, error) for every download, file is None when it failed
+DownloadResult = tuple[str, "BytesIO | None", "Exception | None"]
+
+
+class _TransferReporter:
+    """
+    Builds the TransferReport of upload_many and download_many.
+    """
+
+    def __init__(self, fail_fast: bool) -> None:
+        self.fail_fast = fail_fast
+        self.started = time.perf_counter()
+        self.report: TransferReport = {
+            "files": [],
+            "errors": [],
+            "bytes_transferred": 0,
+            "seconds": 0.0,
+            "throughput": 0.0,
+        }
+
+    def add(self, key: str, size: int | None, error: Exception | None):
+        if error is None:
+            self.report["files"].append(key)
+            self.report["bytes_transferred"] += size or 0
+        elif self.fail_fast:
+            raise error
+        else:
+            self.report["errors"].append({"key": key, "error": repr(error)})
+
+    def finish(self) -> TransferReport:
+        seconds = time.perf_counter() - self.started
+        self.report["seconds"] = seconds
+        if seconds > 0:
+            self.report["throughput"] = (
+                self.report["bytes_transferred"] / seconds
+            )
+        return self.report
+
+
+class OperationEvent(TypedDict):
+    # Public method called, without the sync_ prefix
+    operation: str
+    # Class of the manager, like AWS_MediaManager
+    backend: str
+    # Wall clock time the call started at, in seconds since the epoch
+    start_time: float
+    seconds: float
+    # Bytes uploaded or downloaded, None when unknown or not a transfer
+    bytes: int | None
+    # Bytes per second
+    throughput: float | None
+    # Class name of the error raised, None when the call succeeded
+    error: str | None
+
+
+# Called with the event of every instrumented call
+Instrument = Callable[[OperationEvent], None]
+
+
+def _upload_size(args: tuple, kwargs: dict, result) -> int | None:
+    file = kwargs["file"] if "file" in kwargs else args[0]
+    return stream_size(file.file)
+
+
+def _downloaded_size(args: tuple, kwargs: dict, result) -> int | None:
+    # A BytesIO, or a memoryview of the file with mmap
+    if isinstance(result, memoryview):
+        return result.nbytes
+    with result.getbuffer() as view:
+        return view.nbytes
+
+
+def _measure(size, args: tuple, kwargs: dict, result) -> int | None:
+    # Like the instruments, measuring the call never fails it
+    try:
+        return size(args, kwargs, result)
+    except Exception as error:
+        warnings.warn(f"Measuring the size failed: {error!r}", RuntimeWarning)
+        return None
+
+
+def _report_size(args: tuple, kwargs: dict, result) -> int | None:
+    return result["bytes_transferred"]
+
+
+def _instrumented(
+    operation: str,
+    size: Callable[[tuple, dict, object], int | None] | None = None,
+    size_before: bool = False,
+):
+    """
+    Reports the calls of the public method to the instruments of the
+    manager. size gives the bytes transferred from the arguments and the
+    result, it is called before the method with size_before (the result is
+    None then). Without instruments the method is called right away.
+    """
+
+    def decorator(method):
+        if asyncio.iscoroutinefunction(method):
+
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                if not self.instruments:
+                    return await method(self, *args, **kwargs)
+                start_time, started = time.time(), time.perf_counter()
+                transferred = None
+                if size_before:
+                    transferred = _measure(size, args, kwargs, None)
+                try:
+                    result = await method(self, *args, **kwargs)
+                except Exception as error:
+                    self._emit(operation, start_time, started, None, error)
+                    raise
+                if size is not None and not size_before:
+                    transferred = _measure(size, args, kwargs, result)
+                self._emit(operation, start_time, started, transferred, None)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.instruments:
+                return method(self, *args, **kwargs)
+            start_time, started = time.time(), time.perf_counter()
+            transferred = None
+            if size_before:
+                transferred = _measure(size, args, kwargs, None)
+            try:
+                result = method(self, *args, **kwargs)
+            except Exception as error:
+                self._emit(operation, start_time, started, None, error)
+                raise
+            if size is not None and not size_before:
+                transferred = _measure(size, args, kwargs, result)
+            self._emit(operation, start_time, started, transferred, None)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _allocate_download(size: int) -> BytesIO:
+    # The chunks are written in place through getbuffer(), no extra copy
+    response = BytesIO()
+    if size:
+        response.seek(size - 1)
+        response.write(b"\0")
+        response.seek(0)
+    return response
+
+
+def folder_prefix(prefix: str) -> str:
+    # Lists the folder only, "backup" would also match "backup-2024/" on S3
+    return prefix.rstrip("/") + "/"
+
+
+def copy_destination(prefix: str, path: str, destination: str) -> str:
+    # Path below destination of a file below prefix
+    relative = path[len(prefix) :].lstrip("/")
+    return f"{destination.rstrip('/')}/{relative}"
+
+
+def _validate_range(start: int, end: int | None) -> None:
+    if start < 0 or (end is not None and end < start):
+        raise ValueError(f"Invalid range {start}-{end}")
 
 
 class MediaManager:
+    # Keyword arguments of the upload methods consumed by _backend_upload,
+    # they are not forwarded to upload_path
+    backend_upload_kwargs: tuple[str, ...] = ()
+    # Checksums (md5, sha256, crc32c) computed while the files are uploaded
+    # and verified when they are downloaded
+    checksums: tuple[str, ...] = ()
+    # Receive the OperationEvent of the uploads, downloads, deletes, copies,
+    # file infos and signed URLs, see add_instrument
+    instruments: tuple[Instrument, ...] = ()
+
     def __init__(
         self,
         upload_path: Callable | None = None,
         root_folder: str = "",
         add_environment_as_prefix: bool = True,
+        max_workers: int | None = None,
         *_args,
         **_kwargs,
     ):
@@ -22,10 +246,71 @@ class MediaManager:
         self.root_folder = root_folder
         self.add_environment_as_prefix = add_environment_as_prefix
         self.environment = os.getenv("ENVIRONMENT", "local")
+        # Thread pool where the async methods run the blocking backend calls
+        self.executor = BackendExecutor(max_workers=max_workers)
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+    async def aclose(self) -> None:
+        self.close()
+
+    def warm(self) -> None:
+        """
+        Prepares the backend ahead of the first request, like creating the
+        clients and opening their connections.
+        """
+
+    def add_instrument(self, instrument: Instrument) -> None:
+        """
+        Calls instrument with the OperationEvent of every upload, download,
+        delete, copy, file info and signed URL of the manager. The
+        instruments run in the thread or task of the call, an instrument
+        that raises does not fail the call.
+        """
+        # Replaced, not mutated, the calls in flight keep their tuple
+        self.instruments = (*self.instruments, instrument)
+
+    def remove_instrument(self, instrument: Instrument) -> None:
+        self.instruments = tuple(
+            other for other in self.instruments if other != instrument
+        )
+
+    def _emit(
+        self,
+        operation: str,
+        start_time: float,
+        started: float,
+        size: int | None,
+        error: Exception | None,
+    ) -> None:
+        seconds = time.perf_counter() - started
+        event: OperationEvent = {
+            "operation": operation,
+            "backend": type(self).__name__,
+            "start_time": start_time,
+            "seconds": seconds,
+            "bytes": size,
+            "throughput": size / seconds if size and seconds > 0 else None,
+            "error": None if error is None else type(error).__name__,
+        }
+        for instrument in self.instruments:
+            try:
+                instrument(event)
+            except Exception as instrument_error:
+                warnings.warn(
+                    f"Instrument {instrument!r} failed: {instrument_error!r}",
+                    RuntimeWarning,
+                )
 
     def get_complete_path(self, file: MUploadFile, *args, **kwargs) -> str:
         if self.upload_path is None:
             raise ValueError("upload_path is required for this operation")
+        kwargs = {
+            key: value
+            for key, value in kwargs.items()
+            if key not in self.backend_upload_kwargs
+        }
         complete_file_name = self.upload_path(file, **kwargs)
         if self.add_environment_as_prefix:
             complete_path = os.path.join(
@@ -47,23 +332,214 @@ class MediaManager:
     def _backend_get_file_location(self, complete_path: str, *args, **kwargs) -> str:
         raise NotImplementedError
 
+    def _backend_delete_files(
+        self, keys: Iterable[str], *args, **kwargs
+    ) -> list[DeletedFile]:
+        raise NotImplementedError
+
     def _backend_delete_files_in_folder(
         self, prefix: str, *args, **kwargs
-    ) -> list[str]:
+    ) -> list[DeletedFile]:
         raise NotImplementedError
 
     def _backend_list_files_in_folder(self, prefix: str, *args, **kwargs) -> list[str]:
         raise NotImplementedError
 
+    def _backend_iter_files_in_folder(
+        self, prefix: str, *args, **kwargs
+    ) -> Iterator[FileInfo]:
+        raise NotImplementedError
+
+    def _backend_listing_path(self, prefix: str, key: str) -> str:
+        # Complete path of a key yielded by _backend_iter_files_in_folder,
+        # the S3 keys already are
+        return key
+
     def _backend_download_file(self, file: str) -> BytesIO:
         raise NotImplementedError
 
+    def _backend_download_range(
+        self, file: str, start: int, end: int | None = None
+    ) -> BytesIO:
+        raise NotImplementedError
+
+    def _backend_get_file_size(self, file: str) -> int:
+        raise NotImplementedError
+
+    def _backend_open_file(self, file: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def _backend_get_file_info(self, file: str) -> FileInfo:
+        raise NotImplementedError
+
+    def _backend_file_exists(self, file: str) -> bool:
+        try:
+            self._backend_get_file_info(file)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _backend_get_folder_size(self, prefix: str) -> int:
+        return sum(
+            file["size"] for file in self._backend_iter_files_in_folder(prefix)
+        )
+
+    def _backend_stream_file(
+        self,
+        file: str,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+        start: int = 0,
+        end: int | None = None,
+    ) -> Iterator[bytes]:
+        raise NotImplementedError
+
+    def _backend_signed_url(
+        self, file: str, verify: bool = False, *args, **kwargs
+    ) -> str:
+        raise NotImplementedError
+
+    def _backend_signed_urls(
+        self,
+        keys: Iterable[str],
+        verify: bool = False,
+        *args,
+        max_concurrency: int = 8,
+        **kwargs,
+    ) -> dict[str, str]:
+        def sign(key: str) -> tuple[str, str | None]:
+            try:
+                return key, self._backend_signed_url(
+                    key, verify, *args, **kwargs
+                )
+            except FileNotFoundError:
+                return key, None
+
+        return {
+            key: url
+            for key, url in map_in_threads(sign, keys, max_concurrency)
+            if url is not None
+        }
+
+    def _backend_upload_many(
+        self,
+        uploads: Iterable[tuple[MUploadFile, str]],
+        max_concurrency: int,
+        *args,
+        **kwargs,
+    ) -> Iterator[UploadResult]:
+        """
+        Uploads every (file, complete_path) and yields the results in the
+        same order. Backends with a batch API override it.
+        """
+
+        def upload(item: tuple[MUploadFile, str]) -> UploadResult:
+            file, complete_path = item
+            try:
+                self._backend_upload(file, complete_path, *args, **kwargs)
+            except Exception as error:
+                return complete_path, error
+            return complete_path, None
+
+        yield from map_in_threads(upload, uploads, max_concurrency)
+
+    def _backend_download_many(
+        self, keys: Iterable[str], max_concurrency: int
+    ) -> Iterator[DownloadResult]:
+        def download(key: str) -> DownloadResult:
+            try:
+                return key, self._backend_download_file(key), None
+            except Exception as error:
+                return key, None, error
+
+        yield from map_in_threads(download, keys, max_concurrency)
+
+    def _backend_copy_file(
+        self, source: str, destination: str, *args, **kwargs
+    ) -> str:
+        # Through the client, backends that copy on their side override it
+        file = MUploadFile(self._backend_download_file(source))
+        self._backend_upload(file, destination)
+        return destination
+
+    def _backend_move_file(
+        self, source: str, destination: str, *args, **kwargs
+    ) -> str:
+        self._backend_copy_file(source, destination, *args, **kwargs)
+        self._backend_delete(source)
+        return destination
+
+    def _backend_copy_folder(
+        self,
+        prefix: str,
+        destination: str,
+        *args,
+        max_concurrency: int = 8,
+        **kwargs,
+    ) -> list[CopiedFile]:
+        prefix = folder_prefix(prefix)
+        # Listed before copying, the destination may be below the prefix
+        paths = [
+            self._backend_listing_path(prefix, file["key"])
+            for file in self._backend_iter_files_in_folder(prefix)
+        ]
+
+        def copy(path: str) -> CopiedFile:
+            target = copy_destination(prefix, path, destination)
+            try:
+                self._backend_copy_file(path, target, *args, **kwargs)
+            except Exception as error:
+                return {
+                    "key": path,
+                    "destination": target,
+                    "error": str(error),
+                }
+            return {"key": path, "destination": target}
+
+        return list(map_in_threads(copy, paths, max_concurrency))
+
     # ===== Abstract Methods sync methods =====
+    @_instrumented("upload_file", _upload_size, size_before=True)
     def sync_upload_file(self, file: MUploadFile, *args, **kwargs) -> str:
         complete_path = self.get_complete_path(file, *args, **kwargs)
         self._backend_upload(file, complete_path, *args, **kwargs)
         return complete_path
 
+    @_instrumented("upload_many", _report_size)
+    def sync_upload_many(
+        self,
+        files: Iterable[MUploadFile],
+        *args,
+        max_concurrency: int = 8,
+        fail_fast: bool = False,
+        **kwargs,
+    ) -> TransferReport:
+        """
+        Uploads the files with at most max_concurrency uploads in flight.
+        With fail_fast the first error is raised and the pending uploads are
+        cancelled, otherwise the errors are collected in the report.
+        """
+        reporter = _TransferReporter(fail_fast)
+        # The results come in the order of the uploads, several files can
+        # have the same path
+        sizes: deque[int | None] = deque()
+
+        def iter_uploads() -> Iterator[tuple[MUploadFile, str]]:
+            for file in files:
+                complete_path = self.get_complete_path(file, *args, **kwargs)
+                sizes.append(stream_size(file.file))
+                yield file, complete_path
+
+        results = self._backend_upload_many(
+            iter_uploads(), max_concurrency, *args, **kwargs
+        )
+        try:
+            for complete_path, error in results:
+                reporter.add(complete_path, sizes.popleft(), error)
+        finally:
+            results.close()
+        return reporter.finish()
+
+    @_instrumented("delete_file")
     def sync_delete_file(self, complete_path: str, *args, **kwargs) -> str:
         delete_response = self._backend_delete(complete_path, *args, **kwargs)
         return delete_response
@@ -72,46 +548,653 @@ class MediaManager:
         location = self._backend_get_file_location(complete_path, *args, **kwargs)
         return location
 
+    @_instrumented("delete_files")
+    def sync_delete_files(
+        self, keys: Iterable[str], *args, **kwargs
+    ) -> list[DeletedFile]:
+        """
+        Deletes the files in batches, the files that could not be deleted
+        are reported with an error instead of raising.
+        """
+        return self._backend_delete_files(keys, *args, **kwargs)
+
     def sync_delete_files_in_folder(
         self, prefix: str, *args, **kwargs
     ) -> list[DeletedFile]:
-        deleted_files = self._backend_delete_files_in_folder(prefix, *args, **kwargs)
-        return [{"key": file} for file in deleted_files]
+        return self._backend_delete_files_in_folder(prefix, *args, **kwargs)
 
     def sync_list_files_in_folder(self, prefix: str, *args, **kwargs) -> list[str]:
         return self._backend_list_files_in_folder(prefix, *args, **kwargs)
 
-    def sync_download_file(self, file: str, *args, **kwargs) -> BytesIO:
+    def sync_iter_files_in_folder(
+        self, prefix: str, *args, **kwargs
+    ) -> Iterator[FileInfo]:
+        """
+        Lazily yields the files in the folder with their metadata, the
+        listing is never held in memory.
+        """
+        yield from self._backend_iter_files_in_folder(prefix, *args, **kwargs)
+
+    @_instrumented("download_file", _downloaded_size)
+    def sync_download_file(
+        self,
+        file: str,
+        *args,
+        parallel: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_concurrency: int = 8,
+        **kwargs,
+    ) -> BytesIO:
+        if parallel:
+            return self._download_file_parallel(
+                file, chunk_size, max_concurrency
+            )
         return self._backend_download_file(file, *args, **kwargs)
 
-    def sync_signed_url(self, file: str, verify: bool, *args, **kwargs) -> str:
-        raise NotImplementedError
+    @_instrumented("download_many", _report_size)
+    def sync_download_many(
+        self,
+        keys: Iterable[str],
+        max_concurrency: int = 8,
+        fail_fast: bool = False,
+    ) -> DownloadReport:
+        reporter = _TransferReporter(fail_fast)
+        downloads: dict[str, BytesIO] = {}
+        results = self._backend_download_many(keys, max_concurrency)
+        try:
+            for key, file, error in results:
+                size = None
+                if file is not None:
+                    downloads[key] = file
+                    size = file.getbuffer().nbytes
+                reporter.add(key, size, error)
+        finally:
+            results.close()
+        return {**reporter.finish(), "downloads": downloads}
+
+    @_instrumented("download_range", _downloaded_size)
+    def sync_download_range(
+        self, file: str, start: int, end: int | None = None
+    ) -> BytesIO:
+        """
+        Downloads the bytes from start to end, both included. When end is
+        None the range goes to the end of the file.
+        """
+        _validate_range(start, end)
+        return self._backend_download_range(file, start, end)
+
+    def sync_get_file_size(self, file: str) -> int:
+        return self._backend_get_file_size(file)
+
+    def sync_open_file(self, file: str) -> BinaryIO:
+        """
+        Opens the file for reading without buffering, the handle can be
+        given to socket.sendfile to serve it without copying it through
+        Python. Only backends storing the files on a local filesystem
+        implement it, the caller closes the handle.
+        """
+        return self._backend_open_file(file)
+
+    def sync_file_exists(self, file: str) -> bool:
+        return self._backend_file_exists(file)
+
+    def sync_get_folder_size(self, prefix: str) -> int:
+        """
+        Total size in bytes of the files in the folder and its subfolders.
+        """
+        return self._backend_get_folder_size(prefix)
+
+    @_instrumented("get_file_info")
+    def sync_get_file_info(self, file: str) -> FileInfo:
+        """
+        Size, ETag and modification date of the file without downloading
+        it, raises FileNotFoundError when it does not exist.
+        """
+        return self._backend_get_file_info(file)
+
+    def sync_stream_file(
+        self,
+        file: str,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+        start: int = 0,
+        end: int | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Yields the file in chunks of at most chunk_size bytes, only one chunk
+        is held in memory at a time. start and end limit the bytes streamed
+        like in sync_download_range.
+        """
+        _validate_range(start, end)
+        yield from self._backend_stream_file(file, chunk_size, start, end)
+
+    def _download_file_parallel(
+        self, file: str, chunk_size: int, max_concurrency: int
+    ) -> BytesIO:
+        size = self._backend_get_file_size(file)
+        response = _allocate_download(size)
+        view = response.getbuffer()
+
+        def download_chunk(start: int):
+            end = min(start + chunk_size, size) - 1
+            chunk = self._backend_download_range(file, start, end)
+            view[start : end + 1] = chunk.getbuffer()
+
+        try:
+            with ThreadPoolExecutor(max_concurrency) as executor:
+                list(executor.map(download_chunk, range(0, size, chunk_size)))
+        finally:
+            view.release()
+        return response
+
+    @_instrumented("signed_url")
+    def sync_signed_url(
+        self, file: str, verify: bool = False, *args, **kwargs
+    ) -> str:
+        return self._backend_signed_url(file, verify, *args, **kwargs)
+
+    @_instrumented("signed_urls")
+    def sync_signed_urls(
+        self,
+        keys: Iterable[str],
+        verify: bool = False,
+        *args,
+        max_concurrency: int = 8,
+        **kwargs,
+    ) -> dict[str, str]:
+        """
+        Signs many keys at once and returns a key to URL mapping. With verify
+        the keys that do not exist are left out of the mapping.
+        """
+        return self._backend_signed_urls(
+            keys, verify, *args, max_concurrency=max_concurrency, **kwargs
+        )
+
+    @_instrumented("copy_file")
+    def sync_copy_file(
+        self, source: str, destination: str, *args, **kwargs
+    ) -> str:
+        """
+        Copies the file at source to destination, both complete paths. The
+        backends copy it on their side, the data does not go through the
+        client.
+        """
+        return self._backend_copy_file(source, destination, *args, **kwargs)
+
+    @_instrumented("move_file")
+    def sync_move_file(
+        self, source: str, destination: str, *args, **kwargs
+    ) -> str:
+        return self._backend_move_file(source, destination, *args, **kwargs)
+
+    def sync_copy_folder(
+        self,
+        prefix: str,
+        destination: str,
+        *args,
+        max_concurrency: int = 8,
+        **kwargs,
+    ) -> list[CopiedFile]:
+        """
+        Copies every file below prefix to the same path below destination,
+        max_concurrency copies at a time. The files that could not be copied
+        are reported with an error instead of raising.
+        """
+        return self._backend_copy_folder(
+            prefix,
+            destination,
+            *args,
+            max_concurrency=max_concurrency,
+            **kwargs,
+        )
+
+    # Async backend methods, by default the blocking backend methods run in
+    # the manager executor. Backends with a native async client override them
+    async def _async_backend_upload(
+        self, file: MUploadFile, complete_path: str, *args, **kwargs
+    ) -> str:
+        return await self.executor.run(
+            self._backend_upload, file, complete_path, *args, **kwargs
+        )
+
+    async def _async_backend_delete(
+        self, complete_path: str, *args, **kwargs
+    ) -> str:
+        return await self.executor.run(
+            self._backend_delete, complete_path, *args, **kwargs
+        )
+
+    async def _async_backend_get_file_location(
+        self, complete_path: str, *args, **kwargs
+    ) -> str:
+        return await self.executor.run(
+            self._backend_get_file_location, complete_path, *args, **kwargs
+        )
+
+    async def _async_backend_delete_files(
+        self, keys: Iterable[str], *args, **kwargs
+    ) -> list[DeletedFile]:
+        return await self.executor.run(
+            self._backend_delete_files, keys, *args, **kwargs
+        )
+
+    async def _async_backend_delete_files_in_folder(
+        self, prefix: str, *args, **kwargs
+    ) -> list[DeletedFile]:
+        return await self.executor.run(
+            self._backend_delete_files_in_folder, prefix, *args, **kwargs
+        )
+
+    async def _async_backend_list_files_in_folder(
+        self, prefix: str, *args, **kwargs
+    ) -> list[str]:
+        return await self.executor.run(
+            self._backend_list_files_in_folder, prefix, *args, **kwargs
+        )
+
+    async def _iterate_in_executor(
+        self, iterator: Iterator, batch_size: int = 1
+    ) -> AsyncIterator:
+        """
+        Consumes a blocking generator in the executor, batch_size items per
+        round trip.
+        """
+        step = None
+        try:
+            while True:
+                step = self.executor.submit(
+                    list, itertools.islice(iterator, batch_size)
+                )
+                items = await asyncio.wrap_future(step)
+                for item in items:
+                    yield item
+                if len(items) < batch_size:
+                    break
+        finally:
+            # A cancelled await leaves the generator running in the executor,
+            # it can only be closed once that step is over
+            if step is not None and not step.done():
+                await asyncio.wait([asyncio.wrap_future(step)])
+            await self.executor.run(iterator.close)
+
+    async def _async_backend_iter_files_in_folder(
+        self, prefix: str, *args, **kwargs
+    ) -> AsyncIterator[FileInfo]:
+        iterator = self._backend_iter_files_in_folder(prefix, *args, **kwargs)
+        async for file in self._iterate_in_executor(iterator, LIST_BATCH_SIZE):
+            yield file
+
+    async def _async_backend_download_file(
+        self, file: str, *args, **kwargs
+    ) -> BytesIO:
+        return await self.executor.run(
+            self._backend_download_file, file, *args, **kwargs
+        )
+
+    async def _async_backend_download_range(
+        self, file: str, start: int, end: int | None = None
+    ) -> BytesIO:
+        return await self.executor.run(
+            self._backend_download_range, file, start, end
+        )
+
+    async def _async_backend_get_file_size(self, file: str) -> int:
+        return await self.executor.run(self._backend_get_file_size, file)
+
+    async def _async_backend_open_file(self, file: str) -> BinaryIO:
+        return await self.executor.run(self._backend_open_file, file)
+
+    async def _async_backend_get_file_info(self, file: str) -> FileInfo:
+        return await self.executor.run(self._backend_get_file_info, file)
+
+    async def _async_backend_file_exists(self, file: str) -> bool:
+        try:
+            await self._async_backend_get_file_info(file)
+        except FileNotFoundError:
+            return False
+        return True
+
+    async def _async_backend_get_folder_size(self, prefix: str) -> int:
+        return await self.executor.run(self._backend_get_folder_size, prefix)
+
+    async def _async_backend_stream_file(
+        self,
+        file: str,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+        start: int = 0,
+        end: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        iterator = self._backend_stream_file(file, chunk_size, start, end)
+        async for chunk in self._iterate_in_executor(iterator):
+            yield chunk
+
+    async def _async_backend_upload_many(
+        self,
+        uploads: Iterable[tuple[MUploadFile, str]],
+        max_concurrency: int,
+        *args,
+        **kwargs,
+    ) -> AsyncIterator[UploadResult]:
+        async def upload(
+            file: MUploadFile, complete_path: str
+        ) -> UploadResult:
+            try:
+                await self._async_backend_upload(
+                    file, complete_path, *args, **kwargs
+                )
+            except Exception as error:
+                return complete_path, error
+            return complete_path, None
+
+        results = run_in_tasks(
+            (upload(file, path) for file, path in uploads), max_concurrency
+        )
+        try:
+            async for result in results:
+                yield result
+        finally:
+            await results.aclose()
+
+    async def _async_backend_download_many(
+        self, keys: Iterable[str], max_concurrency: int
+    ) -> AsyncIterator[DownloadResult]:
+        async def download(key: str) -> DownloadResult:
+            try:
+                return key, await self._async_backend_download_file(key), None
+            except Exception as error:
+                return key, None, error
+
+        results = run_in_tasks(
+            (download(key) for key in keys), max_concurrency
+        )
+        try:
+            async for result in results:
+                yield result
+        finally:
+            await results.aclose()
+
+    async def _async_backend_signed_url(
+        self, file: str, verify: bool = False, *args, **kwargs
+    ) -> str:
+        return await self.executor.run(
+            self._backend_signed_url, file, verify, *args, **kwargs
+        )
+
+    async def _async_backend_signed_urls(
+        self,
+        keys: Iterable[str],
+        verify: bool = False,
+        *args,
+        max_concurrency: int = 8,
+        **kwargs,
+    ) -> dict[str, str]:
+        return await self.executor.run(
+            self._backend_signed_urls,
+            keys,
+            verify,
+            *args,
+            max_concurrency=max_concurrency,
+            **kwargs,
+        )
+
+    async def _async_backend_copy_file(
+        self, source: str, destination: str, *args, **kwargs
+    ) -> str:
+        return await self.executor.run(
+            self._backend_copy_file, source, destination, *args, **kwargs
+        )
+
+    async def _async_backend_move_file(
+        self, source: str, destination: str, *args, **kwargs
+    ) -> str:
+        return await self.executor.run(
+            self._backend_move_file, source, destination, *args, **kwargs
+        )
+
+    async def _async_backend_copy_folder(
+        self,
+        prefix: str,
+        destination: str,
+        *args,
+        max_concurrency: int = 8,
+        **kwargs,
+    ) -> list[CopiedFile]:
+        return await self.executor.run(
+            self._backend_copy_folder,
+            prefix,
+            destination,
+            *args,
+            max_concurrency=max_concurrency,
+            **kwargs,
+        )
 
     # ===== Abstract Methods async methods =====
+    @_instrumented("upload_file", _upload_size, size_before=True)
     async def upload_file(self, file: MUploadFile, *args, **kwargs) -> str:
         complete_path = self.get_complete_path(file, *args, **kwargs)
-        self._backend_upload(file, complete_path, *args, **kwargs)
+        await self._async_backend_upload(file, complete_path, *args, **kwargs)
         return complete_path
 
+    @_instrumented("upload_many", _report_size)
+    async def upload_many(
+        self,
+        files: Iterable[MUploadFile],
+        *args,
+        max_concurrency: int = 8,
+        fail_fast: bool = False,
+        **kwargs,
+    ) -> TransferReport:
+        reporter = _TransferReporter(fail_fast)
+        # The results come in the order of the uploads, several files can
+        # have the same path
+        sizes: deque[int | None] = deque()
+
+        def iter_uploads() -> Iterator[tuple[MUploadFile, str]]:
+            for file in files:
+                complete_path = self.get_complete_path(file, *args, **kwargs)
+                sizes.append(stream_size(file.file))
+                yield file, complete_path
+
+        results = self._async_backend_upload_many(
+            iter_uploads(), max_concurrency, *args, **kwargs
+        )
+        try:
+            async for complete_path, error in results:
+                reporter.add(complete_path, sizes.popleft(), error)
+        finally:
+            await results.aclose()
+        return reporter.finish()
+
+    @_instrumented("delete_file")
     async def delete_file(self, complete_path: str, *args, **kwargs) -> str:
-        delete_response = self._backend_delete(complete_path, *args, **kwargs)
+        delete_response = await self._async_backend_delete(
+            complete_path, *args, **kwargs
+        )
         return delete_response
 
     async def get_file_location(self, complete_path: str, *args, **kwargs) -> str:
-        location = self._backend_get_file_location(complete_path, *args, **kwargs)
+        location = await self._async_backend_get_file_location(
+            complete_path, *args, **kwargs
+        )
         return location
 
+    @_instrumented("delete_files")
+    async def delete_files(
+        self, keys: Iterable[str], *args, **kwargs
+    ) -> list[DeletedFile]:
+        return await self._async_backend_delete_files(keys, *args, **kwargs)
+
     async def delete_files_in_folder(
         self, prefix: str, *args, **kwargs
     ) -> list[DeletedFile]:
-        deleted_files = self._backend_delete_files_in_folder(prefix, *args, **kwargs)
-        return [{"key": file} for file in deleted_files]
+        return await self._async_backend_delete_files_in_folder(
+            prefix, *args, **kwargs
+        )
 
     async def list_files_in_folder(self, prefix: str, *args, **kwargs) -> list[str]:
-        return self._backend_list_files_in_folder(prefix, *args, **kwargs)
+        return await self._async_backend_list_files_in_folder(
+            prefix, *args, **kwargs
+        )
 
-    async def download_file(self, file: str, *args, **kwargs) -> BytesIO:
-        return self._backend_download_file(file, *args, **kwargs)
+    async def iter_files_in_folder(
+        self, prefix: str, *args, **kwargs
+    ) -> AsyncIterator[FileInfo]:
+        async for file in self._async_backend_iter_files_in_folder(
+            prefix, *args, **kwargs
+        ):
+            yield file
 
-    async def signed_url(self, file: str, verify: bool, *args, **kwargs) -> str:
-        raise NotImplementedError
+    @_instrumented("download_file", _downloaded_size)
+    async def download_file(
+        self,
+        file: str,
+        *args,
+        parallel: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_concurrency: int = 8,
+        **kwargs,
+    ) -> BytesIO:
+        if parallel:
+            return await self._async_download_file_parallel(
+                file, chunk_size, max_concurrency
+            )
+        return await self._async_backend_download_file(file, *args, **kwargs)
+
+    @_instrumented("download_many", _report_size)
+    async def download_many(
+        self,
+        keys: Iterable[str],
+        max_concurrency: int = 8,
+        fail_fast: bool = False,
+    ) -> DownloadReport:
+        reporter = _TransferReporter(fail_fast)
+        downloads: dict[str, BytesIO] = {}
+        results = self._async_backend_download_many(keys, max_concurrency)
+        try:
+            async for key, file, error in results:
+                size = None
+                if file is not None:
+                    downloads[key] = file
+                    size = file.getbuffer().nbytes
+                reporter.add(key, size, error)
+        finally:
+            await results.aclose()
+        return {**reporter.finish(), "downloads": downloads}
+
+    @_instrumented("download_range", _downloaded_size)
+    async def download_range(
+        self, file: str, start: int, end: int | None = None
+    ) -> BytesIO:
+        _validate_range(start, end)
+        return await self._async_backend_download_range(file, start, end)
+
+    async def get_file_size(self, file: str) -> int:
+        return await self._async_backend_get_file_size(file)
+
+    async def open_file(self, file: str) -> BinaryIO:
+        return await self._async_backend_open_file(file)
+
+    @_instrumented("get_file_info")
+    async def get_file_info(self, file: str) -> FileInfo:
+        return await self._async_backend_get_file_info(file)
+
+    async def file_exists(self, file: str) -> bool:
+        return await self._async_backend_file_exists(file)
+
+    async def get_folder_size(self, prefix: str) -> int:
+        return await self._async_backend_get_folder_size(prefix)
+
+    async def stream_file(
+        self,
+        file: str,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+        start: int = 0,
+        end: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        _validate_range(start, end)
+        async for chunk in self._async_backend_stream_file(
+            file, chunk_size, start, end
+        ):
+            yield chunk
+
+    async def _async_download_file_parallel(
+        self, file: str, chunk_size: int, max_concurrency: int
+    ) -> BytesIO:
+        size = await self._async_backend_get_file_size(file)
+        response = _allocate_download(size)
+        view = response.getbuffer()
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def download_chunk(start: int):
+            end = min(start + chunk_size, size) - 1
+            async with semaphore:
+                chunk = await self._async_backend_download_range(
+                    file, start, end
+                )
+            view[start : end + 1] = chunk.getbuffer()
+
+        tasks = [
+            asyncio.ensure_future(download_chunk(start))
+            for start in range(0, size, chunk_size)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # No chunk can be written once the view is released
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            view.release()
+        return response
+
+    @_instrumented("signed_url")
+    async def signed_url(
+        self, file: str, verify: bool = False, *args, **kwargs
+    ) -> str:
+        return await self._async_backend_signed_url(file, verify, *args, **kwargs)
+
+    @_instrumented("signed_urls")
+    async def signed_urls(
+        self,
+        keys: Iterable[str],
+        verify: bool = False,
+        *args,
+        max_concurrency: int = 8,
+        **kwargs,
+    ) -> dict[str, str]:
+        return await self._async_backend_signed_urls(
+            keys, verify, *args, max_concurrency=max_concurrency, **kwargs
+        )
+
+    @_instrumented("copy_file")
+    async def copy_file(
+        self, source: str, destination: str, *args, **kwargs
+    ) -> str:
+        return await self._async_backend_copy_file(
+            source, destination, *args, **kwargs
+        )
+
+    @_instrumented("move_file")
+    async def move_file(
+        self, source: str, destination: str, *args, **kwargs
+    ) -> str:
+        return await self._async_backend_move_file(
+            source, destination, *args, **kwargs
+        )
+
+    async def copy_folder(
+        self,
+        prefix: str,
+        destination: str,
+        *args,
+        max_concurrency: int = 8,
+        **kwargs,
+    ) -> list[CopiedFile]:
+        return await self._async_backend_copy_folder(
+            prefix,
+            destination,
+            *args,
+            max_concurrency=max_concurrency,
+            **kwargs,
+        )
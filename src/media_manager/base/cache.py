@@ -0,0 +1,133 @@
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing_extensions import TypedDict
+from typing import Any
+import threading
+import time
+
+_MISSING = object()
+
+
+class CacheStats(TypedDict):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    # Sum of the sizes given to set, in bytes
+    size: int
+
+
+class TTLCache:
+    """
+    Thread safe LRU cache whose entries expire after a time to live. The
+    least recently used entries are evicted above max_entries, or above
+    max_bytes when the entries are set with their size.
+    """
+
+    def __init__(
+        self,
+        max_entries: int | None = 1024,
+        ttl: float | None = None,
+        max_bytes: int | None = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # key -> (value, expires_at, size), expires_at is None for no
+        # expiration
+        self._entries: OrderedDict[
+            Hashable, tuple[Any, float | None, int]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "size": self._size,
+            }
+
+    def _remove(self, key: Hashable) -> Any:
+        # Called with the lock held
+        value, _, size = self._entries.pop(key)
+        self._size -= size
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value, expires_at, _ = self._entries.get(
+                key, (_MISSING, None, 0)
+            )
+            if value is _MISSING:
+                self._misses += 1
+                return default
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float | None = None,
+        size: int = 0,
+    ):
+        if ttl is None:
+            ttl = self.ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = (value, expires_at, size)
+            self._size += size
+            while (
+                self.max_entries is not None
+                and len(self._entries) > self.max_entries
+            ) or (
+                self.max_bytes is not None and self._size > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._remove(key)
+
+    def pop_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Removes the entries whose key matches and returns how many there
+        were, it goes through every entry.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
@@ -0,0 +1,150 @@
+from typing_extensions import TypedDict
+from collections.abc import Iterable
+import base64
+import hashlib
+
+try:
+    from crc32c import crc32c as _crc32c
+except ImportError:  # pragma: no cover - optional dependency
+    _crc32c = None
+
+ALGORITHMS = ("md5", "sha256", "crc32c")
+
+
+class Checksums(TypedDict, total=False):
+    # Hex digests, only the algorithms computed are present
+    md5: str
+    sha256: str
+    crc32c: str
+
+
+class ChecksumError(ValueError):
+    """
+    The data read does not match the checksum stored with the file.
+    """
+
+
+def _crc32c_table() -> list[int]:
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ (0x82F63B78 if crc & 1 else 0)
+        table.append(crc)
+    return table
+
+
+_CRC32C_TABLE = _crc32c_table()
+
+
+def _crc32c_python(data: bytes, crc: int) -> int:
+    crc ^= 0xFFFFFFFF
+    for byte in data:
+        crc = _CRC32C_TABLE[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+
+class CRC32C:
+    """
+    CRC32C with the interface of the hashlib objects. It uses the crc32c
+    package when it is installed, the pure Python fallback is slow.
+    """
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def update(self, data: bytes) -> None:
+        self.value = (_crc32c or _crc32c_python)(data, self.value)
+
+    def digest(self) -> bytes:
+        return self.value.to_bytes(4, "big")
+
+    def hexdigest(self) -> str:
+        return self.digest().hex()
+
+
+def validate_algorithms(algorithms: Iterable[str]) -> tuple[str, ...]:
+    algorithms = tuple(dict.fromkeys(algorithms))
+    for algorithm in algorithms:
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unsupported checksum algorithm {algorithm}")
+    return algorithms
+
+
+def new_hash(algorithm: str):
+    if algorithm == "crc32c":
+        return CRC32C()
+    if algorithm in ALGORITHMS:
+        return hashlib.new(algorithm)
+    raise ValueError(f"Unsupported checksum algorithm {algorithm}")
+
+
+class Hasher:
+    """
+    Updates one hash per algorithm, given to HashingReader every algorithm
+    is computed in the same pass over the data.
+    """
+
+    def __init__(self, algorithms: Iterable[str]):
+        self.hashes = {
+            algorithm: new_hash(algorithm)
+            for algorithm in dict.fromkeys(algorithms)
+        }
+
+    def __bool__(self) -> bool:
+        return bool(self.hashes)
+
+    def update(self, data: bytes) -> None:
+        for hash in self.hashes.values():
+            hash.update(data)
+
+    def checksums(self) -> Checksums:
+        return {
+            algorithm: hash.hexdigest()
+            for algorithm, hash in self.hashes.items()
+        }
+
+
+def _base64(hexdigest: str) -> str:
+    return base64.b64encode(bytes.fromhex(hexdigest)).decode()
+
+
+def s3_checksum_args(
+    checksums: Checksums, checksum_algorithm: str | None = None
+) -> dict[str, str]:
+    """
+    put_object arguments with the checksums for S3 to verify the body. S3
+    takes a single flexible checksum besides Content-MD5, checksum_algorithm
+    is the one stored with the object when it is given.
+    """
+    args = {}
+    if "md5" in checksums:
+        args["ContentMD5"] = _base64(checksums["md5"])
+    if checksum_algorithm is None:
+        checksum_algorithm = next(
+            (
+                algorithm.upper()
+                for algorithm in ("sha256", "crc32c")
+                if algorithm in checksums
+            ),
+            None,
+        )
+    if checksum_algorithm is None:
+        return args
+    # Without a value botocore computes it while sending
+    args["ChecksumAlgorithm"] = checksum_algorithm
+    algorithm = checksum_algorithm.lower()
+    if algorithm in checksums:
+        args[f"Checksum{algorithm.upper()}"] = _base64(checksums[algorithm])
+    return args
+
+
+def verify_checksums(
+    key: str, expected: Checksums, checksums: Checksums
+) -> None:
+    for algorithm, value in expected.items():
+        if algorithm in checksums and checksums[algorithm] != value:
+            raise ChecksumError(
+                f"{algorithm} of {key} is {checksums[algorithm]},"
+                f" expected {value}"
+            )
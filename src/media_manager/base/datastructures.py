@@ -1,21 +1,175 @@
+from media_manager.base.checksums import Checksums, Hasher
+from media_manager.base.utils import COPY_CHUNK_SIZE, copy_fileobj
+from datetime import datetime
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+from typing_extensions import TypedDict
+import io
+import os
 import typing
 
+DEFAULT_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+class FileInfo(TypedDict):
+    key: str
+    size: int
+    # Content identifier, the S3 ETag. Local files don't have one
+    etag: str | None
+    last_modified: datetime
+
+
+def _position(file: typing.BinaryIO) -> int | None:
+    # None when the stream can not seek
+    try:
+        position = file.tell()
+        file.seek(position)
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+    return position
+
 
 class MUploadFile:
     """
-    An uploaded file included as part of the request data.
+    An uploaded file included as part of the request data. file is a binary
+    file object, the content as bytes or the path of a file, which is opened
+    when it is first read.
+
+    The upload starts at the position the file object has when it is given.
+    Streams that can not seek are spooled the first time the size, a digest
+    or a rewind is needed, in memory up to spool_size bytes and in a
+    temporary file above. Content given as bytes larger than spool_size is
+    written to a temporary file right away, so it is not kept in memory.
     """
 
+    __slots__ = (
+        "filename",
+        "content_type",
+        "checksums",
+        "_file",
+        "_path",
+        "_start",
+        "_owned",
+        "_spool_size",
+        "_digests",
+    )
+
     def __init__(
         self,
-        file: typing.BinaryIO,
+        file: typing.BinaryIO | bytes | str | os.PathLike,
         *,
         filename: str | None = None,
         content_type: str | None = None,
+        spool_size: int = DEFAULT_SPOOL_SIZE,
     ) -> None:
+        self._path: str | None = None
+        self._file: typing.BinaryIO | None = None
+        self._start: int | None = 0
+        # Opened or spooled here, and so closed here
+        self._owned = False
+        if isinstance(file, (str, os.PathLike)):
+            self._path = os.fspath(file)
+            self._owned = True
+            if filename is None:
+                filename = os.path.basename(self._path)
+        elif isinstance(file, (bytes, bytearray, memoryview)):
+            if memoryview(file).nbytes > spool_size:
+                self._file = SpooledTemporaryFile(spool_size)
+                self._file.write(file)
+                self._file.seek(0)
+                self._owned = True
+            else:
+                # Shares the buffer of bytes until it is written
+                self._file = BytesIO(file)
+        else:
+            self._file = file
+            self._start = _position(file)
+        self._spool_size = spool_size
+        self._digests: Checksums = {}
         self.filename = filename
-        self.file = file
         self.content_type = content_type
+        # Computed by the upload with the checksums of the manager
+        self.checksums: Checksums | None = None
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(filename={self.filename!r})"
+
+    def __enter__(self) -> "MUploadFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def file(self) -> typing.BinaryIO:
+        if self._file is None:
+            self._file = open(self._path, "rb")
+        return self._file
+
+    def close(self) -> None:
+        if self._owned and self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _seekable_file(self) -> typing.BinaryIO:
+        file = self.file
+        if self._start is None:
+            spool = SpooledTemporaryFile(self._spool_size)
+            copy_fileobj(file, spool)
+            spool.seek(0)
+            self._file, self._start, self._owned = spool, 0, True
+            file = spool
+        return file
+
+    @property
+    def size(self) -> int:
+        """
+        Bytes uploaded from the start of the file, the content is not read
+        unless the stream has to be spooled.
+        """
+        if self._file is None:
+            return os.path.getsize(self._path)
+        file = self._seekable_file()
+        position = file.tell()
+        end = file.seek(0, os.SEEK_END)
+        file.seek(position)
+        return end - self._start
+
+    @property
+    def start(self) -> int:
+        """
+        Position of the start of the upload in file, a stream that can not
+        seek is spooled first.
+        """
+        self._seekable_file()
+        return self._start
+
+    def rewind(self) -> None:
+        """
+        Goes back to the start of the upload, to send it again.
+        """
+        self._seekable_file().seek(self._start)
+
+    def digests(self, algorithms: typing.Iterable[str]) -> Checksums:
+        """
+        Hex digests of the content (md5, sha256 or crc32c). They are computed
+        together in one read and cached, the position of the file is kept.
+        """
+        algorithms = tuple(algorithms)
+        known: Checksums = {**self._digests, **(self.checksums or {})}
+        hasher = Hasher(
+            algorithm for algorithm in algorithms if algorithm not in known
+        )
+        if hasher:
+            file = self._seekable_file()
+            position = file.tell()
+            file.seek(self._start)
+            while chunk := file.read(COPY_CHUNK_SIZE):
+                hasher.update(chunk)
+            file.seek(position)
+            self._digests.update(hasher.checksums())
+            known.update(hasher.checksums())
+        return {algorithm: known[algorithm] for algorithm in algorithms}
+
+    def digest(self, algorithm: str) -> str:
+        return self.digests([algorithm])[algorithm]
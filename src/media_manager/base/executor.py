@@ -0,0 +1,101 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections.abc import Callable
+from typing_extensions import TypedDict
+import asyncio
+import contextvars
+import os
+import threading
+
+
+class ExecutorStats(TypedDict):
+    max_workers: int
+    queued: int
+    running: int
+    completed: int
+
+
+class BackendExecutor:
+    """
+    Bounded thread pool used to run the blocking backend methods outside of
+    the event loop.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        thread_name_prefix: str = "media-manager",
+    ) -> None:
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # The pool is created on first use so building a manager stays cheap
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=self.thread_name_prefix,
+                    )
+        return self._executor
+
+    @property
+    def stats(self) -> ExecutorStats:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+            }
+
+    def _call(self, func: Callable, args: tuple, kwargs: dict):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def _on_done(self, future: Future) -> None:
+        # Cancelled futures never reach _call, so they leave the queue here
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def submit(self, func: Callable, /, *args, **kwargs) -> Future:
+        context = contextvars.copy_context()
+        with self._lock:
+            self._queued += 1
+        try:
+            future = self.executor.submit(
+                context.run, self._call, func, args, kwargs
+            )
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    async def run(self, func: Callable, /, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
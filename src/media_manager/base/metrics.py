@@ -0,0 +1,192 @@
+from media_manager.base.base import OperationEvent
+from typing_extensions import TypedDict
+from bisect import bisect_left
+import threading
+
+try:
+    from opentelemetry import metrics as otel_metrics
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:  # pragma: no cover - optional dependency
+    otel_metrics = None
+    otel_trace = None
+
+# Upper bounds in seconds of the latency buckets
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class OperationStats(TypedDict):
+    count: int
+    errors: int
+    # Count per error class
+    error_classes: dict[str, int]
+    bytes: int
+    # Seconds, the percentiles are the upper bound of their bucket
+    total_seconds: float
+    max_seconds: float
+    p50: float
+    p95: float
+    p99: float
+
+
+class Histogram:
+    """
+    Counts of the values per bucket, the last bucket holds the values above
+    the highest bound. Not thread safe, MetricsCollector locks around it.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percentile: float) -> float:
+        rank = percentile * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                if index == len(self.buckets):
+                    return self.max
+                return min(self.buckets[index], self.max)
+        return 0.0
+
+
+class MetricsCollector:
+    """
+    Instrument keeping a latency histogram, the bytes transferred and the
+    errors of every operation of every backend in memory:
+
+        collector = MetricsCollector()
+        media_manager.add_instrument(collector)
+        collector.stats()["AWS_MediaManager.upload_file"]["p95"]
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms: dict[str, Histogram] = {}
+        self._bytes: dict[str, int] = {}
+        self._errors: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: OperationEvent) -> None:
+        key = f"{event['backend']}.{event['operation']}"
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+                self._bytes[key] = 0
+                self._errors[key] = {}
+            histogram.observe(event["seconds"])
+            self._bytes[key] += event["bytes"] or 0
+            if event["error"] is not None:
+                errors = self._errors[key]
+                errors[event["error"]] = errors.get(event["error"], 0) + 1
+
+    def stats(self) -> dict[str, OperationStats]:
+        """
+        Stats per "{backend}.{operation}".
+        """
+        with self._lock:
+            return {
+                key: {
+                    "count": histogram.count,
+                    "errors": sum(self._errors[key].values()),
+                    "error_classes": dict(self._errors[key]),
+                    "bytes": self._bytes[key],
+                    "total_seconds": histogram.total,
+                    "max_seconds": histogram.max,
+                    "p50": histogram.percentile(0.5),
+                    "p95": histogram.percentile(0.95),
+                    "p99": histogram.percentile(0.99),
+                }
+                for key, histogram in self._histograms.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._bytes.clear()
+            self._errors.clear()
+
+
+class OpenTelemetryInstrument:
+    """
+    Instrument recording the operations with OpenTelemetry: the
+    media_manager.operation.duration histogram, the
+    media_manager.operation.bytes counter and, with traces, a span per
+    operation in the current trace. The providers configured globally are
+    used unless others are given.
+    """
+
+    def __init__(
+        self, meter_provider=None, tracer_provider=None, traces: bool = True
+    ):
+        if otel_metrics is None:
+            raise ImportError(
+                "opentelemetry-api is required for OpenTelemetryInstrument,"
+                " install it with `pip install media-manager[opentelemetry]`"
+            )
+        meter = otel_metrics.get_meter(
+            "media_manager", meter_provider=meter_provider
+        )
+        self.duration = meter.create_histogram(
+            "media_manager.operation.duration",
+            unit="s",
+            description="Duration of the media manager operations",
+        )
+        self.bytes = meter.create_counter(
+            "media_manager.operation.bytes",
+            unit="By",
+            description="Bytes uploaded and downloaded",
+        )
+        self.tracer = None
+        if traces:
+            self.tracer = otel_trace.get_tracer(
+                "media_manager", tracer_provider=tracer_provider
+            )
+
+    def __call__(self, event: OperationEvent) -> None:
+        attributes = {
+            "media_manager.operation": event["operation"],
+            "media_manager.backend": event["backend"],
+        }
+        if event["error"] is not None:
+            attributes["error.type"] = event["error"]
+        self.duration.record(event["seconds"], attributes)
+        if event["bytes"]:
+            self.bytes.add(event["bytes"], attributes)
+        if self.tracer is None:
+            return
+        # The span is built after the call, with its timestamps
+        start = int(event["start_time"] * 1e9)
+        span = self.tracer.start_span(
+            f"media_manager.{event['operation']}",
+            start_time=start,
+            attributes=attributes,
+        )
+        if event["error"] is not None:
+            span.set_status(Status(StatusCode.ERROR, event["error"]))
+        span.end(end_time=start + int(event["seconds"] * 1e9))
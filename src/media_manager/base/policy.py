@@ -0,0 +1,248 @@
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import NamedTuple, TypeVar
+import asyncio
+import contextvars
+import random
+import threading
+import time
+
+T = TypeVar("T")
+MB = 1024 * 1024
+
+
+class RetryBudget:
+    """
+    Bounds the retries to a ratio of the requests, so an outage does not
+    multiply the load by max_attempts. Every request deposits ratio tokens
+    and every retry takes one, the balance is capped at capacity and starts
+    full. Share one budget between the policies of a service.
+    """
+
+    def __init__(self, ratio: float = 0.1, capacity: float = 10.0):
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = capacity
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class RequestPolicy(NamedTuple):
+    # Seconds, given to the HTTP client of the backend
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    # Attempts of an operation, the first one included
+    max_attempts: int = 3
+    # Exponential backoff with full jitter between the attempts
+    backoff_base: float = 0.1
+    backoff_max: float = 10.0
+    budget: RetryBudget | None = None
+    # Downloads of at most hedge_max_size bytes send a second request when
+    # the first one did not finish after hedge_after seconds, or the p95
+    # latency of the previous ones, and keep the first to finish
+    hedge: bool = False
+    hedge_after: float | None = None
+    hedge_max_size: int = 1 * MB
+
+    def backoff(self, attempt: int) -> float:
+        # Delay before the retry following the attempt (0 is the first)
+        cap = min(self.backoff_max, self.backoff_base * 2**attempt)
+        return random.uniform(0, cap)
+
+
+_request_policy: ContextVar[RequestPolicy | None] = ContextVar(
+    "request_policy", default=None
+)
+
+
+@contextmanager
+def request_policy(policy: RequestPolicy) -> Iterator[RequestPolicy]:
+    """
+    Overrides the policy of the managers for the calls made in the block,
+    the async methods and the executor they run in see it too.
+    """
+    token = _request_policy.set(policy)
+    try:
+        yield policy
+    finally:
+        _request_policy.reset(token)
+
+
+def current_policy(default: RequestPolicy | None) -> RequestPolicy | None:
+    policy = _request_policy.get()
+    return default if policy is None else policy
+
+
+def is_transient(error: BaseException) -> bool:
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+def _give_up(
+    policy: RequestPolicy,
+    attempt: int,
+    error: Exception,
+    retryable: Callable[[BaseException], bool],
+) -> bool:
+    return (
+        attempt + 1 >= policy.max_attempts
+        or not retryable(error)
+        or (policy.budget is not None and not policy.budget.withdraw())
+    )
+
+
+def call_with_retries(
+    policy: RequestPolicy,
+    function: Callable[[], T],
+    retryable: Callable[[BaseException], bool] = is_transient,
+    before_retry: Callable[[], None] | None = None,
+) -> T:
+    """
+    Calls function until it succeeds, it raises an error that retryable
+    rejects or the attempts or the budget run out. before_retry resets the
+    state the failed attempt left, like rewinding the file uploaded.
+    """
+    if policy.budget is not None:
+        policy.budget.deposit()
+    attempt = 0
+    while True:
+        try:
+            return function()
+        except Exception as error:
+            if _give_up(policy, attempt, error, retryable):
+                raise
+        time.sleep(policy.backoff(attempt))
+        attempt += 1
+        if before_retry is not None:
+            before_retry()
+
+
+async def async_call_with_retries(
+    policy: RequestPolicy,
+    function: Callable[[], Awaitable[T]],
+    retryable: Callable[[BaseException], bool] = is_transient,
+    before_retry: Callable[[], None] | None = None,
+) -> T:
+    if policy.budget is not None:
+        policy.budget.deposit()
+    attempt = 0
+    while True:
+        try:
+            return await function()
+        except Exception as error:
+            if _give_up(policy, attempt, error, retryable):
+                raise
+        await asyncio.sleep(policy.backoff(attempt))
+        attempt += 1
+        if before_retry is not None:
+            before_retry()
+
+
+class LatencyTracker:
+    """
+    Latencies of the last window requests, the hedged requests wait for
+    their p95. There is no percentile until min_samples were recorded.
+    """
+
+    def __init__(self, window: int = 256, min_samples: int = 20):
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+
+    def percentile(self, percentile: float) -> float | None:
+        latencies = sorted(self.latencies)
+        if len(latencies) < self.min_samples:
+            return None
+        index = min(len(latencies) - 1, int(len(latencies) * percentile))
+        return latencies[index]
+
+    def hedge_delay(self, policy: RequestPolicy) -> float | None:
+        if not policy.hedge:
+            return None
+        if policy.hedge_after is not None:
+            return policy.hedge_after
+        return self.percentile(0.95)
+
+
+_hedge_executor: ThreadPoolExecutor | None = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _submit(function: Callable[[], T]) -> Future:
+    # The hedged calls get their own threads, waiting for a request of the
+    # backend executor from one of its threads could use all of them
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_executor_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(
+                    max_workers=32, thread_name_prefix="media-manager-hedge"
+                )
+    return _hedge_executor.submit(contextvars.copy_context().run, function)
+
+
+def hedged_call(
+    primary: Callable[[], T], hedge: Callable[[], T], delay: float
+) -> T:
+    """
+    Calls primary and, when it did not finish after delay seconds, hedge
+    too. Returns the first result, the error is raised only when both
+    failed. hedge can raise to decline, like when the file turns out big.
+    """
+    first = _submit(primary)
+    futures = {first}
+    done, _ = wait(futures, timeout=delay)
+    if not done:
+        futures.add(_submit(hedge))
+    while futures:
+        done, futures = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for pending in futures:
+                    pending.cancel()
+                return future.result()
+    # The error of the primary call is the meaningful one
+    raise first.exception()
+
+
+async def async_hedged_call(
+    primary: Callable[[], Awaitable[T]],
+    hedge: Callable[[], Awaitable[T]],
+    delay: float,
+) -> T:
+    first = asyncio.ensure_future(primary())
+    tasks = {first}
+    done, _ = await asyncio.wait(tasks, timeout=delay)
+    if not done:
+        tasks.add(asyncio.ensure_future(hedge()))
+    try:
+        while tasks:
+            done, tasks = await asyncio.wait(
+                tasks, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+        raise first.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,273 @@
+from collections.abc import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+)
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, TypeVar
+import asyncio
+import io
+import itertools
+import os
+import queue
+import threading
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _file_descriptor(file: BinaryIO) -> int | None:
+    try:
+        return file.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _kernel_copy(
+    source_fd: int, destination_fd: int, count: int, offset: int
+) -> int:
+    # Both write at the current position of destination_fd and advance it
+    if hasattr(os, "copy_file_range"):
+        return os.copy_file_range(source_fd, destination_fd, count, offset)
+    return os.sendfile(destination_fd, source_fd, offset, count)
+
+
+def _copy_file_descriptors(
+    source: BinaryIO, destination: BinaryIO, chunk_size: int
+) -> int | None:
+    """
+    Copies between real files inside the kernel. Returns None when it is not
+    possible so the caller falls back to a userspace copy.
+    """
+    source_fd = _file_descriptor(source)
+    destination_fd = _file_descriptor(destination)
+    if source_fd is None or destination_fd is None:
+        return None
+    if not hasattr(os, "copy_file_range") and not hasattr(os, "sendfile"):
+        return None
+    destination.flush()
+    start = offset = source.tell()
+    try:
+        while copied := _kernel_copy(
+            source_fd, destination_fd, chunk_size, offset
+        ):
+            offset += copied
+    except OSError:
+        if offset == start:
+            # Not supported for these files (pipes, sockets, some platforms)
+            return None
+        raise
+    # Keep the Python file objects in sync with the descriptors
+    source.seek(offset)
+    destination.seek(os.lseek(destination_fd, 0, os.SEEK_CUR))
+    return offset - start
+
+
+def copy_fileobj(
+    source: BinaryIO, destination: BinaryIO, chunk_size: int = COPY_CHUNK_SIZE
+) -> int:
+    """
+    Copies source into destination in chunks of chunk_size bytes and returns
+    the number of bytes copied. When both are real files the data never
+    leaves the kernel.
+    """
+    copied = _copy_file_descriptors(source, destination, chunk_size)
+    if copied is not None:
+        return copied
+    copied = 0
+    while chunk := source.read(chunk_size):
+        destination.write(chunk)
+        copied += len(chunk)
+    return copied
+
+
+class HashingReader:
+    """
+    Reads from file and updates the hashes with every byte read, the data
+    is hashed while it is copied instead of being read a second time.
+    """
+
+    def __init__(self, file: BinaryIO, *hashes):
+        self.file = file
+        self.hashes = hashes
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.file.read(size)
+        for hash in self.hashes:
+            hash.update(chunk)
+        return chunk
+
+
+class ChunkReader:
+    """
+    File object reading from an iterator of chunks, like the one of
+    stream_file, only the chunks being read are held in memory.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.buffer = bytearray()
+        # Bytes of the buffer already read
+        self.offset = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            data = bytes(self.buffer[self.offset :]) + b"".join(self.chunks)
+            self.buffer.clear()
+            self.offset = 0
+            return data
+        while len(self.buffer) - self.offset < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        end = min(self.offset + size, len(self.buffer))
+        with memoryview(self.buffer) as view:
+            data = bytes(view[self.offset : end])
+        self.offset = end
+        # The read bytes are dropped once they are half of the buffer, so
+        # every byte is only moved a bounded number of times
+        if self.offset * 2 >= len(self.buffer):
+            del self.buffer[: self.offset]
+            self.offset = 0
+        return data
+
+    def close(self) -> None:
+        close = getattr(self.chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def iter_in_threads(
+    sources: Iterable[Callable[[], Iterable[T]]],
+    max_concurrency: int,
+    buffer_size: int = 1000,
+) -> Iterator[T]:
+    """
+    Runs every source in a thread pool and yields their items as they are
+    produced, in no particular order. The buffer bounds the items waiting to
+    be consumed, producers block when it is full.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=buffer_size)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> None:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def run(source: Callable[[], Iterable[T]]) -> None:
+        try:
+            for item in source():
+                if stop.is_set():
+                    return
+                put((item, None))
+        except BaseException as error:
+            put((done, error))
+        else:
+            put((done, None))
+
+    sources = list(sources)
+    with ThreadPoolExecutor(max_concurrency) as executor:
+        for source in sources:
+            executor.submit(run, source)
+        pending = len(sources)
+        try:
+            while pending:
+                item, error = buffer.get()
+                if error is not None:
+                    raise error
+                if item is done:
+                    pending -= 1
+                    continue
+                yield item
+        finally:
+            # Unblocks the producers when the consumer stops early
+            stop.set()
+
+
+def map_in_threads(
+    func: Callable[..., R], items: Iterable, max_concurrency: int
+) -> Iterator[R]:
+    """
+    Like map but func runs in a thread pool. The items are consumed lazily
+    with at most max_concurrency calls in flight, the results keep the order
+    of the items.
+    """
+    with ThreadPoolExecutor(max_concurrency) as executor:
+        futures: deque[Future] = deque()
+        for item in items:
+            if len(futures) >= max_concurrency:
+                yield futures.popleft().result()
+            futures.append(executor.submit(func, item))
+        while futures:
+            yield futures.popleft().result()
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+async def run_in_tasks(
+    coroutines: Iterable[Awaitable[R]], max_concurrency: int
+) -> AsyncIterator[R]:
+    """
+    Async version of map_in_threads, runs the coroutines as tasks with at
+    most max_concurrency in flight and yields their results in order.
+    """
+    tasks: deque[asyncio.Task] = deque()
+    try:
+        for coroutine in coroutines:
+            if len(tasks) >= max_concurrency:
+                yield await tasks.popleft()
+            tasks.append(asyncio.ensure_future(coroutine))
+        while tasks:
+            yield await tasks.popleft()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def read_chunks(
+    path: str, chunk_size: int, start: int = 0, end: int | None = None
+) -> Iterator[bytes]:
+    """
+    Yields the bytes of the file from start to end, both included, in chunks
+    of at most chunk_size bytes.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            if remaining is not None:
+                chunk_size = min(chunk_size, remaining)
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def stream_size(file: BinaryIO) -> int | None:
+    """
+    Returns the bytes left to read in a seekable stream without reading it.
+    """
+    try:
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END)
+        file.seek(position)
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+    return size - position
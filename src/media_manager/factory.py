@@ -0,0 +1,86 @@
+from media_manager.base.base import MediaManager
+from collections.abc import Callable, Hashable
+from typing import Any
+import os
+import threading
+
+
+def _hashable(value: Any) -> Hashable:
+    # Unhashable arguments (lists, dicts, some callables) are compared by
+    # identity, the cache entry keeps them alive so the id is not reused
+    try:
+        hash(value)
+    except TypeError:
+        return ("id", type(value), id(value))
+    return value
+
+
+def _cache_key(args: tuple, kwargs: dict) -> Hashable:
+    return (
+        tuple(_hashable(arg) for arg in args),
+        tuple(sorted((key, _hashable(v)) for key, v in kwargs.items())),
+    )
+
+
+class MediaManagerFactory:
+    """
+    Creates a manager once per set of arguments and process. Managers
+    created before a fork are forgotten in the child so their clients and
+    thread pools are not shared between processes.
+    """
+
+    def __init__(self, create: Callable[..., MediaManager]):
+        self.create = create
+        # key -> (manager, args, kwargs)
+        self._managers: dict[Hashable, tuple[MediaManager, tuple, dict]] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def __len__(self) -> int:
+        return len(self._managers)
+
+    def _after_fork(self) -> None:
+        # A lock held by another thread at fork time is never released in
+        # the child, it is replaced along with the managers
+        self._lock = threading.Lock()
+        self._managers = {}
+        self._pid = os.getpid()
+
+    def get(self, *args, **kwargs) -> MediaManager:
+        if self._pid != os.getpid():
+            self._after_fork()
+        key = _cache_key(args, kwargs)
+        entry = self._managers.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._managers.get(key)
+                if entry is None:
+                    entry = (self.create(*args, **kwargs), args, kwargs)
+                    self._managers[key] = entry
+        return entry[0]
+
+    def warm(self, *args, **kwargs) -> MediaManager:
+        """
+        Creates the manager and its clients ahead of the first request.
+        """
+        media_manager = self.get(*args, **kwargs)
+        media_manager.warm()
+        return media_manager
+
+    def evict(self, *args, **kwargs) -> bool:
+        """
+        Closes and forgets the manager created with these arguments.
+        """
+        with self._lock:
+            entry = self._managers.pop(_cache_key(args, kwargs), None)
+        if entry is None:
+            return False
+        entry[0].close()
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            entries = list(self._managers.values())
+            self._managers.clear()
+        for media_manager, _, _ in entries:
+            media_manager.close()
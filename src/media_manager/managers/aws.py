@@ -1,15 +1,138 @@
-from media_manager.base.base import MediaManager
+from media_manager.base.base import (
+    DEFAULT_STREAM_CHUNK_SIZE,
+    CopiedFile,
+    DeletedFile,
+    DownloadResult,
+    MediaManager,
+    UploadResult,
+    copy_destination,
+    folder_prefix,
+)
 import os
 import boto3
-from botocore.client import ClientCreator
+from boto3.s3.transfer import TransferConfig
+from s3transfer.manager import TransferManager
+from botocore.client import BaseClient
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, suppress
+from functools import partial
+import hashlib
+import threading
+import time
+import copy
 from functools import cached_property
-from botocore.exceptions import ClientError
+from boto3.exceptions import S3UploadFailedError
+from botocore.exceptions import ClientError, HTTPClientError
+from botocore.exceptions import ConnectionError as BotoConnectionError
 from io import BytesIO
-from media_manager.base.datastructures import MUploadFile
-from collections.abc import Callable
+from media_manager.base.datastructures import FileInfo, MUploadFile
+from media_manager.base.cache import CacheStats, TTLCache
+from media_manager.base.checksums import (
+    Hasher,
+    s3_checksum_args,
+    validate_algorithms,
+)
+from media_manager.base.policy import (
+    LatencyTracker,
+    RequestPolicy,
+    call_with_retries,
+    current_policy,
+    hedged_call,
+    is_transient,
+)
+from media_manager.base.utils import (
+    HashingReader,
+    batched,
+    iter_in_threads,
+    map_in_threads,
+)
+from media_manager.managers.clients import ClientSettings, s3_clients
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+
+
+MB = 1024 * 1024
+# delete_objects accepts at most 1000 keys per request
+DELETE_BATCH_SIZE = 1000
+# Error codes of the requests worth sending again
+RETRYABLE_ERROR_CODES = {
+    "InternalError",
+    "RequestLimitExceeded",
+    "RequestTimeout",
+    "ServiceUnavailable",
+    "SlowDown",
+    "Throttling",
+    "ThrottlingException",
+}
+
+
+def s3_file_info(file: dict) -> FileInfo:
+    return {
+        "key": file["Key"],
+        "size": file["Size"],
+        "etag": file["ETag"].strip('"'),
+        "last_modified": file["LastModified"],
+    }
+
+
+def head_file_info(key: str, response: dict) -> FileInfo:
+    return {
+        "key": key,
+        "size": response["ContentLength"],
+        "etag": response["ETag"].strip('"'),
+        "last_modified": response["LastModified"],
+    }
+
+
+def _upload_extra_args(ExtraArgs: dict, checksum_algorithm: str | None):
+    if checksum_algorithm:
+        return {**ExtraArgs, "ChecksumAlgorithm": checksum_algorithm}
+    return ExtraArgs
+
+
+def content_type_args(file: MUploadFile, ExtraArgs: dict) -> dict:
+    # A ContentType given in ExtraArgs wins over the one of the file
+    if file.content_type is None or "ContentType" in ExtraArgs:
+        return ExtraArgs
+    return {**ExtraArgs, "ContentType": file.content_type}
+
+
+def s3_retryable(error: BaseException) -> bool:
+    if isinstance(error, S3UploadFailedError) and error.__context__:
+        # s3transfer raises it while handling the error of the request
+        return s3_retryable(error.__context__)
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code")
+        status = error.response.get("ResponseMetadata", {}).get(
+            "HTTPStatusCode", 0
+        )
+        return code in RETRYABLE_ERROR_CODES or status >= 500
+    return isinstance(
+        error, (BotoConnectionError, HTTPClientError)
+    ) or is_transient(error)
+
+
+def deleted_files_report(
+    keys: list[str], response: dict
+) -> list[DeletedFile]:
+    errors = {
+        error["Key"]: error.get("Message") or error.get("Code", "")
+        for error in response.get("Errors", [])
+    }
+    return [
+        {"key": key, "error": errors[key]} if key in errors else {"key": key}
+        for key in keys
+    ]
 
 
 class AWS_MediaManager(MediaManager):
+    backend_upload_kwargs = (
+        "ExtraArgs",
+        "transfer_config",
+        "checksum_algorithm",
+        "resumable",
+    )
+
     def __init__(
         self,
         upload_path: Callable | None = None,
@@ -19,6 +142,23 @@ class AWS_MediaManager(MediaManager):
         aws_access_key_id: str | None = None,
         aws_secret_access_key: str | None = None,
         aws_region_name: str | None = None,
+        aws_endpoint_url: str | None = None,
+        max_workers: int | None = None,
+        transfer_config: TransferConfig | None = None,
+        multipart_threshold: int = 8 * MB,
+        multipart_chunksize: int = 8 * MB,
+        max_concurrency: int = 10,
+        checksum_algorithm: str | None = None,
+        checksums: Iterable[str] = (),
+        signed_url_cache_size: int = 1024,
+        signed_url_min_validity: float = 300,
+        verify_cache_ttl: float = 60,
+        verify_negative_cache_ttl: float = 10,
+        max_pool_connections: int = 50,
+        tcp_keepalive: bool = True,
+        retry_mode: str = "standard",
+        max_attempts: int | None = None,
+        policy: RequestPolicy | None = None,
         *_args,
         **_kwargs,
     ):
@@ -30,6 +170,9 @@ class AWS_MediaManager(MediaManager):
             aws_secret_access_key = os.getenv("AWS_SECRET_KEY", None)
         if aws_region_name is None:
             aws_region_name = os.getenv("AWS_REGION_NAME", None)
+        if aws_endpoint_url is None:
+            # Optional, used to target S3 compatible services
+            aws_endpoint_url = os.getenv("AWS_ENDPOINT_URL", None)
         # Validate all required environment variables are set
         if any(
             i is None
@@ -49,35 +192,255 @@ class AWS_MediaManager(MediaManager):
         self.aws_access_key_id = aws_access_key_id
         self.aws_secret_access_key = aws_secret_access_key
         self.aws_region_name = aws_region_name
-        self._s3_client = None
-        # Set bucket
-        self.bucket = boto3.resource(
-            "s3",
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key,
-            region_name=aws_region_name,
-        ).Bucket(self.bucket_name)
-        super().__init__(upload_path, root_folder, add_environment_as_prefix)
+        self.aws_endpoint_url = aws_endpoint_url
+        # Default transfer settings, every upload can override them
+        if transfer_config is None:
+            transfer_config = TransferConfig(
+                multipart_threshold=multipart_threshold,
+                multipart_chunksize=multipart_chunksize,
+                max_concurrency=max_concurrency,
+            )
+        self.transfer_config = transfer_config
+        # CRC32, CRC32C, SHA1 or SHA256, verified by S3 on every part
+        self.checksum_algorithm = checksum_algorithm
+        # md5, sha256 or crc32c computed while uploading, sent to S3 with the
+        # uploads that fit in a single request
+        self.checksums = validate_algorithms(checksums)
+        # Presigned URLs are reused until they are about to expire, a cached
+        # URL is valid for at least signed_url_min_validity seconds
+        self.signed_url_cache = TTLCache(max_entries=signed_url_cache_size)
+        self.signed_url_min_validity = signed_url_min_validity
+        # Result of the head_object of signed_url(verify=True)
+        self.verify_cache = TTLCache(max_entries=signed_url_cache_size)
+        self.verify_cache_ttl = verify_cache_ttl
+        self.verify_negative_cache_ttl = verify_negative_cache_ttl
+        # Managers with the same settings share the client, nothing is
+        # created until the first request
+        self.client_settings = ClientSettings(
+            aws_access_key_id,
+            aws_secret_access_key,
+            aws_region_name,
+            aws_endpoint_url,
+            max_pool_connections,
+            tcp_keepalive,
+            retry_mode,
+            max_attempts,
+        )
+        # Timeouts, retries and hedged downloads of the operations, instead
+        # of the retries of botocore. request_policy overrides it per call
+        self.policy = policy
+        self.download_latencies = LatencyTracker()
+        super().__init__(
+            upload_path, root_folder, add_environment_as_prefix, max_workers
+        )
+
+    @property
+    def client(self) -> BaseClient:
+        return s3_clients.get(self._client_settings(self._request_policy()))
+
+    def _request_policy(self) -> RequestPolicy | None:
+        return current_policy(self.policy)
+
+    def _client_settings(self, policy: RequestPolicy | None) -> ClientSettings:
+        if policy is None:
+            return self.client_settings
+        # The policy retries the operations, not botocore
+        return self.client_settings._replace(
+            max_attempts=0,
+            connect_timeout=policy.connect_timeout,
+            read_timeout=policy.read_timeout,
+        )
+
+    def _call(
+        self,
+        function: Callable,
+        before_retry: Callable[[], None] | None = None,
+    ):
+        policy = self._request_policy()
+        if policy is None:
+            return function()
+        return call_with_retries(policy, function, s3_retryable, before_retry)
+
+    def _get_object(self, params: dict, max_size: int | None = None):
+        response = self.client.get_object(**params)
+        with closing(response["Body"]) as body:
+            if max_size is not None and response["ContentLength"] > max_size:
+                # A hedged request declines the big files
+                raise ValueError(f"{params['Key']} is too big to hedge")
+            return BytesIO(body.read())
+
+    def _small_download(
+        self, download: Callable[[], BytesIO], params: dict
+    ) -> BytesIO:
+        """
+        Runs the download with the retries of the policy. Once the p95
+        latency of the downloads is known, or with hedge_after, a download
+        still running after it is raced by a get_object with params.
+        """
+        policy = self._request_policy()
+        if policy is None:
+            return download()
+        delay = self.download_latencies.hedge_delay(policy)
+        hedge = partial(self._get_object, params, policy.hedge_max_size)
+
+        def attempt() -> BytesIO:
+            started = time.perf_counter()
+            if delay is None:
+                response = download()
+            else:
+                response = hedged_call(download, hedge, delay)
+            if response.getbuffer().nbytes <= policy.hedge_max_size:
+                self.download_latencies.record(time.perf_counter() - started)
+            return response
+
+        return call_with_retries(policy, attempt, s3_retryable)
+
+    # Kept for compatibility, both names return the shared client
+    s3_client = client
+
+    def warm(self) -> None:
+        # Loads the service model and leaves a connection in the pool
+        with suppress(ClientError):
+            self.client.head_bucket(Bucket=self.bucket_name)
 
     @cached_property
-    def client(self) -> ClientCreator:
-        return boto3.client(
+    def bucket(self):
+        """
+        boto3 Bucket resource, kept for compatibility. It is built on first
+        access and has its own connection pool, the manager uses the shared
+        client.
+        """
+        return boto3.resource(
             "s3",
-            region_name=self.aws_region_name,
             aws_access_key_id=self.aws_access_key_id,
             aws_secret_access_key=self.aws_secret_access_key,
-        )
+            region_name=self.aws_region_name,
+            endpoint_url=self.aws_endpoint_url,
+        ).Bucket(self.bucket_name)
 
-    @cached_property
-    def s3_client(self) -> ClientCreator:
-        if not self._s3_client:
-            self._s3_client = boto3.client(
-                "s3",
-                region_name=self.aws_region_name,
-                aws_access_key_id=self.aws_access_key_id,
-                aws_secret_access_key=self.aws_secret_access_key,
+    def _find_multipart_upload(self, complete_path: str) -> str | None:
+        """
+        Returns the id of the latest unfinished multipart upload of the key.
+        """
+        paginator = self.client.get_paginator("list_multipart_uploads")
+        uploads = [
+            upload
+            for page in paginator.paginate(
+                Bucket=self.bucket_name, Prefix=complete_path
             )
-        return self._s3_client
+            for upload in page.get("Uploads", [])
+            if upload["Key"] == complete_path
+        ]
+        if not uploads:
+            return None
+        return max(uploads, key=lambda upload: upload["Initiated"])["UploadId"]
+
+    def _list_uploaded_parts(
+        self, complete_path: str, upload_id: str
+    ) -> dict[int, dict]:
+        paginator = self.client.get_paginator("list_parts")
+        parts = {}
+        for page in paginator.paginate(
+            Bucket=self.bucket_name, Key=complete_path, UploadId=upload_id
+        ):
+            for part in page.get("Parts", []):
+                parts[part["PartNumber"]] = part
+        return parts
+
+    def _backend_resumable_upload(
+        self,
+        file: MUploadFile,
+        complete_path: str,
+        ExtraArgs: dict,
+        transfer_config: TransferConfig,
+        checksum_algorithm: str | None,
+    ):
+        """
+        Multipart upload that continues the unfinished upload of the same key,
+        only the parts missing in S3, or whose ETag does not match the local
+        bytes, are sent. The upload is not aborted on
+        failure so the next call can resume it. The upload starts at the
+        position of the file, a stream that can not seek is spooled first.
+        """
+        s3_client = self.client
+        # Offsets from the start of the upload, not of the file
+        size, start = file.size, file.start
+        checksum_args = {}
+        if checksum_algorithm:
+            checksum_args["ChecksumAlgorithm"] = checksum_algorithm
+        part_size = transfer_config.multipart_chunksize
+        upload_id = self._find_multipart_upload(complete_path)
+        uploaded_parts = {}
+        if upload_id is not None:
+            uploaded_parts = self._list_uploaded_parts(
+                complete_path, upload_id
+            )
+            if 1 in uploaded_parts and uploaded_parts[1]["Size"] < size:
+                # Keep the part size used when the upload started
+                part_size = uploaded_parts[1]["Size"]
+        else:
+            upload_id = s3_client.create_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=complete_path,
+                **checksum_args,
+                **ExtraArgs,
+            )["UploadId"]
+        checksum_key = f"Checksum{checksum_algorithm}"
+        # Bounds the number of part bodies held in memory
+        in_flight = threading.BoundedSemaphore(transfer_config.max_concurrency)
+
+        def upload_part(part_number: int, body: bytes) -> dict:
+            try:
+                return s3_client.upload_part(
+                    Bucket=self.bucket_name,
+                    Key=complete_path,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body,
+                    **checksum_args,
+                )
+            finally:
+                in_flight.release()
+
+        parts_count = max(1, -(-size // part_size))
+        completed = []
+        futures = {}
+        with ThreadPoolExecutor(transfer_config.max_concurrency) as executor:
+            for part_number in range(1, parts_count + 1):
+                offset = (part_number - 1) * part_size
+                expected_size = min(part_size, size - offset)
+                uploaded = uploaded_parts.get(part_number)
+                if uploaded is not None and uploaded["Size"] != expected_size:
+                    uploaded = None
+                in_flight.acquire()
+                file.file.seek(start + offset)
+                body = file.file.read(expected_size)
+                # The file changed since, or another writer uploads the
+                # same key, when the ETag (MD5 of the part) differs
+                if uploaded is not None and (
+                    uploaded["ETag"].strip('"')
+                    == hashlib.md5(body).hexdigest()
+                ):
+                    in_flight.release()
+                    completed.append((part_number, uploaded))
+                    continue
+                futures[part_number] = executor.submit(
+                    upload_part, part_number, body
+                )
+            for part_number, future in futures.items():
+                completed.append((part_number, future.result()))
+        parts = []
+        for part_number, part in sorted(completed, key=lambda p: p[0]):
+            completed_part = {"PartNumber": part_number, "ETag": part["ETag"]}
+            if checksum_key in part:
+                completed_part[checksum_key] = part[checksum_key]
+            parts.append(completed_part)
+        s3_client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=complete_path,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
 
     # Backend specific Methods
     def _backend_upload(
@@ -86,56 +449,572 @@ class AWS_MediaManager(MediaManager):
         complete_path,
         ExtraArgs: dict = {},
         *args,
+        transfer_config: TransferConfig | None = None,
+        checksum_algorithm: str | None = None,
+        resumable: bool = False,
         **kwargs,
     ):
-        self.bucket.upload_fileobj(file.file, Key=complete_path, ExtraArgs=ExtraArgs)
+        transfer_config = transfer_config or self.transfer_config
+        checksum_algorithm = checksum_algorithm or self.checksum_algorithm
+        ExtraArgs = content_type_args(file, ExtraArgs)
+        if resumable:
+            # Only the missing parts are read, nothing to compute checksums
+            # from. The policy does not retry it, the next call resumes it
+            self._backend_resumable_upload(
+                file,
+                complete_path,
+                ExtraArgs,
+                transfer_config,
+                checksum_algorithm,
+            )
+        else:
+            policy = self._request_policy()
+            if policy is not None and policy.max_attempts > 1:
+                # Spools a stream that can not seek, to send it again
+                file.rewind()
+            self._call(
+                partial(
+                    self._upload_once,
+                    file,
+                    complete_path,
+                    ExtraArgs,
+                    transfer_config,
+                    checksum_algorithm,
+                ),
+                before_retry=file.rewind,
+            )
+        self._forget_files([complete_path])
+
+    def _upload_once(
+        self,
+        file: MUploadFile,
+        complete_path: str,
+        ExtraArgs: dict,
+        transfer_config: TransferConfig,
+        checksum_algorithm: str | None,
+    ) -> None:
+        hasher = Hasher(self.checksums)
+        if hasher and file.size < transfer_config.multipart_threshold:
+            # A single request, the checksums go in its headers
+            body = file.file.read()
+            hasher.update(body)
+            self.client.put_object(
+                Bucket=self.bucket_name,
+                Key=complete_path,
+                Body=body,
+                **{
+                    **ExtraArgs,
+                    **s3_checksum_args(
+                        hasher.checksums(), checksum_algorithm
+                    ),
+                },
+            )
+        else:
+            # The parts are verified by S3 with checksum_algorithm, the
+            # checksums of the whole file are computed as it is read
+            self.client.upload_fileobj(
+                HashingReader(file.file, hasher) if hasher else file.file,
+                self.bucket_name,
+                complete_path,
+                ExtraArgs=_upload_extra_args(ExtraArgs, checksum_algorithm),
+                Config=transfer_config,
+            )
+        if hasher:
+            file.checksums = hasher.checksums()
+
+    def _transfer_manager(
+        self,
+        max_concurrency: int,
+        transfer_config: TransferConfig | None = None,
+    ) -> TransferManager:
+        config = copy.copy(transfer_config or self.transfer_config)
+        config.max_concurrency = max_concurrency
+        return TransferManager(self.client, config)
+
+    def _backend_upload_many(
+        self,
+        uploads: Iterable[tuple[MUploadFile, str]],
+        max_concurrency: int,
+        ExtraArgs: dict = {},
+        *args,
+        transfer_config: TransferConfig | None = None,
+        checksum_algorithm: str | None = None,
+        resumable: bool = False,
+        **kwargs,
+    ) -> Iterator[UploadResult]:
+        """
+        Every upload goes through the same TransferManager, and so the same
+        thread pool and connections, instead of one per upload_fileobj call.
+        """
+        if resumable:
+            yield from super()._backend_upload_many(
+                uploads,
+                max_concurrency,
+                ExtraArgs,
+                *args,
+                transfer_config=transfer_config,
+                checksum_algorithm=checksum_algorithm,
+                resumable=True,
+                **kwargs,
+            )
+            return
+        extra_args = _upload_extra_args(
+            ExtraArgs, checksum_algorithm or self.checksum_algorithm
+        )
+
+        def result(upload: tuple) -> UploadResult:
+            file, complete_path, hasher, future = upload
+            try:
+                future.result()
+            except Exception as error:
+                return complete_path, error
+            if hasher:
+                file.checksums = hasher.checksums()
+            self._forget_files([complete_path])
+            return complete_path, None
+
+        with self._transfer_manager(
+            max_concurrency, transfer_config
+        ) as transfer_manager:
+            # The uploads are consumed lazily, at most max_concurrency are
+            # submitted and so have their file open at a time
+            in_flight: deque[tuple] = deque()
+            for file, complete_path in uploads:
+                if len(in_flight) >= max_concurrency:
+                    yield result(in_flight.popleft())
+                hasher = Hasher(self.checksums)
+                future = transfer_manager.upload(
+                    HashingReader(file.file, hasher) if hasher else file.file,
+                    self.bucket_name,
+                    complete_path,
+                    extra_args=content_type_args(file, extra_args),
+                )
+                in_flight.append((file, complete_path, hasher, future))
+            while in_flight:
+                yield result(in_flight.popleft())
+
+    async def _async_backend_upload_many(
+        self,
+        uploads: Iterable[tuple[MUploadFile, str]],
+        max_concurrency: int,
+        *args,
+        **kwargs,
+    ) -> AsyncIterator[UploadResult]:
+        # The TransferManager batch runs in the executor
+        results = self._backend_upload_many(
+            uploads, max_concurrency, *args, **kwargs
+        )
+        async for result in self._iterate_in_executor(results):
+            yield result
+
+    async def _async_backend_download_many(
+        self, keys: Iterable[str], max_concurrency: int
+    ) -> AsyncIterator[DownloadResult]:
+        results = self._backend_download_many(keys, max_concurrency)
+        async for result in self._iterate_in_executor(results):
+            yield result
+
+    def _backend_download_many(
+        self, keys: Iterable[str], max_concurrency: int
+    ) -> Iterator[DownloadResult]:
+        def result(download: tuple) -> DownloadResult:
+            key, file, future = download
+            try:
+                future.result()
+            except Exception as error:
+                return key, None, error
+            file.seek(0)
+            return key, file, None
+
+        with self._transfer_manager(max_concurrency) as transfer_manager:
+            # Like the uploads, at most max_concurrency downloads are
+            # submitted and so held in memory at a time
+            in_flight: deque[tuple] = deque()
+            for key in keys:
+                if len(in_flight) >= max_concurrency:
+                    yield result(in_flight.popleft())
+                file = BytesIO()
+                future = transfer_manager.download(self.bucket_name, key, file)
+                in_flight.append((key, file, future))
+            while in_flight:
+                yield result(in_flight.popleft())
 
     def _backend_delete(self, complete_path: str) -> str:
-        response = self.bucket.delete_objects(
-            Delete={"Objects": [{"Key": complete_path}], "Quiet": True}
+        response = self._call(
+            lambda: self.client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={"Objects": [{"Key": complete_path}], "Quiet": True},
+            )
         )
+        self._forget_files([complete_path])
         return response
 
+    def _backend_copy_file(
+        self,
+        source: str,
+        destination: str,
+        ExtraArgs: dict | None = None,
+        transfer_config: TransferConfig | None = None,
+    ) -> str:
+        """
+        Server side copy, copy_object or, above the multipart threshold of
+        the transfer config, upload_part_copy of the parts in parallel.
+        """
+        self._call(
+            lambda: self.client.copy(
+                {"Bucket": self.bucket_name, "Key": source},
+                self.bucket_name,
+                destination,
+                ExtraArgs=ExtraArgs,
+                Config=transfer_config or self.transfer_config,
+            )
+        )
+        self._forget_files([destination])
+        return destination
+
+    def _backend_copy_folder(
+        self,
+        prefix: str,
+        destination: str,
+        ExtraArgs: dict | None = None,
+        transfer_config: TransferConfig | None = None,
+        max_concurrency: int = 8,
+    ) -> list[CopiedFile]:
+        """
+        Every copy goes through the same TransferManager, and so the same
+        thread pool and connections.
+        """
+        prefix = folder_prefix(prefix)
+        files = list(self._backend_iter_files_in_folder(prefix))
+        copied_files: list[CopiedFile] = []
+        with self._transfer_manager(
+            max_concurrency, transfer_config
+        ) as transfer_manager:
+            futures = []
+            for file in files:
+                target = copy_destination(prefix, file["key"], destination)
+                future = transfer_manager.copy(
+                    {"Bucket": self.bucket_name, "Key": file["key"]},
+                    self.bucket_name,
+                    target,
+                    extra_args=ExtraArgs,
+                )
+                futures.append((file["key"], target, future))
+            for key, target, future in futures:
+                try:
+                    future.result()
+                except Exception as error:
+                    copied_files.append(
+                        {
+                            "key": key,
+                            "destination": target,
+                            "error": str(error),
+                        }
+                    )
+                else:
+                    self._forget_files([target])
+                    copied_files.append({"key": key, "destination": target})
+        return copied_files
+
     def _backend_get_file_location(self, complete_path: str) -> str:
+        if self.aws_endpoint_url:
+            return f"{self.aws_endpoint_url}/{self.bucket_name}/{complete_path}"
         return f"https://{self.bucket_name}.s3.{self.aws_region_name}.amazonaws.com/{complete_path}"
 
-    def _backend_delete_files_in_folder(self, prefix: str) -> list[str]:
-        files_in_folder = self._backend_list_files_in_folder(prefix)
-        files_to_delete = [{"Key": file} for file in files_in_folder]
-        s3_client = self.s3_client
-        if files_to_delete:
-            s3_client.delete_objects(
-                Bucket=self.bucket_name, Delete={"Objects": files_to_delete}
+    def _delete_batch(self, keys: list[str]) -> list[DeletedFile]:
+        try:
+            response = self._call(
+                lambda: self.client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={
+                        "Objects": [{"Key": key} for key in keys],
+                        "Quiet": True,
+                    },
+                )
             )
-        return files_to_delete
+        except Exception as e:
+            # The keys of the batch are reported, the other batches go on
+            return [{"key": key, "error": str(e)} for key in keys]
+        self._forget_files(keys)
+        return deleted_files_report(keys, response)
+
+    def _backend_delete_files(
+        self, keys: Iterable[str], max_concurrency: int = 8
+    ) -> list[DeletedFile]:
+        deleted_files = []
+        for report in map_in_threads(
+            self._delete_batch,
+            batched(keys, DELETE_BATCH_SIZE),
+            max_concurrency,
+        ):
+            deleted_files.extend(report)
+        return deleted_files
+
+    def _backend_delete_files_in_folder(
+        self, prefix: str, max_concurrency: int = 8
+    ) -> list[DeletedFile]:
+        # The keys are deleted while the listing is paginated
+        keys = (
+            file["key"] for file in self._backend_iter_files_in_folder(prefix)
+        )
+        return self._backend_delete_files(keys, max_concurrency)
 
     def _backend_list_files_in_folder(self, prefix: str) -> list[str]:
-        s3_client = self.s3_client
-        response = s3_client.list_objects_v2(Bucket=self.bucket_name, Prefix=prefix)
-        files_in_folder = response.get("Contents", [])
-        files = [file["Key"] for file in files_in_folder]  # type: ignore
-        # Exclude the specified folder from the list
-        return [file for file in files if file != f"{prefix}/"]
+        return [
+            file["key"] for file in self._backend_iter_files_in_folder(prefix)
+        ]
 
-    def _backend_download_file(self, file: str) -> BytesIO:
-        response = BytesIO()
-        self.client.download_fileobj(
-            Bucket=self.bucket_name, Key=file, Fileobj=response
+    def _list_pages(
+        self, prefix: str, page_size: int | None = None, **kwargs
+    ) -> Iterator[dict]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        pagination_config = {}
+        if page_size is not None:
+            pagination_config["PageSize"] = page_size
+        yield from paginator.paginate(
+            Bucket=self.bucket_name,
+            Prefix=prefix,
+            PaginationConfig=pagination_config,
+            **kwargs,
         )
-        response.seek(0)
-        return response
 
-    async def signed_url(self, file: str, verify: bool = False) -> str:
-        if verify:
+    def _iter_listing(
+        self, prefix: str, page_size: int | None, folder: str
+    ) -> Iterator[FileInfo]:
+        # Only the marker of the folder listed is excluded, a shard keeps the
+        # markers of the subfolders like the listing of the whole folder
+        for page in self._list_pages(prefix, page_size):
+            for file in page.get("Contents", []):
+                if file["Key"] != folder_prefix(folder):
+                    yield s3_file_info(file)
+
+    def _list_shards(
+        self, prefix: str, page_size: int | None = None
+    ) -> tuple[list[FileInfo], list[str]]:
+        """
+        Splits the prefix in the "subfolders" below it, returns the files
+        that are not in any of them and the subfolders.
+        """
+        files: list[FileInfo] = []
+        shards = [prefix]
+        # A single subfolder is the folder itself, look one level deeper
+        while len(shards) == 1:
+            shard, shards = shards[0], []
+            for page in self._list_pages(shard, page_size, Delimiter="/"):
+                files.extend(
+                    s3_file_info(file)
+                    for file in page.get("Contents", [])
+                    if file["Key"] != folder_prefix(prefix)
+                )
+                shards.extend(
+                    common_prefix["Prefix"]
+                    for common_prefix in page.get("CommonPrefixes", [])
+                )
+        return files, shards
+
+    def _backend_iter_files_in_folder(
+        self,
+        prefix: str,
+        page_size: int | None = None,
+        sharded: bool = False,
+        max_concurrency: int = 8,
+    ) -> Iterator[FileInfo]:
+        """
+        Follows the continuation tokens of list_objects_v2. With sharded the
+        subfolders of the prefix are listed in parallel, the files are not
+        yielded in key order then.
+        """
+        if not sharded:
+            yield from self._iter_listing(prefix, page_size, prefix)
+            return
+        files, shards = self._list_shards(prefix, page_size)
+        yield from files
+
+        def list_shard(shard: str) -> Callable[[], Iterator[FileInfo]]:
+            return lambda: self._iter_listing(shard, page_size, prefix)
+
+        yield from iter_in_threads(
+            (list_shard(shard) for shard in shards), max_concurrency
+        )
+
+    def _backend_download_file(self, file: str) -> BytesIO:
+        checksum_args = {"ChecksumMode": "ENABLED"} if self.checksums else {}
+
+        def download() -> BytesIO:
+            response = BytesIO()
+            # botocore checks the checksum stored with the object as it
+            # reads the body, objects uploaded in parts are not checked
+            self.client.download_fileobj(
+                Bucket=self.bucket_name,
+                Key=file,
+                Fileobj=response,
+                ExtraArgs=checksum_args or None,
+            )
+            response.seek(0)
+            return response
+
+        params = {"Bucket": self.bucket_name, "Key": file, **checksum_args}
+        return self._small_download(download, params)
+
+    def _backend_download_range(
+        self, file: str, start: int, end: int | None = None
+    ) -> BytesIO:
+        params = {
+            "Bucket": self.bucket_name,
+            "Key": file,
+            "Range": f"bytes={start}-{'' if end is None else end}",
+        }
+        policy = self._request_policy()
+        if (
+            policy is not None
+            and end is not None
+            and end - start + 1 > policy.hedge_max_size
+        ):
+            # Parts of a parallel download, not worth hedging
+            return self._call(partial(self._get_object, params))
+        return self._small_download(partial(self._get_object, params), params)
+
+    def _backend_stream_file(
+        self,
+        file: str,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+        start: int = 0,
+        end: int | None = None,
+    ) -> Iterator[bytes]:
+        params = {"Bucket": self.bucket_name, "Key": file}
+        if start or end is not None:
+            params["Range"] = f"bytes={start}-{'' if end is None else end}"
+        body = self._call(lambda: self.client.get_object(**params))["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def _head_object(self, file: str) -> dict:
+        try:
+            return self._call(
+                lambda: self.client.head_object(
+                    Bucket=self.bucket_name, Key=file
+                )
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "404":
+                raise FileNotFoundError(file)
+            raise
+
+    def _backend_get_file_size(self, file: str) -> int:
+        return self._head_object(file)["ContentLength"]
+
+    def _backend_get_file_info(self, file: str) -> FileInfo:
+        return head_file_info(file, self._head_object(file))
+
+    @property
+    def signed_url_cache_stats(self) -> dict[str, CacheStats]:
+        return {
+            "urls": self.signed_url_cache.stats,
+            "verify": self.verify_cache.stats,
+        }
+
+    def _signed_url_cache_key(
+        self, file: str, expires_in: int, params: dict | None
+    ) -> tuple:
+        return (file, expires_in, tuple(sorted((params or {}).items())))
+
+    def _cache_signed_url(self, key: tuple, url: str, expires_in: int):
+        ttl = expires_in - self.signed_url_min_validity
+        if ttl > 0:
+            self.signed_url_cache.set(key, url, ttl=ttl)
+
+    def _cache_verification(self, file: str, exists: bool) -> None:
+        if exists:
+            self.verify_cache.set(file, True, ttl=self.verify_cache_ttl)
+        else:
+            self.verify_cache.set(
+                file, False, ttl=self.verify_negative_cache_ttl
+            )
+
+    def _forget_files(self, keys: Iterable[str]) -> None:
+        # Writes through the manager invalidate the cached head_object
+        for key in keys:
+            self.verify_cache.pop(key)
+
+    def _file_exists(self, file: str) -> bool:
+        exists = self.verify_cache.get(file)
+        if exists is None:
             try:
-                self.client.head_object(Bucket=self.bucket_name, Key=file)
+                self._call(
+                    lambda: self.client.head_object(
+                        Bucket=self.bucket_name, Key=file
+                    )
+                )
+                exists = True
             except ClientError as e:
-                if e.response["Error"]["Code"] == "404":
-                    raise FileNotFoundError
-                else:
+                if e.response["Error"]["Code"] != "404":
                     raise
-        params = {"Bucket": self.bucket_name, "Key": file}
-        url = self.client.generate_presigned_url(
-            "get_object", Params=params, ExpiresIn=3600
-        )
+                exists = False
+            self._cache_verification(file, exists)
+        return exists
+
+    def _verify_file_exists(self, file: str) -> None:
+        if not self._file_exists(file):
+            raise FileNotFoundError
+
+    def _backend_signed_url(
+        self,
+        file: str,
+        verify: bool = False,
+        expires_in: int = 3600,
+        params: dict | None = None,
+    ) -> str:
+        """
+        params are extra get_object parameters such as
+        ResponseContentDisposition.
+        """
+        if verify:
+            self._verify_file_exists(file)
+        key = self._signed_url_cache_key(file, expires_in, params)
+        url = self.signed_url_cache.get(key)
+        if url is None:
+            get_object_params = {
+                **(params or {}),
+                "Bucket": self.bucket_name,
+                "Key": file,
+            }
+            url = self.client.generate_presigned_url(
+                "get_object", Params=get_object_params, ExpiresIn=expires_in
+            )
+            self._cache_signed_url(key, url, expires_in)
         return url
+
+    def _sign_urls(
+        self, keys: Iterable[str], expires_in: int, params: dict | None
+    ) -> dict[str, str]:
+        urls = {}
+        client = self.client
+        get_object_params = {**(params or {}), "Bucket": self.bucket_name}
+        for key in keys:
+            cache_key = self._signed_url_cache_key(key, expires_in, params)
+            url = self.signed_url_cache.get(cache_key)
+            if url is None:
+                url = client.generate_presigned_url(
+                    "get_object",
+                    Params={**get_object_params, "Key": key},
+                    ExpiresIn=expires_in,
+                )
+                self._cache_signed_url(cache_key, url, expires_in)
+            urls[key] = url
+        return urls
+
+    def _backend_signed_urls(
+        self,
+        keys: Iterable[str],
+        verify: bool = False,
+        expires_in: int = 3600,
+        params: dict | None = None,
+        max_concurrency: int = 8,
+    ) -> dict[str, str]:
+        keys = list(dict.fromkeys(keys))
+        if verify:
+            exists = map_in_threads(self._file_exists, keys, max_concurrency)
+            keys = [key for key, found in zip(keys, exists) if found]
+        return self._sign_urls(keys, expires_in, params)
@@ -0,0 +1,637 @@
+from media_manager.base.base import (
+    DEFAULT_STREAM_CHUNK_SIZE,
+    LIST_BATCH_SIZE,
+    DeletedFile,
+    MediaManager,
+    folder_prefix,
+)
+from media_manager.base.datastructures import FileInfo
+from media_manager.managers.aws import (
+    DELETE_BATCH_SIZE,
+    AWS_MediaManager,
+    content_type_args,
+    deleted_files_report,
+    head_file_info,
+    s3_file_info,
+    s3_retryable,
+)
+from media_manager.base.datastructures import MUploadFile
+from media_manager.base.checksums import Hasher, s3_checksum_args
+from media_manager.base.policy import (
+    async_call_with_retries,
+    async_hedged_call,
+)
+from media_manager.base.utils import HashingReader, run_in_tasks
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from contextlib import AsyncExitStack, suppress
+from functools import partial
+from io import BytesIO
+from typing import BinaryIO
+import asyncio
+import time
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import get_session
+except ImportError:  # pragma: no cover - optional dependency
+    AioConfig = None
+    get_session = None
+
+
+async def _close_client(
+    exit_stack: AsyncExitStack | None,
+    loop: asyncio.AbstractEventLoop | None,
+) -> None:
+    # A client is closed on its event loop when it still runs, else here
+    # where its connections can only be dropped
+    if exit_stack is None:
+        return
+    if loop is not None and loop.is_running():
+        asyncio.run_coroutine_threadsafe(exit_stack.aclose(), loop)
+        return
+    with suppress(Exception):
+        await exit_stack.aclose()
+
+
+class AsyncAWS_MediaManager(AWS_MediaManager):
+    """
+    AWS manager whose async methods use an asyncio native S3 client
+    (aiobotocore) instead of running boto3 in the executor. The sync methods
+    are inherited from AWS_MediaManager.
+    """
+
+    def __init__(
+        self,
+        *args,
+        max_pool_connections: int = 100,
+        **kwargs,
+    ):
+        if get_session is None:
+            raise ImportError(
+                "aiobotocore is required for AsyncAWS_MediaManager, install"
+                " it with `pip install media-manager[async]`"
+            )
+        super().__init__(
+            *args, max_pool_connections=max_pool_connections, **kwargs
+        )
+        self._async_client_task: asyncio.Task | None = None
+        self._async_client_loop: asyncio.AbstractEventLoop | None = None
+        self._async_exit_stack: AsyncExitStack | None = None
+
+    # AWS_MediaManager sends batches through a threaded TransferManager, the
+    # native client runs them as tasks instead
+    _async_backend_upload_many = MediaManager._async_backend_upload_many
+    _async_backend_download_many = MediaManager._async_backend_download_many
+
+    async def _create_async_client(self):
+        exit_stack = AsyncExitStack()
+        client = await exit_stack.enter_async_context(
+            get_session().create_client(
+                "s3",
+                region_name=self.aws_region_name,
+                aws_access_key_id=self.aws_access_key_id,
+                aws_secret_access_key=self.aws_secret_access_key,
+                endpoint_url=self.aws_endpoint_url,
+                # The client is shared, the timeouts of request_policy do not
+                # apply to it, only the ones of the manager policy
+                config=AioConfig().merge(
+                    self._client_settings(self.policy).config()
+                ),
+            )
+        )
+        self._async_exit_stack = exit_stack
+        return client
+
+    async def get_async_client(self):
+        """
+        Returns the client shared by every call, its HTTP session keeps the
+        connections alive between requests.
+        """
+        loop = asyncio.get_running_loop()
+        # Clients are bound to the event loop that created them
+        if (
+            self._async_client_task is None
+            or self._async_client_loop is not loop
+        ):
+            stale = self._async_exit_stack, self._async_client_loop
+            self._async_exit_stack = None
+            self._async_client_loop = loop
+            self._async_client_task = loop.create_task(
+                self._create_async_client()
+            )
+            await _close_client(*stale)
+        try:
+            return await asyncio.shield(self._async_client_task)
+        except Exception:
+            self._async_client_task = None
+            raise
+
+    async def aclose(self) -> None:
+        exit_stack, self._async_exit_stack = self._async_exit_stack, None
+        self._async_client_task = None
+        self._async_client_loop = None
+        if exit_stack is not None:
+            await exit_stack.aclose()
+        self.close()
+
+    async def _async_call(
+        self,
+        function: Callable[[], Awaitable],
+        before_retry: Callable[[], None] | None = None,
+    ):
+        policy = self._request_policy()
+        if policy is None:
+            return await function()
+        return await async_call_with_retries(
+            policy, function, s3_retryable, before_retry
+        )
+
+    async def _async_get_object(
+        self, client, params: dict, max_size: int | None = None
+    ) -> BytesIO:
+        response = await client.get_object(**params)
+        async with response["Body"] as body:
+            if max_size is not None and response["ContentLength"] > max_size:
+                # A hedged request declines the big files
+                raise ValueError(f"{params['Key']} is too big to hedge")
+            return BytesIO(await body.read())
+
+    async def _async_small_download(self, params: dict) -> BytesIO:
+        client = await self.get_async_client()
+        download = partial(self._async_get_object, client, params)
+        policy = self._request_policy()
+        if policy is None:
+            return await download()
+        delay = self.download_latencies.hedge_delay(policy)
+        hedge = partial(
+            self._async_get_object, client, params, policy.hedge_max_size
+        )
+
+        async def attempt() -> BytesIO:
+            started = time.perf_counter()
+            if delay is None:
+                response = await download()
+            else:
+                response = await async_hedged_call(download, hedge, delay)
+            if response.getbuffer().nbytes <= policy.hedge_max_size:
+                self.download_latencies.record(time.perf_counter() - started)
+            return response
+
+        return await async_call_with_retries(policy, attempt, s3_retryable)
+
+    async def _async_multipart_upload(
+        self,
+        client,
+        source: BinaryIO,
+        complete_path: str,
+        first_part: bytes,
+        ExtraArgs: dict,
+        transfer_config: TransferConfig,
+    ):
+        upload = await client.create_multipart_upload(
+            Bucket=self.bucket_name, Key=complete_path, **ExtraArgs
+        )
+        upload_id = upload["UploadId"]
+        checksum_key = f"Checksum{ExtraArgs.get('ChecksumAlgorithm')}"
+        checksum_args = {}
+        if "ChecksumAlgorithm" in ExtraArgs:
+            checksum_args["ChecksumAlgorithm"] = ExtraArgs["ChecksumAlgorithm"]
+        # Bounds the number of parts in flight, and so the memory in use
+        semaphore = asyncio.Semaphore(transfer_config.max_concurrency)
+
+        async def upload_part(part_number: int, body: bytes) -> dict:
+            try:
+                response = await client.upload_part(
+                    Bucket=self.bucket_name,
+                    Key=complete_path,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body,
+                    **checksum_args,
+                )
+                part = {"PartNumber": part_number, "ETag": response["ETag"]}
+                if checksum_key in response:
+                    part[checksum_key] = response[checksum_key]
+                return part
+            finally:
+                semaphore.release()
+
+        tasks: list[asyncio.Task] = []
+        try:
+            part_number, body = 1, first_part
+            while body:
+                await semaphore.acquire()
+                if any(task.done() and task.exception() for task in tasks):
+                    semaphore.release()
+                    break
+                tasks.append(
+                    asyncio.create_task(upload_part(part_number, body))
+                )
+                part_number += 1
+                body = await self.executor.run(
+                    source.read, transfer_config.multipart_chunksize
+                )
+            parts = await asyncio.gather(*tasks)
+            await client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=complete_path,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            with suppress(Exception):
+                await client.abort_multipart_upload(
+                    Bucket=self.bucket_name,
+                    Key=complete_path,
+                    UploadId=upload_id,
+                )
+            raise
+
+    # Async backend methods
+    async def _async_backend_upload(
+        self,
+        file: MUploadFile,
+        complete_path: str,
+        ExtraArgs: dict = {},
+        *args,
+        transfer_config: TransferConfig | None = None,
+        checksum_algorithm: str | None = None,
+        resumable: bool = False,
+        **kwargs,
+    ):
+        transfer_config = transfer_config or self.transfer_config
+        checksum_algorithm = checksum_algorithm or self.checksum_algorithm
+        ExtraArgs = content_type_args(file, ExtraArgs)
+        if resumable:
+            # Resuming lists the uploaded parts, the sync version handles it
+            return await super()._async_backend_upload(
+                file,
+                complete_path,
+                ExtraArgs,
+                transfer_config=transfer_config,
+                checksum_algorithm=checksum_algorithm,
+                resumable=True,
+            )
+        client = await self.get_async_client()
+        threshold = transfer_config.multipart_threshold
+        hasher = Hasher(self.checksums)
+        source = HashingReader(file.file, hasher) if hasher else file.file
+        # Reading a big or spooled file blocks, it runs in the executor
+        first_part = await self.executor.run(source.read, threshold)
+        if len(first_part) < threshold:
+            # The whole file was read, its checksums go in the headers
+            await self._async_call(
+                partial(
+                    client.put_object,
+                    Bucket=self.bucket_name,
+                    Key=complete_path,
+                    Body=first_part,
+                    **{
+                        **ExtraArgs,
+                        **s3_checksum_args(
+                            hasher.checksums(), checksum_algorithm
+                        ),
+                    },
+                )
+            )
+        else:
+            # The parts are read once, a failed upload is aborted and not
+            # retried
+            if checksum_algorithm:
+                ExtraArgs = {
+                    **ExtraArgs,
+                    "ChecksumAlgorithm": checksum_algorithm,
+                }
+            await self._async_multipart_upload(
+                client,
+                source,
+                complete_path,
+                first_part,
+                ExtraArgs,
+                transfer_config,
+            )
+        if hasher:
+            file.checksums = hasher.checksums()
+        self._forget_files([complete_path])
+
+    async def _async_backend_delete(self, complete_path: str) -> str:
+        client = await self.get_async_client()
+        response = await self._async_call(
+            partial(
+                client.delete_objects,
+                Bucket=self.bucket_name,
+                Delete={"Objects": [{"Key": complete_path}], "Quiet": True},
+            )
+        )
+        self._forget_files([complete_path])
+        return response
+
+    async def _async_backend_get_file_location(
+        self, complete_path: str
+    ) -> str:
+        # The location is built locally, there is no I/O to wait for
+        return self._backend_get_file_location(complete_path)
+
+    async def _async_delete_batch(self, keys: list[str]) -> list[DeletedFile]:
+        client = await self.get_async_client()
+        try:
+            response = await self._async_call(
+                partial(
+                    client.delete_objects,
+                    Bucket=self.bucket_name,
+                    Delete={
+                        "Objects": [{"Key": key} for key in keys],
+                        "Quiet": True,
+                    },
+                )
+            )
+        except Exception as e:
+            # The keys of the batch are reported, the other batches go on
+            return [{"key": key, "error": str(e)} for key in keys]
+        self._forget_files(keys)
+        return deleted_files_report(keys, response)
+
+    async def _async_delete_keys(
+        self, keys: AsyncIterator[str], max_concurrency: int
+    ) -> list[DeletedFile]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+        tasks: list[asyncio.Task] = []
+
+        async def delete_batch(batch: list[str]) -> list[DeletedFile]:
+            try:
+                return await self._async_delete_batch(batch)
+            finally:
+                semaphore.release()
+
+        try:
+            batch = []
+            async for key in keys:
+                batch.append(key)
+                if len(batch) < DELETE_BATCH_SIZE:
+                    continue
+                await semaphore.acquire()
+                tasks.append(asyncio.create_task(delete_batch(batch)))
+                batch = []
+            if batch:
+                await semaphore.acquire()
+                tasks.append(asyncio.create_task(delete_batch(batch)))
+            reports = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return [deleted for report in reports for deleted in report]
+
+    async def _async_backend_delete_files(
+        self, keys: Iterable[str], max_concurrency: int = 8
+    ) -> list[DeletedFile]:
+        async def iter_keys() -> AsyncIterator[str]:
+            for key in keys:
+                yield key
+
+        return await self._async_delete_keys(iter_keys(), max_concurrency)
+
+    async def _async_backend_delete_files_in_folder(
+        self, prefix: str, max_concurrency: int = 8
+    ) -> list[DeletedFile]:
+        # The keys are deleted while the listing is paginated
+        keys = (
+            file["key"]
+            async for file in self._async_backend_iter_files_in_folder(prefix)
+        )
+        return await self._async_delete_keys(keys, max_concurrency)
+
+    async def _async_backend_list_files_in_folder(
+        self, prefix: str
+    ) -> list[str]:
+        return [
+            file["key"]
+            async for file in self._async_backend_iter_files_in_folder(prefix)
+        ]
+
+    async def _async_list_pages(
+        self, prefix: str, page_size: int | None = None, **kwargs
+    ) -> AsyncIterator[dict]:
+        client = await self.get_async_client()
+        paginator = client.get_paginator("list_objects_v2")
+        pagination_config = {}
+        if page_size is not None:
+            pagination_config["PageSize"] = page_size
+        async for page in paginator.paginate(
+            Bucket=self.bucket_name,
+            Prefix=prefix,
+            PaginationConfig=pagination_config,
+            **kwargs,
+        ):
+            yield page
+
+    async def _async_iter_listing(
+        self, prefix: str, page_size: int | None, folder: str
+    ) -> AsyncIterator[FileInfo]:
+        async for page in self._async_list_pages(prefix, page_size):
+            for file in page.get("Contents", []):
+                if file["Key"] != folder_prefix(folder):
+                    yield s3_file_info(file)
+
+    async def _async_list_shards(
+        self, prefix: str, page_size: int | None = None
+    ) -> tuple[list[FileInfo], list[str]]:
+        files: list[FileInfo] = []
+        shards = [prefix]
+        # A single subfolder is the folder itself, look one level deeper
+        while len(shards) == 1:
+            shard, shards = shards[0], []
+            async for page in self._async_list_pages(
+                shard, page_size, Delimiter="/"
+            ):
+                files.extend(
+                    s3_file_info(file)
+                    for file in page.get("Contents", [])
+                    if file["Key"] != folder_prefix(prefix)
+                )
+                shards.extend(
+                    common_prefix["Prefix"]
+                    for common_prefix in page.get("CommonPrefixes", [])
+                )
+        return files, shards
+
+    async def _async_backend_iter_files_in_folder(
+        self,
+        prefix: str,
+        page_size: int | None = None,
+        sharded: bool = False,
+        max_concurrency: int = 8,
+    ) -> AsyncIterator[FileInfo]:
+        if not sharded:
+            async for file in self._async_iter_listing(
+                prefix, page_size, prefix
+            ):
+                yield file
+            return
+        files, shards = await self._async_list_shards(prefix, page_size)
+        for file in files:
+            yield file
+        # The shards are listed concurrently and merged through the queue
+        queue: asyncio.Queue = asyncio.Queue(maxsize=LIST_BATCH_SIZE)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        done = object()
+
+        async def list_shard(shard: str):
+            async with semaphore:
+                async for file in self._async_iter_listing(
+                    shard, page_size, prefix
+                ):
+                    await queue.put(file)
+
+        tasks = [asyncio.create_task(list_shard(shard)) for shard in shards]
+
+        async def wait_shards():
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                await queue.put(done)
+
+        waiter = asyncio.create_task(wait_shards())
+        try:
+            while (file := await queue.get()) is not done:
+                yield file
+            # Raises the error of a failed shard
+            await waiter
+        finally:
+            for task in [*tasks, waiter]:
+                task.cancel()
+
+    async def _async_backend_download_file(self, file: str) -> BytesIO:
+        # The checksum stored with the object is checked as the body is read
+        return await self._async_small_download(
+            {
+                "Bucket": self.bucket_name,
+                "Key": file,
+                **({"ChecksumMode": "ENABLED"} if self.checksums else {}),
+            }
+        )
+
+    async def _async_backend_download_range(
+        self, file: str, start: int, end: int | None = None
+    ) -> BytesIO:
+        params = {
+            "Bucket": self.bucket_name,
+            "Key": file,
+            "Range": f"bytes={start}-{'' if end is None else end}",
+        }
+        policy = self._request_policy()
+        if (
+            policy is not None
+            and end is not None
+            and end - start + 1 > policy.hedge_max_size
+        ):
+            # Parts of a parallel download, not worth hedging
+            client = await self.get_async_client()
+            return await self._async_call(
+                partial(self._async_get_object, client, params)
+            )
+        return await self._async_small_download(params)
+
+    async def _async_backend_stream_file(
+        self,
+        file: str,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+        start: int = 0,
+        end: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        client = await self.get_async_client()
+        params = {"Bucket": self.bucket_name, "Key": file}
+        if start or end is not None:
+            params["Range"] = f"bytes={start}-{'' if end is None else end}"
+        response = await self._async_call(
+            partial(client.get_object, **params)
+        )
+        async with response["Body"] as body:
+            async for chunk in body.iter_chunks(chunk_size):
+                yield chunk
+
+    async def _async_head_object(self, file: str) -> dict:
+        client = await self.get_async_client()
+        try:
+            return await self._async_call(
+                partial(client.head_object, Bucket=self.bucket_name, Key=file)
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "404":
+                raise FileNotFoundError(file)
+            raise
+
+    async def _async_backend_get_file_size(self, file: str) -> int:
+        return (await self._async_head_object(file))["ContentLength"]
+
+    async def _async_backend_get_file_info(self, file: str) -> FileInfo:
+        return head_file_info(file, await self._async_head_object(file))
+
+    async def _async_file_exists(self, file: str) -> bool:
+        exists = self.verify_cache.get(file)
+        if exists is None:
+            client = await self.get_async_client()
+            try:
+                await self._async_call(
+                    partial(
+                        client.head_object, Bucket=self.bucket_name, Key=file
+                    )
+                )
+                exists = True
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "404":
+                    raise
+                exists = False
+            self._cache_verification(file, exists)
+        return exists
+
+    async def _async_backend_signed_url(
+        self,
+        file: str,
+        verify: bool = False,
+        expires_in: int = 3600,
+        params: dict | None = None,
+    ) -> str:
+        client = await self.get_async_client()
+        if verify and not await self._async_file_exists(file):
+            raise FileNotFoundError
+        key = self._signed_url_cache_key(file, expires_in, params)
+        url = self.signed_url_cache.get(key)
+        if url is None:
+            get_object_params = {
+                **(params or {}),
+                "Bucket": self.bucket_name,
+                "Key": file,
+            }
+            url = await client.generate_presigned_url(
+                "get_object", Params=get_object_params, ExpiresIn=expires_in
+            )
+            self._cache_signed_url(key, url, expires_in)
+        return url
+
+    async def _async_backend_signed_urls(
+        self,
+        keys: Iterable[str],
+        verify: bool = False,
+        expires_in: int = 3600,
+        params: dict | None = None,
+        max_concurrency: int = 8,
+    ) -> dict[str, str]:
+        keys = list(dict.fromkeys(keys))
+        if verify:
+            exists = [
+                found
+                async for found in run_in_tasks(
+                    map(self._async_file_exists, keys), max_concurrency
+                )
+            ]
+            keys = [key for key, found in zip(keys, exists) if found]
+        # Signing is local CPU work, it runs in the executor with the sync
+        # client instead of awaiting the async client for every key
+        return await self.executor.run(
+            self._sign_urls, keys, expires_in, params
+        )
@@ -0,0 +1,90 @@
+from botocore.client import BaseClient
+from botocore.config import Config
+from typing import NamedTuple
+import boto3
+import os
+import threading
+
+
+class ClientSettings(NamedTuple):
+    aws_access_key_id: str | None
+    aws_secret_access_key: str | None
+    region_name: str | None
+    endpoint_url: str | None = None
+    max_pool_connections: int = 10
+    tcp_keepalive: bool = False
+    # legacy, standard or adaptive
+    retry_mode: str = "standard"
+    max_attempts: int | None = None
+    # Seconds, None keeps the botocore defaults (60)
+    connect_timeout: float | None = None
+    read_timeout: float | None = None
+
+    def config(self) -> Config:
+        retries = {"mode": self.retry_mode}
+        if self.max_attempts is not None:
+            retries["max_attempts"] = self.max_attempts
+        timeouts = {
+            name: getattr(self, name)
+            for name in ("connect_timeout", "read_timeout")
+            if getattr(self, name) is not None
+        }
+        return Config(
+            max_pool_connections=self.max_pool_connections,
+            tcp_keepalive=self.tcp_keepalive,
+            retries=retries,
+            **timeouts,
+        )
+
+
+class ClientRegistry:
+    """
+    Process wide S3 clients, one per ClientSettings. Every manager with the
+    same settings shares the client and its connection pool. The clients are
+    created on first use and forgotten in forked children, a connection pool
+    can not be shared between processes.
+    """
+
+    def __init__(self):
+        self._clients: dict[ClientSettings, BaseClient] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def get(self, settings: ClientSettings) -> BaseClient:
+        client = self._clients.get(settings)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(settings)
+            if client is None:
+                # The default boto3 session is not thread safe
+                client = boto3.session.Session().client(
+                    "s3",
+                    aws_access_key_id=settings.aws_access_key_id,
+                    aws_secret_access_key=settings.aws_secret_access_key,
+                    region_name=settings.region_name,
+                    endpoint_url=settings.endpoint_url,
+                    config=settings.config(),
+                )
+                self._clients[settings] = client
+        return client
+
+    def clear(self) -> None:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+    def _after_fork(self) -> None:
+        # The sockets belong to the parent, drop the clients without closing
+        self._lock = threading.Lock()
+        self._clients = {}
+
+
+s3_clients = ClientRegistry()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=s3_clients._after_fork)
@@ -0,0 +1,334 @@
+from media_manager.base.base import DeletedFile, MediaManager
+from media_manager.base.datastructures import FileInfo, MUploadFile
+from media_manager.base.utils import (
+    HashingReader,
+    copy_fileobj,
+    map_in_threads,
+)
+from media_manager.managers.wrapper import Wrapper_MediaManager
+from typing_extensions import TypedDict
+from collections.abc import Iterable, Iterator
+from contextlib import suppress
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO
+import hashlib
+import json
+import threading
+
+MB = 1024 * 1024
+
+
+class Pointer(TypedDict):
+    # Content stored at the path
+    sha256: str
+    size: int
+    content_type: str | None
+
+
+def _path_hash(path: str) -> str:
+    return hashlib.sha256(path.encode()).hexdigest()
+
+
+class Dedup_MediaManager(Wrapper_MediaManager):
+    """
+    Stores every distinct content once. The blobs are kept below blob_folder
+    named by their sha256 and the path of an upload holds a small JSON
+    pointer to its blob. The upload is hashed while it is spooled, when the
+    blob already exists it is not transferred again.
+
+    Every path pointing to a blob has a reference object in
+    {blob_folder}/refs/{sha256}/ and the blob is deleted with its last
+    reference. References are objects instead of a counter so adding and
+    removing them is idempotent and needs no atomic update, which S3 does
+    not have. Adding and releasing the references of a blob is serialized
+    within the process only, a blob released in one process while another
+    one uploads the same content can be lost.
+
+    blob_folder must be outside the folders listed through the manager.
+    """
+
+    # Go through the uploads and downloads of the wrapper one by one
+    _backend_upload_many = MediaManager._backend_upload_many
+    _backend_download_many = MediaManager._backend_download_many
+    _backend_get_folder_size = MediaManager._backend_get_folder_size
+    # Built on the copies and deletes below
+    _backend_move_file = MediaManager._backend_move_file
+    _backend_copy_folder = MediaManager._backend_copy_folder
+
+    def __init__(
+        self,
+        media_manager: MediaManager,
+        blob_folder: str,
+        spool_size: int = 8 * MB,
+        max_workers: int | None = None,
+    ):
+        super().__init__(media_manager, max_workers)
+        self.blob_folder = blob_folder.rstrip("/")
+        # Uploads up to spool_size bytes are spooled in memory
+        self.spool_size = spool_size
+        self._locks = [threading.Lock() for _ in range(64)]
+
+    def blob_path(self, sha256: str) -> str:
+        return f"{self.blob_folder}/blobs/{sha256[:2]}/{sha256}"
+
+    def _reference_folder(self, sha256: str) -> str:
+        return f"{self.blob_folder}/refs/{sha256}"
+
+    def _reference_path(self, sha256: str, path: str) -> str:
+        return f"{self._reference_folder(sha256)}/{_path_hash(path)}"
+
+    def _lock(self, sha256: str) -> threading.Lock:
+        return self._locks[int(sha256[:8], 16) % len(self._locks)]
+
+    def _write(self, path: str, content: bytes) -> None:
+        self.media_manager._backend_upload(
+            MUploadFile(BytesIO(content), content_type="application/json"),
+            path,
+        )
+
+    def read_pointer(self, path: str) -> Pointer:
+        response = self.media_manager._backend_download_file(path)
+        return json.loads(response.read())
+
+    def _blob(self, path: str) -> str:
+        return self.blob_path(self.read_pointer(path)["sha256"])
+
+    def _previous_blob(self, path: str) -> str | None:
+        if not self.media_manager._backend_file_exists(path):
+            return None
+        try:
+            return self.read_pointer(path)["sha256"]
+        except (ValueError, KeyError, TypeError):
+            # A file written without the wrapper
+            return None
+
+    def _reference(
+        self,
+        sha256: str,
+        path: str,
+        spool: BinaryIO,
+        content_type: str | None,
+        *args,
+        **kwargs,
+    ) -> None:
+        reference_path = self._reference_path(sha256, path)
+        blob_path = self.blob_path(sha256)
+        # The reference is written before looking for the blob, a release
+        # running after this sees it and keeps the blob
+        with self._lock(sha256):
+            self._write(reference_path, path.encode())
+            exists = self.media_manager._backend_file_exists(blob_path)
+        if not exists:
+            blob = MUploadFile(
+                spool, filename=sha256, content_type=content_type
+            )
+            self.media_manager._backend_upload(
+                blob, blob_path, *args, **kwargs
+            )
+
+    def _release(self, sha256: str, path: str) -> None:
+        with self._lock(sha256):
+            with suppress(FileNotFoundError):
+                self.media_manager._backend_delete(
+                    self._reference_path(sha256, path)
+                )
+            if not self.media_manager._backend_list_files_in_folder(
+                self._reference_folder(sha256)
+            ):
+                with suppress(FileNotFoundError):
+                    self.media_manager._backend_delete(self.blob_path(sha256))
+
+    # Writes
+    def _backend_upload(
+        self, file: MUploadFile, complete_path: str, *args, **kwargs
+    ) -> str:
+        digest = hashlib.sha256()
+        previous = self._previous_blob(complete_path)
+        with SpooledTemporaryFile(self.spool_size) as spool:
+            size = copy_fileobj(HashingReader(file.file, digest), spool)
+            spool.seek(0)
+            sha256 = digest.hexdigest()
+            self._reference(
+                sha256,
+                complete_path,
+                spool,
+                file.content_type,
+                *args,
+                **kwargs,
+            )
+        pointer: Pointer = {
+            "sha256": sha256,
+            "size": size,
+            "content_type": file.content_type,
+        }
+        self._write_pointer(complete_path, pointer, previous)
+        return complete_path
+
+    def _write_pointer(
+        self, path: str, pointer: Pointer, previous: str | None
+    ) -> None:
+        try:
+            self._write(path, json.dumps(pointer).encode())
+        finally:
+            self._forget_files([path])
+        if previous is not None and previous != pointer["sha256"]:
+            self._release(previous, path)
+
+    def _backend_copy_file(
+        self, source: str, destination: str, *args, **kwargs
+    ) -> str:
+        # Only the pointer is copied, the blob gets one more reference
+        pointer = self.read_pointer(source)
+        previous = self._previous_blob(destination)
+        with self._lock(pointer["sha256"]):
+            self._write(
+                self._reference_path(pointer["sha256"], destination),
+                destination.encode(),
+            )
+        self._write_pointer(destination, pointer, previous)
+        return destination
+
+    def _backend_delete(self, complete_path: str, *args, **kwargs):
+        sha256 = self.read_pointer(complete_path)["sha256"]
+        response = super()._backend_delete(complete_path, *args, **kwargs)
+        self._release(sha256, complete_path)
+        return response
+
+    def _backend_delete_files(
+        self, keys: Iterable[str], max_concurrency: int = 8
+    ) -> list[DeletedFile]:
+        keys = list(keys)
+        blobs = dict(
+            zip(
+                keys,
+                map_in_threads(self._previous_blob, keys, max_concurrency),
+            )
+        )
+        deleted_files = super()._backend_delete_files(keys, max_concurrency)
+        releases = [
+            (blobs[file["key"]], file["key"])
+            for file in deleted_files
+            if "error" not in file and blobs.get(file["key"]) is not None
+        ]
+        list(
+            map_in_threads(
+                lambda release: self._release(*release),
+                releases,
+                max_concurrency,
+            )
+        )
+        return deleted_files
+
+    def _backend_delete_files_in_folder(
+        self, prefix: str, max_concurrency: int = 8
+    ) -> list[DeletedFile]:
+        keys = [
+            self.media_manager._backend_listing_path(prefix, file["key"])
+            for file in self.media_manager._backend_iter_files_in_folder(
+                prefix
+            )
+        ]
+        return self._backend_delete_files(keys, max_concurrency)
+
+    # Reads, resolved through the pointer
+    def _backend_iter_files_in_folder(
+        self, prefix: str, *args, max_concurrency: int = 8, **kwargs
+    ) -> Iterator[FileInfo]:
+        """
+        Lists the pointers and reads them, max_concurrency at a time, to
+        report the size and the sha256 of the content.
+        """
+
+        def resolve(file: FileInfo) -> FileInfo:
+            pointer = self.read_pointer(
+                self.media_manager._backend_listing_path(prefix, file["key"])
+            )
+            return {**file, "size": pointer["size"], "etag": pointer["sha256"]}
+
+        yield from map_in_threads(
+            resolve,
+            self.media_manager._backend_iter_files_in_folder(
+                prefix, *args, **kwargs
+            ),
+            max_concurrency,
+        )
+
+    def _backend_get_file_info(self, file: str) -> FileInfo:
+        info = self.media_manager._backend_get_file_info(file)
+        pointer = self.read_pointer(file)
+        return {**info, "size": pointer["size"], "etag": pointer["sha256"]}
+
+    def _backend_get_file_size(self, file: str) -> int:
+        return self.read_pointer(file)["size"]
+
+    def _backend_get_file_location(
+        self, complete_path: str, *args, **kwargs
+    ) -> str:
+        return self.media_manager._backend_get_file_location(
+            self._blob(complete_path), *args, **kwargs
+        )
+
+    def _backend_download_file(self, file: str, *args, **kwargs):
+        return self.media_manager._backend_download_file(
+            self._blob(file), *args, **kwargs
+        )
+
+    def _backend_download_range(
+        self, file: str, start: int, end: int | None = None
+    ) -> BytesIO:
+        return self.media_manager._backend_download_range(
+            self._blob(file), start, end
+        )
+
+    def _backend_open_file(self, file: str) -> BinaryIO:
+        return self.media_manager._backend_open_file(self._blob(file))
+
+    def _backend_stream_file(self, file: str, *args, **kwargs):
+        yield from self.media_manager._backend_stream_file(
+            self._blob(file), *args, **kwargs
+        )
+
+    def _backend_signed_url(
+        self, file: str, verify: bool = False, *args, **kwargs
+    ) -> str:
+        # Reading the pointer already verifies the file
+        return self.media_manager._backend_signed_url(
+            self._blob(file), False, *args, **kwargs
+        )
+
+    def _backend_signed_urls(
+        self,
+        keys: Iterable[str],
+        verify: bool = False,
+        *args,
+        max_concurrency: int = 8,
+        **kwargs,
+    ) -> dict[str, str]:
+        def blob(key: str) -> tuple[str, str | None]:
+            if verify and not self.media_manager._backend_file_exists(key):
+                return key, None
+            return key, self._blob(key)
+
+        blobs = {
+            key: blob_path
+            for key, blob_path in map_in_threads(blob, keys, max_concurrency)
+            if blob_path is not None
+        }
+        urls = self.media_manager._backend_signed_urls(
+            set(blobs.values()),
+            False,
+            *args,
+            max_concurrency=max_concurrency,
+            **kwargs,
+        )
+        return {key: urls[blob_path] for key, blob_path in blobs.items()}
+
+
+# The async versions run the methods above in the executor
+for _name in list(vars(Dedup_MediaManager)):
+    _async_name = f"_async{_name}"
+    if _name.startswith("_backend_") and hasattr(MediaManager, _async_name):
+        setattr(
+            Dedup_MediaManager, _async_name, getattr(MediaManager, _async_name)
+        )
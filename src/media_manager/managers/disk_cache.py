@@ -0,0 +1,398 @@
+from media_manager.base.base import (
+    DEFAULT_STREAM_CHUNK_SIZE,
+    MediaManager,
+)
+from media_manager.base.cache import CacheStats
+from media_manager.base.datastructures import FileInfo
+from media_manager.base.utils import read_chunks
+from media_manager.managers.wrapper import Wrapper_MediaManager
+from typing_extensions import TypedDict
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterable, Iterator
+from concurrent.futures import Future
+from contextlib import suppress
+from io import BytesIO
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+MB = 1024 * 1024
+# Persisted in the metadata file next to every cached file
+METADATA_FIELDS = ("key", "size", "etag", "last_modified")
+
+
+class DiskCacheStats(CacheStats):
+    revalidations: int
+
+
+class CachedFile(TypedDict):
+    key: str
+    path: str
+    size: int
+    etag: str | None
+    # Timestamp of the remote file, compared when there is no etag
+    last_modified: float | None
+    # time.monotonic() of the last download or revalidation
+    checked_at: float
+
+
+def _same_version(entry: CachedFile, info: FileInfo) -> bool:
+    if entry["etag"] is not None and info["etag"] is not None:
+        return entry["etag"] == info["etag"]
+    return (
+        entry["size"] == info["size"]
+        and entry["last_modified"] == info["last_modified"].timestamp()
+    )
+
+
+def _write_atomic(path: str, content: bytes) -> None:
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temp_path, "xb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+
+
+class DiskCache_MediaManager(Wrapper_MediaManager):
+    """
+    Read-through cache that keeps the downloaded files on the local disk,
+    the least recently used files are evicted above max_size bytes. A cached
+    file is served without asking the backend for revalidate_after seconds,
+    then its ETag (size and modification date when there is none) is checked
+    before serving it again.
+
+    Concurrent downloads of the same file, from threads or coroutines, share
+    one fetch. The index is rebuilt from cache_folder on start, the restored
+    files are revalidated on first use.
+    """
+
+    # Served one by one through the cache
+    _backend_download_many = MediaManager._backend_download_many
+    _async_backend_download_many = MediaManager._async_backend_download_many
+
+    def __init__(
+        self,
+        media_manager: MediaManager,
+        cache_folder: str,
+        max_size: int = 1024 * MB,
+        revalidate_after: float = 60,
+        max_workers: int | None = None,
+    ):
+        super().__init__(media_manager, max_workers)
+        self.cache_folder = cache_folder
+        self.max_size = max_size
+        self.revalidate_after = revalidate_after
+        # key -> cached file, least recently used first
+        self._entries: OrderedDict[str, CachedFile] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        # key -> future of the download in flight
+        self._fetches: dict[str, Future] = {}
+        # Downloads in flight of files that were written meanwhile, their
+        # content is returned but not cached
+        self._stale_fetches: set[str] = set()
+        self._async_fetches: dict[str, asyncio.Future] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._revalidations = 0
+        os.makedirs(cache_folder, exist_ok=True)
+        self._load()
+
+    @property
+    def cache_stats(self) -> DiskCacheStats:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "size": self._size,
+                "revalidations": self._revalidations,
+            }
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.cache_folder, digest)
+
+    def _load(self) -> None:
+        entries = []
+        with os.scandir(self.cache_folder) as files:
+            for file in files:
+                if file.name.endswith(".tmp"):
+                    # Left by an interrupted write
+                    with suppress(OSError):
+                        os.remove(file.path)
+                    continue
+                if not file.name.endswith(".json"):
+                    continue
+                try:
+                    with open(file.path) as f:
+                        entry = json.load(f)
+                    path = self._path(entry["key"])
+                    stat = os.stat(path)
+                except (OSError, ValueError, KeyError):
+                    continue
+                if stat.st_size != entry["size"]:
+                    continue
+                entry["path"] = path
+                entry["checked_at"] = float("-inf")
+                entries.append((stat.st_mtime, entry))
+        for _, entry in sorted(entries, key=lambda item: item[0]):
+            self._entries[entry["key"]] = entry
+            self._size += entry["size"]
+        self._remove_files(self._evict())
+
+    def _evict(self) -> list[CachedFile]:
+        # Called with the lock held, the files are removed by the caller
+        evicted = []
+        while self._size > self.max_size and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._size -= entry["size"]
+            self._evictions += 1
+            evicted.append(entry)
+        return evicted
+
+    def _remove_files(self, entries: Iterable[CachedFile]) -> None:
+        for entry in entries:
+            for path in (entry["path"], f"{entry['path']}.json"):
+                with suppress(FileNotFoundError):
+                    os.remove(path)
+
+    def _forget_files(self, keys: Iterable[str]) -> None:
+        removed = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._size -= entry["size"]
+                    removed.append(entry)
+                if key in self._fetches:
+                    self._stale_fetches.add(key)
+        self._remove_files(removed)
+
+    def _fresh_entry(self, key: str) -> CachedFile | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (
+                time.monotonic() - entry["checked_at"] > self.revalidate_after
+            ):
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _read(self, entry: CachedFile) -> bytes | None:
+        try:
+            with open(entry["path"], "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            # Removed by another process sharing the folder
+            with self._lock:
+                if self._entries.get(entry["key"]) is entry:
+                    del self._entries[entry["key"]]
+                    self._size -= entry["size"]
+            return None
+
+    def _file_info(self, key: str) -> FileInfo | None:
+        try:
+            return self.media_manager._backend_get_file_info(key)
+        except NotImplementedError:
+            return None
+        except FileNotFoundError:
+            self._forget_files([key])
+            raise
+
+    def _store(self, key: str, content: bytes, info: FileInfo | None):
+        with self._lock:
+            if key in self._stale_fetches or len(content) > self.max_size:
+                return
+        path = self._path(key)
+        entry: CachedFile = {
+            "key": key,
+            "path": path,
+            "size": len(content),
+            "etag": info["etag"] if info else None,
+            "last_modified": (
+                info["last_modified"].timestamp() if info else None
+            ),
+            "checked_at": time.monotonic(),
+        }
+        _write_atomic(path, content)
+        metadata = {field: entry[field] for field in METADATA_FIELDS}
+        _write_atomic(f"{path}.json", json.dumps(metadata).encode())
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous["size"]
+            self._entries[key] = entry
+            self._size += entry["size"]
+            evicted = self._evict()
+        self._remove_files(evicted)
+
+    def _fetch(self, key: str) -> bytes:
+        with self._lock:
+            entry = self._entries.get(key)
+        # The version is read before the content, a change in between is
+        # caught by the next revalidation
+        info = self._file_info(key)
+        if entry is not None and info is not None and _same_version(
+            entry, info
+        ):
+            content = self._read(entry)
+            if content is not None:
+                with self._lock:
+                    entry["checked_at"] = time.monotonic()
+                    self._revalidations += 1
+                return content
+        content = self.media_manager._backend_download_file(key).getvalue()
+        with self._lock:
+            self._misses += 1
+        self._store(key, content, info)
+        return content
+
+    def _get(self, key: str) -> bytes:
+        entry = self._fresh_entry(key)
+        if entry is not None:
+            content = self._read(entry)
+            if content is not None:
+                with self._lock:
+                    self._hits += 1
+                return content
+        with self._lock:
+            future = self._fetches.get(key)
+            owner = future is None
+            if owner:
+                future = self._fetches[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            content = self._fetch(key)
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(content)
+            return content
+        finally:
+            with self._lock:
+                del self._fetches[key]
+                self._stale_fetches.discard(key)
+
+    def _backend_download_file(self, file: str, *args, **kwargs) -> BytesIO:
+        if args or kwargs:
+            # Options like mmap change what is returned, the cache is skipped
+            return self.media_manager._backend_download_file(
+                file, *args, **kwargs
+            )
+        return BytesIO(self._get(file))
+
+    async def _async_backend_download_file(
+        self, file: str, *args, **kwargs
+    ) -> BytesIO:
+        if args or kwargs:
+            return await self.media_manager._async_backend_download_file(
+                file, *args, **kwargs
+            )
+        # One executor job per file however many coroutines wait for it
+        loop = asyncio.get_running_loop()
+        fetch = self._async_fetches.get(file)
+        if fetch is None or fetch.get_loop() is not loop:
+            fetch = asyncio.ensure_future(self.executor.run(self._get, file))
+            self._async_fetches[file] = fetch
+
+            def done(_):
+                if self._async_fetches.get(file) is fetch:
+                    del self._async_fetches[file]
+
+            fetch.add_done_callback(done)
+        return BytesIO(await asyncio.shield(fetch))
+
+    # Sizes and ranges are served from a fresh cached file when there is one
+    def _backend_get_file_size(self, file: str) -> int:
+        entry = self._fresh_entry(file)
+        if entry is not None:
+            return entry["size"]
+        return self.media_manager._backend_get_file_size(file)
+
+    async def _async_backend_get_file_size(self, file: str) -> int:
+        entry = self._fresh_entry(file)
+        if entry is not None:
+            return entry["size"]
+        return await self.media_manager._async_backend_get_file_size(file)
+
+    def _read_range(
+        self, entry: CachedFile, start: int, end: int | None
+    ) -> BytesIO | None:
+        size = -1 if end is None else end - start + 1
+        try:
+            with open(entry["path"], "rb") as f:
+                f.seek(start)
+                return BytesIO(f.read(size))
+        except FileNotFoundError:
+            return None
+
+    def _backend_download_range(
+        self, file: str, start: int, end: int | None = None
+    ) -> BytesIO:
+        entry = self._fresh_entry(file)
+        if entry is not None:
+            response = self._read_range(entry, start, end)
+            if response is not None:
+                return response
+        return self.media_manager._backend_download_range(file, start, end)
+
+    async def _async_backend_download_range(
+        self, file: str, start: int, end: int | None = None
+    ) -> BytesIO:
+        entry = self._fresh_entry(file)
+        if entry is not None:
+            response = await self.executor.run(
+                self._read_range, entry, start, end
+            )
+            if response is not None:
+                return response
+        return await self.media_manager._async_backend_download_range(
+            file, start, end
+        )
+
+    def _backend_stream_file(
+        self,
+        file: str,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+        start: int = 0,
+        end: int | None = None,
+    ) -> Iterator[bytes]:
+        entry = self._fresh_entry(file)
+        if entry is not None and os.path.exists(entry["path"]):
+            yield from read_chunks(entry["path"], chunk_size, start, end)
+        else:
+            yield from self.media_manager._backend_stream_file(
+                file, chunk_size, start, end
+            )
+
+    async def _async_backend_stream_file(
+        self,
+        file: str,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+        start: int = 0,
+        end: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        entry = self._fresh_entry(file)
+        if entry is not None and os.path.exists(entry["path"]):
+            chunks = self._iterate_in_executor(
+                read_chunks(entry["path"], chunk_size, start, end)
+            )
+        else:
+            chunks = self.media_manager._async_backend_stream_file(
+                file, chunk_size, start, end
+            )
+        async for chunk in chunks:
+            yield chunk
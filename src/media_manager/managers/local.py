@@ -1,24 +1,265 @@
-from media_manager.base.base import MediaManager
-from media_manager.base.datastructures import MUploadFile
+from media_manager.base.base import (
+    DEFAULT_STREAM_CHUNK_SIZE,
+    DeletedFile,
+    MediaManager,
+)
+from media_manager.base.datastructures import FileInfo, MUploadFile
+from media_manager.base.utils import (
+    COPY_CHUNK_SIZE,
+    HashingReader,
+    batched,
+    copy_fileobj,
+    iter_in_threads,
+    map_in_threads,
+    read_chunks,
+)
+from media_manager.base.checksums import (
+    ALGORITHMS,
+    Checksums,
+    Hasher,
+    validate_algorithms,
+    verify_checksums,
+)
+from media_manager.managers.local_index import (
+    LocalIndex,
+    ReconcileReport,
+    prefix_range,
+)
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import suppress
+from datetime import datetime, timezone
 from io import BytesIO
+from typing import BinaryIO
+import errno
+import hashlib
+import mmap
 import os
+import re
+import uuid
+
+
+def _mmap_file(path: str) -> memoryview:
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can not be mapped
+            return memoryview(b"")
+    # The map outlives the file descriptor and is unmapped when the
+    # memoryview and its slices are released
+    return memoryview(mapped)
+
+
+# Temporary files of the uploads in progress, .{name}.{uuid}.tmp
+_UPLOAD_TEMP_FILE = re.compile(r"^\..+\.[0-9a-f]{32}\.tmp$")
+# Extended attributes with the checksums of the uploads
+_CHECKSUM_XATTR = "user.media_manager."
+
+
+def _sorted_entries(folder: str) -> list[os.DirEntry]:
+    try:
+        with os.scandir(folder) as entries:
+            entries = list(entries)
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    # Sorting the folders as "name/" keeps the walk in S3 key order
+    return sorted(
+        entries,
+        key=lambda entry: (
+            f"{entry.name}/"
+            if entry.is_dir(follow_symlinks=False)
+            else entry.name
+        ),
+    )
+
+
+def _file_info(entry: os.DirEntry, key: str) -> FileInfo:
+    # The type comes from the directory listing, only the size and the
+    # modification date need a stat, done once and cached by the DirEntry
+    stat = entry.stat()
+    return {
+        "key": key,
+        "size": stat.st_size,
+        "etag": None,
+        "last_modified": datetime.fromtimestamp(
+            stat.st_mtime, tz=timezone.utc
+        ),
+    }
+
+
+def _walk(folder: str, relative: str) -> Iterator[FileInfo]:
+    for entry in _sorted_entries(folder):
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk(entry.path, f"{relative}{entry.name}/")
+        elif entry.is_file() and not _UPLOAD_TEMP_FILE.match(entry.name):
+            yield _file_info(entry, f"{relative}{entry.name}")
+
+
+def _walk_shards(prefix: str) -> tuple[list[FileInfo], list[str]]:
+    """
+    Returns the files of the prefix folder that are not in a subfolder and
+    the subfolders, relative to the prefix. A single subfolder is walked
+    one level deeper so there is something to split.
+    """
+    files: list[FileInfo] = []
+    shards = [""]
+    while len(shards) == 1:
+        shard, shards = shards[0], []
+        for entry in _sorted_entries(os.path.join(prefix, shard)):
+            key = f"{shard}{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                shards.append(f"{key}/")
+            elif entry.is_file() and not _UPLOAD_TEMP_FILE.match(entry.name):
+                files.append(_file_info(entry, key))
+    return files, [shard.rstrip("/") for shard in shards]
+
+
+def _temp_path(complete_path: str) -> str:
+    # Hidden file in the folder of complete_path, which is created
+    folder = os.path.dirname(complete_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    return os.path.join(
+        folder, f".{os.path.basename(complete_path)}.{uuid.uuid4().hex}.tmp"
+    )
+
+
+def _remove_empty_folders(prefix: str) -> None:
+    # Folders are implicit like in S3, the ones left empty by a delete go
+    for folder, _, _ in os.walk(prefix, topdown=False):
+        if folder != prefix:
+            with suppress(OSError):
+                os.rmdir(folder)
+
+
+def _timestamp(mtime: float) -> float:
+    # Rounded like the datetimes of the listings so both compare equal
+    return datetime.fromtimestamp(mtime, tz=timezone.utc).timestamp()
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(COPY_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _store_checksums(fd: int, checksums: Checksums) -> None:
+    # Kept in extended attributes, they follow the file through the rename
+    if not hasattr(os, "setxattr"):
+        return
+    for algorithm, value in checksums.items():
+        try:
+            os.setxattr(fd, f"{_CHECKSUM_XATTR}{algorithm}", value.encode())
+        except OSError:
+            # The filesystem does not support user extended attributes
+            return
+
+
+def stored_checksums(
+    path: str, algorithms: Iterable[str] = ALGORITHMS
+) -> Checksums:
+    """
+    Checksums stored with the file by the uploads of Local_MediaManager.
+    """
+    checksums: Checksums = {}
+    if not hasattr(os, "getxattr"):
+        return checksums
+    for algorithm in algorithms:
+        try:
+            value = os.getxattr(path, f"{_CHECKSUM_XATTR}{algorithm}")
+        except OSError:
+            continue
+        checksums[algorithm] = value.decode()
+    return checksums
+
+
+def _fsync_folder(folder: str) -> None:
+    # Persists the rename of the uploaded file, not supported on Windows
+    if os.name == "nt":
+        return
+    fd = os.open(folder or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
 
 class Local_MediaManager(MediaManager):
+    backend_upload_kwargs = ("fsync",)
+
+    def __init__(
+        self,
+        *args,
+        fsync: bool = False,
+        index_path: str | None = None,
+        checksums: Iterable[str] = (),
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.checksums = validate_algorithms(checksums)
+        # Flush uploads to the disk before they are visible
+        self.fsync = fsync
+        # With an index the listings, existence checks and folder sizes are
+        # queries, the files written behind the manager are only seen after
+        # reconcile_index
+        self.index = None if index_path is None else LocalIndex(index_path)
+
+    def close(self) -> None:
+        super().close()
+        if self.index is not None:
+            self.index.close()
+
     # Backend specific Methods
     def _backend_upload(
         self,
         file: MUploadFile,
         complete_path: str,
         *args,
+        fsync: bool | None = None,
         **kwargs,
     ):
-        if not os.path.exists(os.path.dirname(complete_path)):
-            os.makedirs(os.path.dirname(complete_path))
-        with open(complete_path, "wb") as f:
-            f.write(file.file.read())
+        if fsync is None:
+            fsync = self.fsync
+        folder = os.path.dirname(complete_path)
+        # The upload is written to a temporary file in the same folder and
+        # renamed when complete, readers never see a partial file
+        temp_path = _temp_path(complete_path)
+        # The index keeps the sha256 of every file
+        hasher = Hasher(
+            self.checksums + (("sha256",) if self.index is not None else ())
+        )
+        source = HashingReader(file.file, hasher) if hasher else file.file
+        try:
+            with open(temp_path, "xb") as f:
+                copy_fileobj(source, f)
+                f.flush()
+                checksums = hasher.checksums()
+                _store_checksums(f.fileno(), checksums)
+                if fsync:
+                    os.fsync(f.fileno())
+                stat = os.fstat(f.fileno())
+            os.replace(temp_path, complete_path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.remove(temp_path)
+            raise
+        if fsync:
+            _fsync_folder(folder)
+        if self.index is not None:
+            self.index.add(
+                complete_path,
+                stat.st_size,
+                _timestamp(stat.st_mtime),
+                checksums["sha256"],
+            )
+        if hasher:
+            file.checksums = checksums
 
     def _backend_delete(self, complete_path: str) -> str:
+        if self.index is not None:
+            self.index.remove([complete_path])
         # Verify if the file exists
         if not os.path.exists(complete_path):
             raise FileNotFoundError(f"File {complete_path} not found")
@@ -28,20 +269,292 @@ class Local_MediaManager(MediaManager):
     def _backend_get_file_location(self, complete_path: str) -> str:
         return complete_path
 
-    def _backend_delete_files_in_folder(self, prefix: str) -> list[str]:
-        files = self._backend_list_files_in_folder(prefix)
-        files_to_delete = [{"Key": file} for file in files]
-        for file in files:
-            os.remove(os.path.join(prefix, file))
-        return files_to_delete
+    def _delete_batch(self, keys: list[str]) -> list[DeletedFile]:
+        deleted_files: list[DeletedFile] = []
+        # Deleted or already missing
+        gone = []
+        for key in keys:
+            try:
+                os.remove(key)
+            except FileNotFoundError as e:
+                gone.append(key)
+                deleted_files.append({"key": key, "error": str(e)})
+            except OSError as e:
+                deleted_files.append({"key": key, "error": str(e)})
+            else:
+                gone.append(key)
+                deleted_files.append({"key": key})
+        if self.index is not None:
+            self.index.remove(gone)
+        return deleted_files
+
+    def _backend_delete_files(
+        self, keys: Iterable[str], max_concurrency: int = 8
+    ) -> list[DeletedFile]:
+        # Batched so each thread handoff removes several files, this pays
+        # off on network filesystems where every unlink is a round trip
+        deleted_files = []
+        for report in map_in_threads(
+            self._delete_batch, batched(keys, 100), max_concurrency
+        ):
+            deleted_files.extend(report)
+        return deleted_files
+
+    def _backend_delete_files_in_folder(
+        self, prefix: str, max_concurrency: int = 8
+    ) -> list[DeletedFile]:
+        keys = (
+            self._backend_listing_path(prefix, file["key"])
+            for file in self._backend_iter_files_in_folder(prefix)
+        )
+        deleted_files = self._backend_delete_files(keys, max_concurrency)
+        _remove_empty_folders(prefix)
+        return deleted_files
+
+    def _index_file(self, path: str, hash: str | None) -> None:
+        if self.index is not None:
+            stat = os.stat(path)
+            self.index.add(
+                path, stat.st_size, _timestamp(stat.st_mtime), hash
+            )
+
+    def _backend_copy_file(
+        self, source: str, destination: str, link: bool = False
+    ) -> str:
+        """
+        The data is copied by the kernel (copy_file_range, which clones the
+        file on filesystems with copy on write). With link the destination
+        is a hard link to the source and nothing is copied, safe with the
+        files written by the manager as uploads replace a file instead of
+        writing into it.
+        """
+        indexed = None if self.index is None else self.index.get(source)
+        temp_path = _temp_path(destination)
+        try:
+            if link:
+                os.link(source, temp_path)
+            else:
+                with open(source, "rb") as f, open(temp_path, "xb") as copy:
+                    copy_fileobj(f, copy)
+                    _store_checksums(copy.fileno(), stored_checksums(source))
+                    if self.fsync:
+                        copy.flush()
+                        os.fsync(copy.fileno())
+            os.replace(temp_path, destination)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.remove(temp_path)
+            raise
+        self._index_file(destination, indexed and indexed["hash"])
+        return destination
+
+    def _backend_move_file(self, source: str, destination: str) -> str:
+        indexed = None if self.index is None else self.index.get(source)
+        folder = os.path.dirname(destination)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        try:
+            os.replace(source, destination)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Another filesystem, copied and removed
+            self._backend_copy_file(source, destination)
+            os.remove(source)
+        if self.index is not None:
+            self.index.remove([source])
+            self._index_file(destination, indexed and indexed["hash"])
+        return destination
+
+    def _backend_listing_path(self, prefix: str, key: str) -> str:
+        return os.path.join(prefix, key)
 
     def _backend_list_files_in_folder(self, prefix: str) -> list[str]:
-        files = os.listdir(prefix)
-        return files
+        return [
+            file["key"] for file in self._backend_iter_files_in_folder(prefix)
+        ]
+
+    def _backend_iter_files_in_folder(
+        self,
+        prefix: str,
+        sharded: bool = False,
+        max_concurrency: int = 8,
+        **kwargs,
+    ) -> Iterator[FileInfo]:
+        """
+        Yields the files below the prefix folder and all its subfolders like
+        an S3 prefix listing, the keys are relative to the prefix and use /
+        as separator. The files are yielded in key order, with sharded the
+        subfolders are walked in threads and the order is lost. A missing
+        folder has no files.
+        """
+        if self.index is not None:
+            yield from self._iter_indexed_files(prefix)
+            return
+        if not sharded:
+            yield from _walk(prefix, "")
+            return
+        files, shards = _walk_shards(prefix)
+        yield from files
+
+        def walk_shard(shard: str) -> Callable[[], Iterator[FileInfo]]:
+            return lambda: _walk(os.path.join(prefix, shard), f"{shard}/")
+
+        yield from iter_in_threads(
+            (walk_shard(shard) for shard in shards), max_concurrency
+        )
 
-    def _backend_download_file(self, file) -> BytesIO:
-        read_file = BytesIO()
+    def _backend_download_file(
+        self, file: str, mmap: bool = False
+    ) -> BytesIO | memoryview:
+        """
+        With mmap the file is not read, the returned read-only memoryview
+        maps it and the pages are loaded by the kernel as they are accessed.
+        Otherwise the content is checked against the checksums stored with
+        the file, ChecksumError is raised when it does not match.
+        """
+        if mmap:
+            return _mmap_file(file)
         with open(file, "rb") as f:
-            read_file = BytesIO(f.read())
-            read_file.seek(0)
+            content = f.read()
+        expected = stored_checksums(file, self.checksums)
+        if expected:
+            hasher = Hasher(expected)
+            hasher.update(content)
+            verify_checksums(file, expected, hasher.checksums())
+        # BytesIO shares the buffer of the bytes until it is written
+        return BytesIO(content)
+
+    def _backend_open_file(self, file: str) -> BinaryIO:
+        return open(file, "rb", buffering=0)
+
+    def _backend_download_range(
+        self, file: str, start: int, end: int | None = None
+    ) -> BytesIO:
+        size = -1 if end is None else end - start + 1
+        with open(file, "rb") as f:
+            f.seek(start)
+            read_file = BytesIO(f.read(size))
         return read_file
+
+    def _backend_get_file_size(self, file: str) -> int:
+        return os.path.getsize(file)
+
+    def _backend_file_exists(self, file: str) -> bool:
+        if self.index is not None:
+            return self.index.get(file) is not None
+        return os.path.isfile(file)
+
+    def _backend_get_folder_size(self, prefix: str) -> int:
+        if self.index is not None:
+            return self.index.total_size(prefix)
+        return super()._backend_get_folder_size(prefix)
+
+    def _iter_indexed_files(self, prefix: str) -> Iterator[FileInfo]:
+        start, _ = prefix_range(prefix)
+        for file in self.index.iter_files(prefix):
+            yield {
+                "key": file["path"][len(start) :].replace(os.sep, "/"),
+                "size": file["size"],
+                "etag": file["hash"],
+                "last_modified": datetime.fromtimestamp(
+                    file["mtime"], tz=timezone.utc
+                ),
+            }
+
+    def reconcile_index(
+        self, prefix: str, rebuild: bool = False, hash_files: bool = False
+    ) -> ReconcileReport:
+        """
+        Brings the index of the prefix folder in line with the files on
+        disk, the walk and the index are both in key order and merged so
+        the memory used does not grow with the number of files. With
+        hash_files the files added or changed are read to hash them.
+        """
+        if self.index is None:
+            raise ValueError("The manager has no index")
+        if rebuild:
+            self.index.clear(prefix)
+        report: ReconcileReport = {"added": 0, "updated": 0, "removed": 0}
+        start, _ = prefix_range(prefix)
+        added: list[tuple[str, int, float, str | None]] = []
+        removed: list[str] = []
+
+        def index_file(file: FileInfo) -> None:
+            path = os.path.join(prefix, file["key"])
+            hash = _hash_file(path) if hash_files else None
+            added.append(
+                (path, file["size"], file["last_modified"].timestamp(), hash)
+            )
+            if len(added) >= 1000:
+                flush()
+
+        def flush() -> None:
+            self.index.add_many(added)
+            self.index.remove(removed)
+            added.clear()
+            removed.clear()
+
+        on_disk = _walk(prefix, "")
+        indexed = self.index.iter_files(prefix)
+        disk_file = next(on_disk, None)
+        indexed_file = next(indexed, None)
+        while disk_file is not None or indexed_file is not None:
+            indexed_key = (
+                None
+                if indexed_file is None
+                else indexed_file["path"][len(start) :].replace(os.sep, "/")
+            )
+            if indexed_key is None or (
+                disk_file is not None and disk_file["key"] < indexed_key
+            ):
+                index_file(disk_file)
+                report["added"] += 1
+                disk_file = next(on_disk, None)
+            elif disk_file is None or indexed_key < disk_file["key"]:
+                removed.append(indexed_file["path"])
+                report["removed"] += 1
+                indexed_file = next(indexed, None)
+            else:
+                if (
+                    disk_file["size"] != indexed_file["size"]
+                    or disk_file["last_modified"].timestamp()
+                    != indexed_file["mtime"]
+                ):
+                    index_file(disk_file)
+                    report["updated"] += 1
+                disk_file = next(on_disk, None)
+                indexed_file = next(indexed, None)
+        flush()
+        return report
+
+    def _backend_get_file_info(self, file: str) -> FileInfo:
+        if self.index is not None:
+            indexed_file = self.index.get(file)
+            if indexed_file is not None:
+                return {
+                    "key": file,
+                    "size": indexed_file["size"],
+                    "etag": indexed_file["hash"],
+                    "last_modified": datetime.fromtimestamp(
+                        indexed_file["mtime"], tz=timezone.utc
+                    ),
+                }
+        stat = os.stat(file)
+        return {
+            "key": file,
+            "size": stat.st_size,
+            "etag": None,
+            "last_modified": datetime.fromtimestamp(
+                stat.st_mtime, tz=timezone.utc
+            ),
+        }
+
+    def _backend_stream_file(
+        self,
+        file: str,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+        start: int = 0,
+        end: int | None = None,
+    ) -> Iterator[bytes]:
+        yield from read_chunks(file, chunk_size, start, end)
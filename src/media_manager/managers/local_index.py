@@ -0,0 +1,212 @@
+"""
+SQLite index of the files of a Local_MediaManager. Rebuild or reconcile it
+with the files on disk with:
+
+    python -m media_manager.managers.local_index INDEX FOLDER [--rebuild]
+"""
+
+from typing_extensions import TypedDict
+from collections.abc import Iterable, Iterator
+import argparse
+import os
+import sqlite3
+import threading
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    hash TEXT
+) WITHOUT ROWID
+"""
+
+
+class IndexedFile(TypedDict):
+    path: str
+    size: int
+    mtime: float
+    # sha256 of the content, None until it is known
+    hash: str | None
+
+
+class ReconcileReport(TypedDict):
+    added: int
+    updated: int
+    removed: int
+
+
+def normalize_path(path: str) -> str:
+    return os.path.abspath(path)
+
+
+def prefix_range(prefix: str) -> tuple[str, str]:
+    # Every path below the folder sorts between "folder/" and "folder0"
+    start = normalize_path(prefix).rstrip(os.sep) + os.sep
+    return start, start[:-1] + chr(ord(os.sep) + 1)
+
+
+def _indexed_file(row: tuple) -> IndexedFile:
+    path, size, mtime, hash = row
+    return {"path": path, "size": size, "mtime": mtime, "hash": hash}
+
+
+class LocalIndex:
+    """
+    Path, size, modification time and content hash of the files, the paths
+    are stored absolute so any spelling of a path finds the same row. Every
+    thread (and process) uses its own connection, the database runs in WAL
+    mode so the readers do not block the writer.
+    """
+
+    def __init__(self, database: str):
+        self.database = database
+        self._local = threading.local()
+        # Every connection of every thread, for close
+        self._connections: list[sqlite3.Connection] = []
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        with self._connection() as connection:
+            connection.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Used by the thread that opened it only, close may run elsewhere
+        connection = sqlite3.connect(
+            self.database, timeout=30, check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _connection(self) -> sqlite3.Connection:
+        pid = os.getpid()
+        if getattr(self._local, "pid", None) != pid:
+            # Connections are not shared with forked children
+            connection = self._connect()
+            with self._lock:
+                if self._pid != pid:
+                    # The connections listed are the parent's
+                    self._connections, self._pid = [], pid
+                self._connections.append(connection)
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    def close(self) -> None:
+        """
+        Closes the connections opened by every thread, like the ones of the
+        executor where the async calls run.
+        """
+        with self._lock:
+            connections = self._connections if self._pid == os.getpid() else []
+            self._connections = []
+            self._local = threading.local()
+        for connection in connections:
+            connection.close()
+
+    def add(
+        self, path: str, size: int, mtime: float, hash: str | None = None
+    ) -> None:
+        self.add_many([(path, size, mtime, hash)])
+
+    def add_many(
+        self, files: Iterable[tuple[str, int, float, str | None]]
+    ) -> None:
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                (
+                    (normalize_path(path), size, mtime, hash)
+                    for path, size, mtime, hash in files
+                ),
+            )
+
+    def remove(self, paths: Iterable[str]) -> None:
+        with self._connection() as connection:
+            connection.executemany(
+                "DELETE FROM files WHERE path = ?",
+                ((normalize_path(path),) for path in paths),
+            )
+
+    def get(self, path: str) -> IndexedFile | None:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT * FROM files WHERE path = ?", (normalize_path(path),)
+            )
+            .fetchone()
+        )
+        return None if row is None else _indexed_file(row)
+
+    def iter_files(
+        self, prefix: str, batch_size: int = 1000
+    ) -> Iterator[IndexedFile]:
+        """
+        Yields the files below the prefix folder ordered by path, it is a
+        range scan of the primary key.
+        """
+        # A dedicated connection, the cursor stays open between the batches
+        connection = self._connect()
+        try:
+            cursor = connection.execute(
+                "SELECT * FROM files WHERE path >= ? AND path < ?"
+                " ORDER BY path",
+                prefix_range(prefix),
+            )
+            while rows := cursor.fetchmany(batch_size):
+                for row in rows:
+                    yield _indexed_file(row)
+        finally:
+            connection.close()
+
+    def total_size(self, prefix: str) -> int:
+        (size,) = (
+            self._connection()
+            .execute(
+                "SELECT COALESCE(SUM(size), 0) FROM files"
+                " WHERE path >= ? AND path < ?",
+                prefix_range(prefix),
+            )
+            .fetchone()
+        )
+        return size
+
+    def clear(self, prefix: str) -> None:
+        with self._connection() as connection:
+            connection.execute(
+                "DELETE FROM files WHERE path >= ? AND path < ?",
+                prefix_range(prefix),
+            )
+
+
+def main(argv: list[str] | None = None) -> None:
+    from media_manager.managers.local import Local_MediaManager
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("index", help="SQLite database of the index")
+    parser.add_argument("folder", help="Folder reconciled with the index")
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Drop the indexed files of the folder before reconciling",
+    )
+    parser.add_argument(
+        "--hash",
+        action="store_true",
+        help="Hash the files added or changed, it reads them",
+    )
+    args = parser.parse_args(argv)
+    media_manager = Local_MediaManager(
+        add_environment_as_prefix=False, index_path=args.index
+    )
+    report = media_manager.reconcile_index(
+        args.folder, rebuild=args.rebuild, hash_files=args.hash
+    )
+    print(
+        f"added={report['added']} updated={report['updated']}"
+        f" removed={report['removed']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+from media_manager.base.base import MediaManager
+from media_manager.base.cache import CacheStats, TTLCache
+from media_manager.managers.wrapper import Wrapper_MediaManager
+from collections.abc import Hashable, Iterable
+from io import BytesIO
+import threading
+
+KB = 1024
+MB = 1024 * KB
+
+
+def _listing_key(prefix: str, args: tuple, kwargs: dict) -> Hashable | None:
+    key = (prefix, args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        # Listings with unhashable arguments are not cached
+        return None
+    return key
+
+
+class MemoryCache_MediaManager(Wrapper_MediaManager):
+    """
+    Keeps the small files (up to max_file_size bytes) and the results of
+    list_files_in_folder in memory. The files are bounded by max_bytes and
+    the listings by max_listings, both expire after their ttl. The writes
+    made through the manager invalidate the cached files and the listings
+    of the folders that contain them.
+    """
+
+    # Served one by one through the cache
+    _backend_download_many = MediaManager._backend_download_many
+    _async_backend_download_many = MediaManager._async_backend_download_many
+
+    def __init__(
+        self,
+        media_manager: MediaManager,
+        max_bytes: int = 64 * MB,
+        max_file_size: int = 64 * KB,
+        ttl: float | None = 300,
+        max_listings: int = 1024,
+        listing_ttl: float | None = 10,
+        max_workers: int | None = None,
+    ):
+        super().__init__(media_manager, max_workers)
+        self.max_file_size = max_file_size
+        self.files = TTLCache(max_entries=None, ttl=ttl, max_bytes=max_bytes)
+        self.listings = TTLCache(max_entries=max_listings, ttl=listing_ttl)
+        # Bumped on every write, a read that started before a write does not
+        # cache what it read
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cache_stats(self) -> dict[str, CacheStats]:
+        return {"files": self.files.stats, "listings": self.listings.stats}
+
+    def _forget_files(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        with self._lock:
+            self._generation += 1
+        for key in keys:
+            self.files.pop(key)
+        if keys:
+            self.listings.pop_matching(
+                lambda listing: any(key.startswith(listing[0]) for key in keys)
+            )
+
+    def _cache_file(self, file: str, response: BytesIO, generation: int):
+        size = response.getbuffer().nbytes
+        if size > self.max_file_size or generation != self._generation:
+            return
+        self.files.set(file, response.getvalue(), size=size)
+
+    def _backend_download_file(self, file: str, *args, **kwargs) -> BytesIO:
+        if args or kwargs:
+            # Options like mmap change what is returned, the cache is skipped
+            return self.media_manager._backend_download_file(
+                file, *args, **kwargs
+            )
+        content = self.files.get(file)
+        if content is not None:
+            return BytesIO(content)
+        generation = self._generation
+        response = self.media_manager._backend_download_file(file)
+        self._cache_file(file, response, generation)
+        return response
+
+    async def _async_backend_download_file(
+        self, file: str, *args, **kwargs
+    ) -> BytesIO:
+        if args or kwargs:
+            return await self.media_manager._async_backend_download_file(
+                file, *args, **kwargs
+            )
+        content = self.files.get(file)
+        if content is not None:
+            return BytesIO(content)
+        generation = self._generation
+        response = await self.media_manager._async_backend_download_file(file)
+        self._cache_file(file, response, generation)
+        return response
+
+    def _cache_listing(
+        self, key: Hashable | None, files: list, generation: int
+    ):
+        if key is not None and generation == self._generation:
+            # Rough size of the names, listings are bounded by their count
+            size = sum(len(str(file)) for file in files)
+            self.listings.set(key, tuple(files), size=size)
+
+    def _backend_list_files_in_folder(
+        self, prefix: str, *args, **kwargs
+    ) -> list[str]:
+        key = _listing_key(prefix, args, kwargs)
+        files = None if key is None else self.listings.get(key)
+        if files is not None:
+            return list(files)
+        generation = self._generation
+        files = self.media_manager._backend_list_files_in_folder(
+            prefix, *args, **kwargs
+        )
+        self._cache_listing(key, files, generation)
+        return files
+
+    async def _async_backend_list_files_in_folder(
+        self, prefix: str, *args, **kwargs
+    ) -> list[str]:
+        key = _listing_key(prefix, args, kwargs)
+        files = None if key is None else self.listings.get(key)
+        if files is not None:
+            return list(files)
+        generation = self._generation
+        files = await self.media_manager._async_backend_list_files_in_folder(
+            prefix, *args, **kwargs
+        )
+        self._cache_listing(key, files, generation)
+        return files
@@ -0,0 +1,249 @@
+from media_manager.base.base import (
+    CopiedFile,
+    DeletedFile,
+    MediaManager,
+    UploadResult,
+)
+from media_manager.base.datastructures import MUploadFile
+from media_manager.base.executor import BackendExecutor
+from collections.abc import AsyncIterator, Iterable, Iterator
+
+
+def _forward_attribute(name: str) -> property:
+    return property(
+        lambda self: getattr(self.media_manager, name),
+        lambda self, value: setattr(self.media_manager, name, value),
+    )
+
+
+def _delegate(name: str):
+    def method(self, *args, **kwargs):
+        return getattr(self.media_manager, name)(*args, **kwargs)
+
+    method.__name__ = name
+    method.__qualname__ = f"Wrapper_MediaManager.{name}"
+    return method
+
+
+class Wrapper_MediaManager(MediaManager):
+    """
+    Manager in front of another manager. Every backend method, sync and
+    async, is forwarded to the wrapped manager, subclasses override the ones
+    they change. The upload settings (upload_path, root_folder...) are the
+    ones of the wrapped manager so both compute the same paths.
+
+    The writes made through the wrapper call _forget_files with the keys
+    they changed, wrappers that keep state about the files override it.
+    """
+
+    upload_path = _forward_attribute("upload_path")
+    root_folder = _forward_attribute("root_folder")
+    add_environment_as_prefix = _forward_attribute("add_environment_as_prefix")
+    environment = _forward_attribute("environment")
+    checksums = _forward_attribute("checksums")
+
+    def __init__(
+        self, media_manager: MediaManager, max_workers: int | None = None
+    ):
+        # MediaManager.__init__ is not called, it would overwrite the upload
+        # settings of the wrapped manager
+        self.media_manager = media_manager
+        # Runs the blocking work of the wrapper itself
+        self.executor = BackendExecutor(max_workers=max_workers)
+
+    @property
+    def backend_upload_kwargs(self) -> tuple[str, ...]:
+        return self.media_manager.backend_upload_kwargs
+
+    def close(self) -> None:
+        super().close()
+        self.media_manager.close()
+
+    async def aclose(self) -> None:
+        super().close()
+        await self.media_manager.aclose()
+
+    def warm(self) -> None:
+        self.media_manager.warm()
+
+    def _forget_files(self, keys: Iterable[str]) -> None:
+        pass
+
+    def _forget_deleted_files(
+        self, deleted_files: list[DeletedFile]
+    ) -> list[DeletedFile]:
+        self._forget_files(file["key"] for file in deleted_files)
+        return deleted_files
+
+    # Writes
+    def _backend_upload(
+        self, file: MUploadFile, complete_path: str, *args, **kwargs
+    ):
+        try:
+            return self.media_manager._backend_upload(
+                file, complete_path, *args, **kwargs
+            )
+        finally:
+            self._forget_files([complete_path])
+
+    def _backend_delete(self, complete_path: str, *args, **kwargs):
+        try:
+            return self.media_manager._backend_delete(
+                complete_path, *args, **kwargs
+            )
+        finally:
+            self._forget_files([complete_path])
+
+    def _backend_delete_files(
+        self, keys: Iterable[str], *args, **kwargs
+    ) -> list[DeletedFile]:
+        return self._forget_deleted_files(
+            self.media_manager._backend_delete_files(keys, *args, **kwargs)
+        )
+
+    def _backend_delete_files_in_folder(
+        self, prefix: str, *args, **kwargs
+    ) -> list[DeletedFile]:
+        return self._forget_deleted_files(
+            self.media_manager._backend_delete_files_in_folder(
+                prefix, *args, **kwargs
+            )
+        )
+
+    def _backend_upload_many(
+        self,
+        uploads: Iterable[tuple[MUploadFile, str]],
+        max_concurrency: int,
+        *args,
+        **kwargs,
+    ) -> Iterator[UploadResult]:
+        results = self.media_manager._backend_upload_many(
+            uploads, max_concurrency, *args, **kwargs
+        )
+        try:
+            for complete_path, error in results:
+                self._forget_files([complete_path])
+                yield complete_path, error
+        finally:
+            results.close()
+
+    def _backend_copy_file(
+        self, source: str, destination: str, *args, **kwargs
+    ) -> str:
+        try:
+            return self.media_manager._backend_copy_file(
+                source, destination, *args, **kwargs
+            )
+        finally:
+            self._forget_files([destination])
+
+    def _backend_move_file(
+        self, source: str, destination: str, *args, **kwargs
+    ) -> str:
+        try:
+            return self.media_manager._backend_move_file(
+                source, destination, *args, **kwargs
+            )
+        finally:
+            self._forget_files([source, destination])
+
+    def _backend_copy_folder(
+        self, prefix: str, destination: str, *args, **kwargs
+    ) -> list[CopiedFile]:
+        copied_files = self.media_manager._backend_copy_folder(
+            prefix, destination, *args, **kwargs
+        )
+        self._forget_files(file["destination"] for file in copied_files)
+        return copied_files
+
+    async def _async_backend_upload(
+        self, file: MUploadFile, complete_path: str, *args, **kwargs
+    ):
+        try:
+            return await self.media_manager._async_backend_upload(
+                file, complete_path, *args, **kwargs
+            )
+        finally:
+            self._forget_files([complete_path])
+
+    async def _async_backend_delete(
+        self, complete_path: str, *args, **kwargs
+    ):
+        try:
+            return await self.media_manager._async_backend_delete(
+                complete_path, *args, **kwargs
+            )
+        finally:
+            self._forget_files([complete_path])
+
+    async def _async_backend_delete_files(
+        self, keys: Iterable[str], *args, **kwargs
+    ) -> list[DeletedFile]:
+        return self._forget_deleted_files(
+            await self.media_manager._async_backend_delete_files(
+                keys, *args, **kwargs
+            )
+        )
+
+    async def _async_backend_delete_files_in_folder(
+        self, prefix: str, *args, **kwargs
+    ) -> list[DeletedFile]:
+        return self._forget_deleted_files(
+            await self.media_manager._async_backend_delete_files_in_folder(
+                prefix, *args, **kwargs
+            )
+        )
+
+    async def _async_backend_upload_many(
+        self,
+        uploads: Iterable[tuple[MUploadFile, str]],
+        max_concurrency: int,
+        *args,
+        **kwargs,
+    ) -> AsyncIterator[UploadResult]:
+        results = self.media_manager._async_backend_upload_many(
+            uploads, max_concurrency, *args, **kwargs
+        )
+        try:
+            async for complete_path, error in results:
+                self._forget_files([complete_path])
+                yield complete_path, error
+        finally:
+            await results.aclose()
+
+    async def _async_backend_copy_file(
+        self, source: str, destination: str, *args, **kwargs
+    ) -> str:
+        try:
+            return await self.media_manager._async_backend_copy_file(
+                source, destination, *args, **kwargs
+            )
+        finally:
+            self._forget_files([destination])
+
+    async def _async_backend_move_file(
+        self, source: str, destination: str, *args, **kwargs
+    ) -> str:
+        try:
+            return await self.media_manager._async_backend_move_file(
+                source, destination, *args, **kwargs
+            )
+        finally:
+            self._forget_files([source, destination])
+
+    async def _async_backend_copy_folder(
+        self, prefix: str, destination: str, *args, **kwargs
+    ) -> list[CopiedFile]:
+        copied_files = await self.media_manager._async_backend_copy_folder(
+            prefix, destination, *args, **kwargs
+        )
+        self._forget_files(file["destination"] for file in copied_files)
+        return copied_files
+
+
+# The other backend methods are forwarded as they are
+for _name in list(vars(MediaManager)):
+    if _name.startswith(("_backend_", "_async_backend_")) and (
+        _name not in vars(Wrapper_MediaManager)
+    ):
+        setattr(Wrapper_MediaManager, _name, _delegate(_name))
@@ -0,0 +1,298 @@
+from media_manager.base.base import (
+    DEFAULT_STREAM_CHUNK_SIZE,
+    MediaManager,
+    TransferError,
+    folder_prefix,
+)
+from media_manager.base.datastructures import FileInfo, MUploadFile
+from media_manager.base.utils import ChunkReader, map_in_threads
+from typing_extensions import Literal, TypedDict
+from collections.abc import Callable, Iterator
+from contextlib import suppress
+from datetime import timedelta
+from functools import partial
+import json
+import os
+import time
+
+DELETE_BATCH_SIZE = 1000
+# Results between two saves of the checkpoint
+CHECKPOINT_EVERY = 1000
+# S3 keeps whole seconds, a copy can look older than its source by less
+MTIME_WINDOW = timedelta(seconds=1)
+
+
+class SyncAction(TypedDict):
+    # Relative to the prefixes
+    key: str
+    action: Literal["transfer", "delete", "unchanged"]
+    size: int
+
+
+class SyncReport(TypedDict):
+    transferred: int
+    deleted: int
+    unchanged: int
+    bytes_transferred: int
+    errors: list[TransferError]
+    seconds: float
+    dry_run: bool
+
+
+# (transferred, deleted, bytes transferred, errors) of a task
+_TaskResult = tuple[int, int, int, list[TransferError]]
+
+
+def _join(prefix: str, key: str) -> str:
+    return f"{prefix.rstrip('/')}/{key}"
+
+
+def _listing(
+    media_manager: MediaManager, prefix: str
+) -> Iterator[tuple[str, FileInfo]]:
+    prefix = folder_prefix(prefix)
+    for file in media_manager._backend_iter_files_in_folder(prefix):
+        path = media_manager._backend_listing_path(prefix, file["key"])
+        yield path[len(prefix) :].lstrip("/"), file
+
+
+def _changed(compare: str, source: FileInfo, destination: FileInfo) -> bool:
+    if source["size"] != destination["size"]:
+        return True
+    if compare == "etag":
+        return source["etag"] != destination["etag"]
+    if compare == "mtime":
+        newer = source["last_modified"] - destination["last_modified"]
+        return newer > MTIME_WINDOW
+    return False
+
+
+class MediaManagerSync:
+    """
+    Makes the destination folder a copy of the source folder, the managers
+    can be of different backends. Both folders are listed side by side in
+    key order, the memory used does not grow with the number of files. The
+    files missing or changed in the destination are streamed to it,
+    max_concurrency at a time.
+
+    A file changed when the sizes differ and, with compare, when the source
+    is newer by more than MTIME_WINDOW ("mtime") or the ETags differ
+    ("etag", only meaningful between managers of the same backend).
+
+    With checkpoint_path the last key up to which everything was done is
+    saved as the sync goes, a sync that stopped or failed resumes after it.
+    The file is removed when a sync completes without errors.
+    """
+
+    def __init__(
+        self,
+        source: MediaManager,
+        destination: MediaManager,
+        source_prefix: str,
+        destination_prefix: str,
+        compare: Literal["size", "mtime", "etag"] = "mtime",
+        max_concurrency: int = 8,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+        checkpoint_path: str | None = None,
+    ):
+        if compare not in ("size", "mtime", "etag"):
+            raise ValueError(f"Unknown comparison {compare}")
+        self.source = source
+        self.destination = destination
+        self.source_prefix = source_prefix
+        self.destination_prefix = destination_prefix
+        self.compare = compare
+        self.max_concurrency = max_concurrency
+        self.chunk_size = chunk_size
+        self.checkpoint_path = checkpoint_path
+
+    def diff(self, after: str | None = None) -> Iterator[SyncAction]:
+        """
+        Yields every key of both folders, in key order, with what the sync
+        does with it. The deletes only happen when run with delete.
+        """
+        sources = _listing(self.source, self.source_prefix)
+        destinations = _listing(self.destination, self.destination_prefix)
+        source = next(sources, None)
+        destination = next(destinations, None)
+        while source is not None or destination is not None:
+            if destination is None or (
+                source is not None and source[0] < destination[0]
+            ):
+                (key, file), action = source, "transfer"
+                source = next(sources, None)
+            elif source is None or destination[0] < source[0]:
+                (key, file), action = destination, "delete"
+                destination = next(destinations, None)
+            else:
+                key, file = source
+                action = (
+                    "transfer"
+                    if _changed(self.compare, file, destination[1])
+                    else "unchanged"
+                )
+                source = next(sources, None)
+                destination = next(destinations, None)
+            if after is None or key > after:
+                yield {"key": key, "action": action, "size": file["size"]}
+
+    def _load_checkpoint(self) -> str | None:
+        if self.checkpoint_path is None:
+            return None
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return None
+        if (checkpoint["source_prefix"], checkpoint["destination_prefix"]) != (
+            self.source_prefix,
+            self.destination_prefix,
+        ):
+            raise ValueError(
+                f"{self.checkpoint_path} is the checkpoint of another sync"
+            )
+        return checkpoint["done_through"]
+
+    def _save_checkpoint(self, done_through: str | None) -> None:
+        if self.checkpoint_path is None or done_through is None:
+            return
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(
+                {
+                    "source_prefix": self.source_prefix,
+                    "destination_prefix": self.destination_prefix,
+                    "done_through": done_through,
+                },
+                f,
+            )
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _transfer(self, key: str, size: int) -> _TaskResult:
+        source_path = _join(self.source_prefix, key)
+        try:
+            try:
+                # A real file lets the kernel copy it to a local destination
+                stream = self.source._backend_open_file(source_path)
+            except NotImplementedError:
+                stream = ChunkReader(
+                    self.source._backend_stream_file(
+                        source_path, self.chunk_size
+                    )
+                )
+            try:
+                self.destination._backend_upload(
+                    MUploadFile(stream, filename=os.path.basename(key)),
+                    _join(self.destination_prefix, key),
+                )
+            finally:
+                stream.close()
+        except Exception as error:
+            return 0, 0, 0, [{"key": key, "error": str(error)}]
+        return 1, 0, size, []
+
+    def _delete(self, keys: list[str]) -> _TaskResult:
+        paths = {_join(self.destination_prefix, key): key for key in keys}
+        try:
+            deleted_files = self.destination._backend_delete_files(list(paths))
+        except Exception as error:
+            errors = [{"key": key, "error": str(error)} for key in keys]
+            return 0, 0, 0, errors
+        errors: list[TransferError] = []
+        for file in deleted_files:
+            if "error" in file:
+                key = paths.get(file["key"], file["key"])
+                errors.append({"key": key, "error": file["error"]})
+        return 0, len(deleted_files) - len(errors), 0, errors
+
+    def _tasks(
+        self, actions: Iterator[SyncAction], delete: bool, report: SyncReport
+    ) -> Iterator[tuple[str | None, Callable[[], _TaskResult]]]:
+        """
+        Yields the work to do with the key everything is done through once
+        it finished. The deletes are batched, the checkpoint does not move
+        past a batch that is not sent yet.
+        """
+        deletes: list[str] = []
+        # Tasks queued since the first pending delete
+        queued = 0
+        last_key = None
+        for action in actions:
+            last_key = action["key"]
+            if action["action"] == "unchanged":
+                report["unchanged"] += 1
+            elif action["action"] == "delete":
+                if delete:
+                    deletes.append(action["key"])
+            else:
+                yield (
+                    None if deletes else action["key"],
+                    partial(self._transfer, action["key"], action["size"]),
+                )
+                queued += bool(deletes)
+            if len(deletes) >= DELETE_BATCH_SIZE or (
+                deletes and queued >= DELETE_BATCH_SIZE
+            ):
+                yield last_key, partial(self._delete, deletes)
+                deletes, queued = [], 0
+        if deletes:
+            yield last_key, partial(self._delete, deletes)
+
+    def run(self, delete: bool = False, dry_run: bool = False) -> SyncReport:
+        """
+        Transfers the changed files and, with delete, deletes the files that
+        are only in the destination. With dry_run nothing is changed, the
+        report counts what would be done.
+        """
+        started = time.perf_counter()
+        report: SyncReport = {
+            "transferred": 0,
+            "deleted": 0,
+            "unchanged": 0,
+            "bytes_transferred": 0,
+            "errors": [],
+            "seconds": 0.0,
+            "dry_run": dry_run,
+        }
+        actions = self.diff(after=self._load_checkpoint())
+        if dry_run:
+            for action in actions:
+                if action["action"] == "transfer":
+                    report["transferred"] += 1
+                    report["bytes_transferred"] += action["size"]
+                elif action["action"] == "unchanged":
+                    report["unchanged"] += 1
+                elif delete:
+                    report["deleted"] += 1
+            report["seconds"] = time.perf_counter() - started
+            return report
+
+        def run_task(task) -> tuple[str | None, _TaskResult]:
+            done_through, function = task
+            return done_through, function()
+
+        # The results come in order, when one finished all the ones before
+        # it did too
+        done_through = None
+        failed = False
+        tasks = self._tasks(actions, delete, report)
+        results = map_in_threads(run_task, tasks, self.max_concurrency)
+        for count, (key, result) in enumerate(results, 1):
+            transferred, deleted, size, errors = result
+            report["transferred"] += transferred
+            report["deleted"] += deleted
+            report["bytes_transferred"] += size
+            report["errors"].extend(errors)
+            # Resuming starts after the first error
+            failed = failed or bool(errors)
+            if key is not None and not failed:
+                done_through = key
+            if count % CHECKPOINT_EVERY == 0:
+                self._save_checkpoint(done_through)
+        if failed:
+            self._save_checkpoint(done_through)
+        elif self.checkpoint_path is not None:
+            with suppress(FileNotFoundError):
+                os.remove(self.checkpoint_path)
+        report["seconds"] = time.perf_counter() - started
+        return report
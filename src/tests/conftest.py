@@ -1,11 +1,14 @@
 import os
 import shutil
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 
 from io import BytesIO
+import boto3
 import pytest
+import pytest_asyncio
+from moto.server import ThreadedMotoServer
 
-from media_manager import MUploadFile, AWS_MediaManager
+from media_manager import MUploadFile, AWS_MediaManager, AsyncAWS_MediaManager
 
 
 # ========= Media management fixtures =========
@@ -36,6 +39,55 @@ def aws_media_manager() -> AWS_MediaManager:
     return AWS_MediaManager()
 
 
+# ========= Local S3 stand-in fixtures =========
+MOTO_BUCKET = "media-manager-test"
+MOTO_CREDENTIALS = {
+    "bucket": MOTO_BUCKET,
+    "aws_access_key_id": "testing",
+    "aws_secret_access_key": "testing",
+    "aws_region_name": "us-east-1",
+}
+
+
+@pytest.fixture(scope="session")
+def moto_endpoint_url() -> Generator[str, None, None]:
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    endpoint_url = f"http://{host}:{port}"
+    boto3.client(
+        "s3",
+        region_name=MOTO_CREDENTIALS["aws_region_name"],
+        aws_access_key_id=MOTO_CREDENTIALS["aws_access_key_id"],
+        aws_secret_access_key=MOTO_CREDENTIALS["aws_secret_access_key"],
+        endpoint_url=endpoint_url,
+    ).create_bucket(Bucket=MOTO_BUCKET)
+    yield endpoint_url
+    server.stop()
+
+
+@pytest.fixture(scope="function")
+def moto_media_manager(moto_endpoint_url: str) -> AWS_MediaManager:
+    return AWS_MediaManager(
+        add_environment_as_prefix=False,
+        aws_endpoint_url=moto_endpoint_url,
+        **MOTO_CREDENTIALS,
+    )
+
+
+@pytest_asyncio.fixture(scope="function")
+async def async_moto_media_manager(
+    moto_endpoint_url: str,
+) -> AsyncGenerator[AsyncAWS_MediaManager, None]:
+    media_manager = AsyncAWS_MediaManager(
+        add_environment_as_prefix=False,
+        aws_endpoint_url=moto_endpoint_url,
+        **MOTO_CREDENTIALS,
+    )
+    yield media_manager
+    await media_manager.aclose()
+
+
 @pytest.fixture(scope="function")
 def test_pdf_file(testing_path: str) -> Generator[MUploadFile, None, None]:
     # Get the file from the test_files folder
@@ -0,0 +1,588 @@
+import base64
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+from unittest.mock import patch
+from urllib.request import urlopen
+
+import pytest
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from media_manager import AWS_MediaManager, MUploadFile
+from media_manager.base.policy import (
+    RequestPolicy,
+    RetryBudget,
+    request_policy,
+)
+
+MB = 1024 * 1024
+
+
+def upload_path(file: MUploadFile) -> str:
+    return f"test_upload_files/{file.filename}"
+
+
+class FailingReader(BytesIO):
+    """Raises once more than fail_after bytes were read, like a dead worker."""
+
+    def __init__(self, content: bytes, fail_after: int):
+        super().__init__(content)
+        self.fail_after = fail_after
+
+    def read(self, size: int = -1) -> bytes:
+        if self.tell() + max(size, 0) > self.fail_after:
+            raise ConnectionError("worker crashed")
+        return super().read(size)
+
+
+def test_s3_upload_with_transfer_config(moto_media_manager: AWS_MediaManager):
+    media_manager = moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "transfer_config"
+    content = os.urandom(11 * MB)
+    transfer_config = TransferConfig(
+        multipart_threshold=5 * MB, multipart_chunksize=5 * MB
+    )
+    complete_path = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(content), filename="video.bin"),
+        transfer_config=transfer_config,
+        checksum_algorithm="SHA256",
+    )
+    response = media_manager.s3_client.head_object(
+        Bucket=media_manager.bucket_name, Key=complete_path
+    )
+    # Multipart ETags end with the number of parts
+    assert response["ETag"].strip('"').endswith("-3")
+    assert media_manager.sync_download_file(complete_path).read() == content
+
+
+def test_s3_resumable_upload(moto_media_manager: AWS_MediaManager):
+    media_manager = moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "resumable"
+    media_manager.transfer_config = TransferConfig(
+        multipart_chunksize=5 * MB, max_concurrency=1
+    )
+    content = os.urandom(12 * MB)
+    file = MUploadFile(FailingReader(content, 5 * MB), filename="video.bin")
+    with pytest.raises(ConnectionError):
+        media_manager.sync_upload_file(file, resumable=True)
+    s3_client = media_manager.s3_client
+    with patch.object(
+        s3_client, "upload_part", wraps=s3_client.upload_part
+    ) as upload_part:
+        file = MUploadFile(BytesIO(content), filename="video.bin")
+        complete_path = media_manager.sync_upload_file(file, resumable=True)
+    # The first part was already uploaded before the crash
+    assert [c.kwargs["PartNumber"] for c in upload_part.call_args_list] == [
+        2,
+        3,
+    ]
+    assert media_manager.sync_download_file(complete_path).read() == content
+    assert media_manager._find_multipart_upload(complete_path) is None
+
+
+def test_s3_resumable_upload_of_changed_file(
+    moto_media_manager: AWS_MediaManager,
+):
+    media_manager = moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "resumable_changed"
+    media_manager.transfer_config = TransferConfig(
+        multipart_chunksize=5 * MB, max_concurrency=1
+    )
+    content = os.urandom(12 * MB)
+    file = MUploadFile(FailingReader(content, 5 * MB), filename="video.bin")
+    with pytest.raises(ConnectionError):
+        media_manager.sync_upload_file(file, resumable=True)
+    # Same size, other bytes: the uploaded part is stale
+    changed = os.urandom(12 * MB)
+    s3_client = media_manager.s3_client
+    with patch.object(
+        s3_client, "upload_part", wraps=s3_client.upload_part
+    ) as upload_part:
+        complete_path = media_manager.sync_upload_file(
+            MUploadFile(BytesIO(changed), filename="video.bin"),
+            resumable=True,
+        )
+    assert [c.kwargs["PartNumber"] for c in upload_part.call_args_list] == [
+        1,
+        2,
+        3,
+    ]
+    assert media_manager.sync_download_file(complete_path).read() == changed
+
+
+def test_s3_resumable_upload_from_position(
+    moto_media_manager: AWS_MediaManager,
+):
+    media_manager = moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "resumable_position"
+    media_manager.transfer_config = TransferConfig(
+        multipart_chunksize=5 * MB, max_concurrency=1
+    )
+    content = os.urandom(7 * MB)
+    stream = BytesIO(b"header" + content)
+    stream.seek(len(b"header"))
+    complete_path = media_manager.sync_upload_file(
+        MUploadFile(stream, filename="video.bin"), resumable=True
+    )
+    assert media_manager.sync_download_file(complete_path).read() == content
+
+
+def test_s3_download_range_and_parallel_download(
+    moto_media_manager: AWS_MediaManager,
+):
+    media_manager = moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "ranges"
+    content = os.urandom(3 * MB + 17)
+    complete_path = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(content), filename="video.bin")
+    )
+    response = media_manager.sync_download_range(complete_path, 5, 1029)
+    assert response.read() == content[5:1030]
+    assert media_manager.sync_get_file_size(complete_path) == len(content)
+    response = media_manager.sync_download_file(
+        complete_path, parallel=True, chunk_size=MB
+    )
+    assert response.read() == content
+
+
+def test_s3_stream_file(moto_media_manager: AWS_MediaManager):
+    media_manager = moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "stream"
+    content = os.urandom(MB + 5)
+    complete_path = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(content), filename="video.bin")
+    )
+    chunks = list(
+        media_manager.sync_stream_file(complete_path, chunk_size=64 * 1024)
+    )
+    assert max(len(chunk) for chunk in chunks) <= 64 * 1024
+    assert b"".join(chunks) == content
+    chunks = media_manager.sync_stream_file(complete_path, start=10, end=99)
+    assert b"".join(chunks) == content[10:100]
+
+
+def test_s3_iter_files_in_folder(moto_media_manager: AWS_MediaManager):
+    media_manager = moto_media_manager
+    media_manager.upload_path = lambda file: file.filename
+    media_manager.root_folder = "listing"
+    for folder in ("a", "b", "c"):
+        for i in range(3):
+            media_manager.sync_upload_file(
+                MUploadFile(BytesIO(b"data"), filename=f"{folder}/{i}.txt")
+            )
+    media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"root"), filename="root.txt")
+    )
+    # Small pages force several continuation tokens
+    files = list(media_manager.sync_iter_files_in_folder("listing", 2))
+    assert len(files) == 10
+    assert files[0]["size"] == 4
+    assert files[0]["etag"]
+    assert files[0]["last_modified"]
+    sharded = media_manager.sync_iter_files_in_folder(
+        "listing", page_size=2, sharded=True, max_concurrency=3
+    )
+    assert sorted(file["key"] for file in sharded) == sorted(
+        file["key"] for file in files
+    )
+    assert len(media_manager.sync_list_files_in_folder("listing")) == 10
+
+
+def test_s3_sharded_listing_keeps_folder_markers(
+    moto_media_manager: AWS_MediaManager,
+):
+    media_manager = moto_media_manager
+    s3_client = media_manager.s3_client
+    # Folder markers, like the ones of the S3 console
+    for key in (
+        "markers/",
+        "markers/a/",
+        "markers/a/1.txt",
+        "markers/b/",
+        "markers/b/c/",
+        "markers/b/c/2.txt",
+        "markers/3.txt",
+    ):
+        s3_client.put_object(
+            Bucket=media_manager.bucket_name, Key=key, Body=b""
+        )
+    files = media_manager.sync_iter_files_in_folder("markers")
+    sharded = media_manager.sync_iter_files_in_folder("markers", sharded=True)
+    keys = sorted(file["key"] for file in files)
+    assert "markers/a/" in keys
+    assert "markers/" not in keys
+    assert sorted(file["key"] for file in sharded) == keys
+
+
+def test_s3_delete_files_in_batches(moto_media_manager: AWS_MediaManager):
+    media_manager = moto_media_manager
+    media_manager.upload_path = lambda file: file.filename
+    media_manager.root_folder = "bulk_delete"
+    for i in range(25):
+        media_manager.sync_upload_file(
+            MUploadFile(BytesIO(b"data"), filename=f"{i}.txt")
+        )
+    s3_client = media_manager.s3_client
+    batch_size = patch("media_manager.managers.aws.DELETE_BATCH_SIZE", 10)
+    with batch_size, patch.object(
+        s3_client, "delete_objects", wraps=s3_client.delete_objects
+    ) as delete_objects:
+        deleted = media_manager.sync_delete_files_in_folder(
+            "bulk_delete", max_concurrency=2
+        )
+    assert delete_objects.call_count == 3
+    assert len(deleted) == 25
+    assert all("error" not in file for file in deleted)
+    assert media_manager.sync_list_files_in_folder("bulk_delete") == []
+
+
+def test_s3_delete_files_reports_failed_batches(
+    moto_media_manager: AWS_MediaManager,
+):
+    media_manager = moto_media_manager
+    media_manager.upload_path = lambda file: file.filename
+    media_manager.root_folder = "bulk_delete_errors"
+    keys = [
+        media_manager.sync_upload_file(
+            MUploadFile(BytesIO(b"data"), filename=f"{i:02}.txt")
+        )
+        for i in range(25)
+    ]
+    s3_client = media_manager.s3_client
+    delete_objects = s3_client.delete_objects
+
+    def unreachable_second_batch(**kwargs):
+        if kwargs["Delete"]["Objects"][0]["Key"] == keys[10]:
+            raise EndpointConnectionError(endpoint_url="http://s3")
+        return delete_objects(**kwargs)
+
+    batch_size = patch("media_manager.managers.aws.DELETE_BATCH_SIZE", 10)
+    with batch_size, patch.object(
+        s3_client, "delete_objects", unreachable_second_batch
+    ):
+        deleted = media_manager.sync_delete_files(keys, max_concurrency=1)
+    assert [file["key"] for file in deleted] == keys
+    assert all("error" in file for file in deleted[10:20])
+    assert all("error" not in file for file in deleted[:10] + deleted[20:])
+    remaining = media_manager.sync_list_files_in_folder("bulk_delete_errors")
+    assert remaining == keys[10:20]
+
+
+@pytest.mark.asyncio
+async def test_s3_upload_and_download_many(
+    moto_media_manager: AWS_MediaManager,
+):
+    media_manager = moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "many"
+    files = [
+        MUploadFile(BytesIO(b"x" * i), filename=f"{i}.ts") for i in range(10)
+    ]
+    report = media_manager.sync_upload_many(files, max_concurrency=4)
+    assert len(report["files"]) == 10
+    assert report["bytes_transferred"] == sum(range(10))
+    keys = report["files"]
+    report = media_manager.sync_download_many(keys)
+    assert report["downloads"][keys[3]].read() == b"xxx"
+    report = await media_manager.download_many([keys[0], "many/missing.ts"])
+    assert list(report["downloads"]) == [keys[0]]
+    assert report["errors"][0]["key"] == "many/missing.ts"
+    files = [MUploadFile(BytesIO(b"y"), filename=f"{i}.ts") for i in range(3)]
+    report = await media_manager.upload_many(files)
+    assert report["files"] == keys[:3]
+
+    # Several files with the same path, consumed as the uploads finish
+    consumed = []
+
+    def same_path_files():
+        for i in range(6):
+            consumed.append(i)
+            yield MUploadFile(BytesIO(b"z" * (i + 1)), filename="same.ts")
+
+    report = media_manager.sync_upload_many(
+        same_path_files(), max_concurrency=2
+    )
+    assert report["files"] == ["many/test_upload_files/same.ts"] * 6
+    assert report["bytes_transferred"] == 21
+    consumed.clear()
+    results = media_manager._backend_upload_many(
+        (
+            (file, f"many/lazy/{file.filename}")
+            for file in same_path_files()
+        ),
+        2,
+    )
+    next(results)
+    assert len(consumed) == 3
+    results.close()
+    requested = []
+
+    def requested_keys():
+        for key in keys:
+            requested.append(key)
+            yield key
+
+    results = media_manager._backend_download_many(requested_keys(), 2)
+    assert next(results)[0] == keys[0]
+    assert len(requested) == 3
+    results.close()
+
+
+def test_s3_signed_url_cache(moto_media_manager: AWS_MediaManager):
+    media_manager = moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "signed_url"
+    complete_path = "signed_url/test_upload_files/image.png"
+    client = media_manager.client
+    with patch.object(
+        client, "head_object", wraps=client.head_object
+    ) as head_object:
+        for _ in range(2):
+            with pytest.raises(FileNotFoundError):
+                media_manager.sync_signed_url(complete_path, verify=True)
+        # The missing file was only checked once
+        assert head_object.call_count == 1
+        # Uploading the file through the manager invalidates the result
+        media_manager.sync_upload_file(
+            MUploadFile(BytesIO(b"png"), filename="image.png")
+        )
+        url = media_manager.sync_signed_url(complete_path, verify=True)
+        assert media_manager.sync_signed_url(complete_path, verify=True) == url
+        assert head_object.call_count == 2
+    assert media_manager.sync_signed_url(complete_path, expires_in=60) != url
+    stats = media_manager.signed_url_cache_stats
+    assert stats["urls"]["hits"] == 1
+    assert stats["verify"]["hits"] == 2
+    # URLs that expire before the minimum validity are never cached
+    assert media_manager.signed_url_cache_stats["urls"]["entries"] == 1
+
+
+def test_s3_signed_urls(moto_media_manager: AWS_MediaManager):
+    media_manager = moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "signed_urls"
+    names = ["a.png", "sub dir/b+ü.png"]
+    for name in names:
+        media_manager.sync_upload_file(
+            MUploadFile(BytesIO(name.encode()), filename=name)
+        )
+    keys = [f"signed_urls/test_upload_files/{name}" for name in names]
+    missing = "signed_urls/test_upload_files/missing.png"
+    # moto does not check the signatures, the URLs are compared whole at a
+    # fixed clock
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with patch("botocore.auth.get_current_datetime", return_value=now), patch(
+        "botocore.auth.time.time", return_value=now.timestamp()
+    ):
+        urls = media_manager.sync_signed_urls([*keys, missing], verify=True)
+        singles = [
+            media_manager.client.generate_presigned_url(
+                "get_object",
+                Params={"Bucket": media_manager.bucket_name, "Key": key},
+            )
+            for key in keys
+        ]
+    assert list(urls) == keys
+    for key, name, single in zip(keys, names, singles):
+        assert urls[key] == single
+        with urlopen(urls[key]) as response:
+            assert response.read() == name.encode()
+    # Signed again from the cache
+    assert media_manager.sync_signed_urls(keys) == urls
+
+
+def test_s3_shared_clients(moto_media_manager: AWS_MediaManager):
+    from media_manager.managers.clients import s3_clients
+
+    settings = {
+        "upload_path": upload_path,
+        "bucket": moto_media_manager.bucket_name,
+        "aws_access_key_id": moto_media_manager.aws_access_key_id,
+        "aws_secret_access_key": moto_media_manager.aws_secret_access_key,
+        "aws_region_name": moto_media_manager.aws_region_name,
+        "aws_endpoint_url": moto_media_manager.aws_endpoint_url,
+    }
+    clients = len(s3_clients)
+    media_manager = AWS_MediaManager(**settings, max_pool_connections=7)
+    # Nothing is created before the first request
+    assert len(s3_clients) == clients
+    client = media_manager.client
+    assert client is media_manager.s3_client
+    assert client.meta.config.max_pool_connections == 7
+    assert client.meta.config.tcp_keepalive
+    assert AWS_MediaManager(**settings, max_pool_connections=7).client is client
+    assert moto_media_manager.client is not client
+    assert len(s3_clients) == clients + 1
+    # Forked children create their own clients
+    s3_clients._after_fork()
+    assert len(s3_clients) == 0
+    assert media_manager.client is not client
+
+
+def test_s3_get_file_info(moto_media_manager: AWS_MediaManager):
+    media_manager = moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "file_info"
+    complete_path = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"info"), filename="info.txt")
+    )
+    info = media_manager.sync_get_file_info(complete_path)
+    assert info["key"] == complete_path
+    assert info["size"] == 4
+    assert info["etag"]
+    with pytest.raises(FileNotFoundError):
+        media_manager.sync_get_file_info("file_info/missing.txt")
+
+
+def test_s3_checksums(moto_media_manager: AWS_MediaManager):
+    media_manager = moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "checksums"
+    media_manager.checksums = ("md5", "sha256")
+    small = MUploadFile(BytesIO(b"small"), filename="small.txt")
+    complete_path = media_manager.sync_upload_file(small)
+    assert small.checksums == {
+        "md5": hashlib.md5(b"small").hexdigest(),
+        "sha256": hashlib.sha256(b"small").hexdigest(),
+    }
+    response = media_manager.client.head_object(
+        Bucket=media_manager.bucket_name,
+        Key=complete_path,
+        ChecksumMode="ENABLED",
+    )
+    # Sent with the upload and stored by S3
+    assert response["ChecksumSHA256"] == base64.b64encode(
+        hashlib.sha256(b"small").digest()
+    ).decode()
+    assert media_manager.sync_download_file(complete_path).read() == b"small"
+    content = os.urandom(11 * MB)
+    large = MUploadFile(BytesIO(content), filename="large.bin")
+    media_manager.sync_upload_file(
+        large,
+        transfer_config=TransferConfig(
+            multipart_threshold=5 * MB, multipart_chunksize=5 * MB
+        ),
+        checksum_algorithm="SHA256",
+    )
+    assert large.checksums["md5"] == hashlib.md5(content).hexdigest()
+
+
+def test_s3_copy_and_move(moto_media_manager: AWS_MediaManager):
+    media_manager = moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "copy"
+    media_manager.transfer_config = TransferConfig(
+        multipart_threshold=5 * MB, multipart_chunksize=5 * MB
+    )
+    content = os.urandom(6 * MB)
+    large = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(content), filename="large.bin")
+    )
+    small = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"small"), filename="small.txt")
+    )
+    with patch.object(
+        media_manager.client,
+        "upload_part_copy",
+        wraps=media_manager.client.upload_part_copy,
+    ) as upload_part_copy:
+        media_manager.sync_copy_file(large, "copy/other/large.bin")
+        # Copied by S3 in parts
+        assert upload_part_copy.call_count == 2
+    assert (
+        media_manager.sync_download_file("copy/other/large.bin").read()
+        == content
+    )
+    media_manager.sync_move_file(small, "copy/other/small.txt")
+    assert not media_manager.sync_file_exists(small)
+    # A sibling folder sharing the prefix is not copied
+    media_manager.sync_copy_file(
+        "copy/other/small.txt", "copy/other-2024/keep.txt"
+    )
+    copied = media_manager.sync_copy_folder("copy/other", "copy/backup")
+    assert sorted(file["destination"] for file in copied) == [
+        "copy/backup/large.bin",
+        "copy/backup/small.txt",
+    ]
+    assert (
+        media_manager.sync_download_file("copy/backup/small.txt").read()
+        == b"small"
+    )
+
+
+def test_s3_request_policy(moto_media_manager: AWS_MediaManager):
+    media_manager = moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "policy"
+    media_manager.policy = RequestPolicy(
+        read_timeout=5, backoff_base=0, budget=RetryBudget(capacity=1)
+    )
+    key = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"content"), filename="file.txt")
+    )
+    client = media_manager.client
+    # The policy retries, botocore does not
+    assert client.meta.config.read_timeout == 5
+    assert client.meta.config.retries["total_max_attempts"] == 1
+    slow_down = ClientError(
+        {"Error": {"Code": "SlowDown"}, "ResponseMetadata": {}}, "HeadObject"
+    )
+    response = client.head_object(Bucket=media_manager.bucket_name, Key=key)
+    with patch.object(
+        client, "head_object", side_effect=[slow_down, response]
+    ) as patched:
+        assert media_manager.sync_get_file_size(key) == 7
+        assert patched.call_count == 2
+    # The budget has no token left for another retry
+    with patch.object(client, "head_object", side_effect=slow_down):
+        with pytest.raises(ClientError):
+            media_manager.sync_get_file_size(key)
+    media_manager.policy.budget.tokens = 1
+    # Overridden for the call
+    with request_policy(RequestPolicy(max_attempts=1)):
+        with patch.object(
+            media_manager.client, "head_object", side_effect=slow_down
+        ) as patched:
+            with pytest.raises(ClientError):
+                media_manager.sync_get_file_size(key)
+            assert patched.call_count == 1
+    # Not found is not retried
+    with pytest.raises(FileNotFoundError):
+        media_manager.sync_get_file_size("policy/missing.txt")
+
+
+def test_s3_hedged_download(moto_media_manager: AWS_MediaManager):
+    media_manager = moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "hedge"
+    media_manager.policy = RequestPolicy(hedge=True, hedge_after=0.05)
+    key = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"content"), filename="file.txt")
+    )
+    client = media_manager.client
+    download_fileobj = client.download_fileobj
+
+    def slow_download(*args, **kwargs):
+        time.sleep(1)
+        return download_fileobj(*args, **kwargs)
+
+    with patch.object(client, "download_fileobj", slow_download):
+        started = time.perf_counter()
+        assert media_manager.sync_download_file(key).read() == b"content"
+        # The hedged get_object finished first
+        assert time.perf_counter() - started < 0.5
+        media_manager.policy = media_manager.policy._replace(
+            hedge_max_size=1
+        )
+        # Too big to hedge, the first request is waited for
+        assert media_manager.sync_download_file(key).read() == b"content"
+        assert time.perf_counter() - started > 1
@@ -0,0 +1,311 @@
+import asyncio
+import os
+import time
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
+from media_manager import AsyncAWS_MediaManager, MUploadFile
+from media_manager.base.policy import RequestPolicy
+
+
+def upload_path(file: MUploadFile) -> str:
+    return f"test_async_upload_files/{file.filename}"
+
+
+@pytest.mark.asyncio
+async def test_async_s3_upload_download_and_delete(
+    async_moto_media_manager: AsyncAWS_MediaManager,
+):
+    media_manager = async_moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "async"
+    file = MUploadFile(BytesIO(b"Hello World!"), filename="test.txt")
+    complete_path = await media_manager.upload_file(file)
+    response = await media_manager.download_file(complete_path)
+    assert response.read() == b"Hello World!"
+    url = await media_manager.signed_url(complete_path, verify=True)
+    assert complete_path in url
+    await media_manager.delete_file(complete_path)
+    with pytest.raises(FileNotFoundError):
+        await media_manager.signed_url(complete_path, verify=True)
+
+
+@pytest.mark.asyncio
+async def test_async_s3_upload_content_type(
+    async_moto_media_manager: AsyncAWS_MediaManager,
+):
+    media_manager = async_moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "async_typed"
+    file = MUploadFile(
+        BytesIO(b"<p>"), filename="a.html", content_type="text/html"
+    )
+    complete_path = await media_manager.upload_file(file)
+    response = media_manager.s3_client.head_object(
+        Bucket=media_manager.bucket_name, Key=complete_path
+    )
+    assert response["ContentType"] == "text/html"
+
+
+@pytest.mark.asyncio
+async def test_async_s3_multipart_upload(
+    async_moto_media_manager: AsyncAWS_MediaManager,
+):
+    media_manager = async_moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "async_multipart"
+    transfer_config = TransferConfig(
+        multipart_threshold=5 * 1024 * 1024,
+        multipart_chunksize=5 * 1024 * 1024,
+    )
+    content = os.urandom(12 * 1024 * 1024)
+    file = MUploadFile(BytesIO(content), filename="big.bin")
+    complete_path = await media_manager.upload_file(
+        file, transfer_config=transfer_config, checksum_algorithm="SHA256"
+    )
+    response = await media_manager.download_file(complete_path)
+    assert response.read() == content
+    await media_manager.delete_file(complete_path)
+
+
+@pytest.mark.asyncio
+async def test_async_s3_concurrent_list_and_delete_folder(
+    async_moto_media_manager: AsyncAWS_MediaManager,
+):
+    media_manager = async_moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "async_folder"
+    files = [
+        MUploadFile(BytesIO(b"data"), filename=f"{i}.txt") for i in range(20)
+    ]
+    await asyncio.gather(*(media_manager.upload_file(f) for f in files))
+    prefix = "async_folder/test_async_upload_files"
+    file_list = await media_manager.list_files_in_folder(prefix)
+    assert len(file_list) == 20
+    await media_manager.delete_files_in_folder(prefix)
+    assert await media_manager.list_files_in_folder(prefix) == []
+
+
+@pytest.mark.asyncio
+async def test_async_s3_download_range_and_parallel_download(
+    async_moto_media_manager: AsyncAWS_MediaManager,
+):
+    media_manager = async_moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "async_ranges"
+    content = os.urandom(1024 * 1024 + 3)
+    complete_path = await media_manager.upload_file(
+        MUploadFile(BytesIO(content), filename="video.bin")
+    )
+    response = await media_manager.download_range(complete_path, 1000)
+    assert response.read() == content[1000:]
+    response = await media_manager.download_file(
+        complete_path, parallel=True, chunk_size=256 * 1024
+    )
+    assert response.read() == content
+    with pytest.raises(FileNotFoundError):
+        await media_manager.get_file_size("async_ranges/missing.bin")
+
+
+@pytest.mark.asyncio
+async def test_async_s3_stream_file(
+    async_moto_media_manager: AsyncAWS_MediaManager,
+):
+    media_manager = async_moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "async_stream"
+    content = os.urandom(300 * 1024)
+    complete_path = await media_manager.upload_file(
+        MUploadFile(BytesIO(content), filename="video.bin")
+    )
+    chunks = [
+        chunk
+        async for chunk in media_manager.stream_file(
+            complete_path, chunk_size=64 * 1024
+        )
+    ]
+    assert max(len(chunk) for chunk in chunks) <= 64 * 1024
+    assert b"".join(chunks) == content
+
+
+@pytest.mark.asyncio
+async def test_async_s3_sharded_listing_keeps_folder_markers(
+    async_moto_media_manager: AsyncAWS_MediaManager,
+):
+    media_manager = async_moto_media_manager
+    keys = ["async_markers/a/", "async_markers/a/1", "async_markers/b/"]
+    for key in ["async_markers/", *keys]:
+        media_manager.s3_client.put_object(
+            Bucket=media_manager.bucket_name, Key=key, Body=b""
+        )
+    listings = []
+    for sharded in (False, True):
+        files = media_manager.iter_files_in_folder(
+            "async_markers", sharded=sharded
+        )
+        listings.append(sorted([file["key"] async for file in files]))
+    assert listings == [keys, keys]
+
+
+@pytest.mark.asyncio
+async def test_async_s3_iter_files_in_folder(
+    async_moto_media_manager: AsyncAWS_MediaManager,
+):
+    media_manager = async_moto_media_manager
+    media_manager.upload_path = lambda file: file.filename
+    media_manager.root_folder = "async_listing"
+    await asyncio.gather(
+        *(
+            media_manager.upload_file(
+                MUploadFile(BytesIO(b"data"), filename=f"{folder}/{i}.txt")
+            )
+            for folder in ("a", "b")
+            for i in range(3)
+        )
+    )
+    files = [
+        file
+        async for file in media_manager.iter_files_in_folder(
+            "async_listing", page_size=2
+        )
+    ]
+    assert len(files) == 6
+    sharded = [
+        file["key"]
+        async for file in media_manager.iter_files_in_folder(
+            "async_listing", page_size=2, sharded=True
+        )
+    ]
+    assert sorted(sharded) == [file["key"] for file in files]
+
+
+@pytest.mark.asyncio
+async def test_async_s3_delete_files(
+    async_moto_media_manager: AsyncAWS_MediaManager,
+):
+    media_manager = async_moto_media_manager
+    media_manager.upload_path = lambda file: file.filename
+    media_manager.root_folder = "async_bulk_delete"
+    keys = await asyncio.gather(
+        *(
+            media_manager.upload_file(
+                MUploadFile(BytesIO(b"data"), filename=f"{i}.txt")
+            )
+            for i in range(5)
+        )
+    )
+    deleted = await media_manager.delete_files(keys[:2])
+    assert deleted == [{"key": keys[0]}, {"key": keys[1]}]
+    deleted = await media_manager.delete_files_in_folder("async_bulk_delete")
+    assert sorted(file["key"] for file in deleted) == sorted(keys[2:])
+
+
+@pytest.mark.asyncio
+async def test_async_s3_upload_and_download_many(
+    async_moto_media_manager: AsyncAWS_MediaManager,
+):
+    media_manager = async_moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "async_many"
+    files = [
+        MUploadFile(BytesIO(b"x" * i), filename=f"{i}.ts") for i in range(10)
+    ]
+    report = await media_manager.upload_many(files, max_concurrency=4)
+    assert len(report["files"]) == 10
+    report = await media_manager.download_many(report["files"])
+    assert sorted(f.read() for f in report["downloads"].values()) == sorted(
+        b"x" * i for i in range(10)
+    )
+    with pytest.raises(ClientError):
+        await media_manager.download_many(
+            ["async_many/missing.ts"], fail_fast=True
+        )
+
+
+@pytest.mark.asyncio
+async def test_async_s3_signed_urls(
+    async_moto_media_manager: AsyncAWS_MediaManager,
+):
+    media_manager = async_moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "async_signed_urls"
+    file = MUploadFile(BytesIO(b"png"), filename="image.png")
+    complete_path = await media_manager.upload_file(file)
+    missing = "async_signed_urls/missing.png"
+    urls = await media_manager.signed_urls(
+        [complete_path, missing], verify=True, max_concurrency=2
+    )
+    assert list(urls) == [complete_path]
+    assert urls[complete_path] == await media_manager.signed_url(
+        complete_path
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_s3_checksums(
+    async_moto_media_manager: AsyncAWS_MediaManager,
+):
+    media_manager = async_moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "async_checksums"
+    media_manager.checksums = ("sha256", "crc32c")
+    file = MUploadFile(BytesIO(b"123456789"), filename="digits.txt")
+    complete_path = await media_manager.upload_file(
+        file, checksum_algorithm="CRC32C"
+    )
+    assert file.checksums["crc32c"] == "e3069283"
+    response = await media_manager.download_file(complete_path)
+    assert response.read() == b"123456789"
+
+
+@pytest.mark.asyncio
+async def test_async_s3_hedged_download(
+    async_moto_media_manager: AsyncAWS_MediaManager,
+):
+    media_manager = async_moto_media_manager
+    media_manager.upload_path = upload_path
+    media_manager.root_folder = "hedge"
+    media_manager.policy = RequestPolicy(hedge=True, hedge_after=0.05)
+    key = await media_manager.upload_file(
+        MUploadFile(BytesIO(b"content"), filename="file.txt")
+    )
+    client = await media_manager.get_async_client()
+    get_object = client.get_object
+    calls = 0
+
+    async def get_object_slow_once(**kwargs):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(1)
+        return await get_object(**kwargs)
+
+    with patch.object(client, "get_object", get_object_slow_once):
+        started = time.perf_counter()
+        assert (await media_manager.download_file(key)).read() == b"content"
+        assert time.perf_counter() - started < 0.5
+    assert calls == 2
+
+
+def test_async_s3_client_of_a_previous_loop_is_closed(moto_endpoint_url):
+    media_manager = AsyncAWS_MediaManager(
+        add_environment_as_prefix=False,
+        aws_endpoint_url=moto_endpoint_url,
+        bucket="media-manager-test",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+        aws_region_name="us-east-1",
+    )
+    asyncio.run(media_manager.list_files_in_folder("loops"))
+    exit_stack = media_manager._async_exit_stack
+    with patch.object(
+        exit_stack, "aclose", wraps=exit_stack.aclose
+    ) as aclose:
+        # Every asyncio.run has its own event loop, and so its own client
+        asyncio.run(media_manager.list_files_in_folder("loops"))
+    aclose.assert_awaited_once()
+    asyncio.run(media_manager.aclose())
@@ -0,0 +1,53 @@
+import time
+from unittest.mock import patch
+
+from media_manager.base.cache import TTLCache
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    # "b" was the least recently used entry
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats == {
+        "hits": 3,
+        "misses": 1,
+        "evictions": 1,
+        "entries": 2,
+        "size": 0,
+    }
+
+
+def test_ttl_cache_expiration():
+    cache = TTLCache(ttl=10)
+    now = time.monotonic()
+    with patch("media_manager.base.cache.time.monotonic", return_value=now):
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=30)
+    with patch(
+        "media_manager.base.cache.time.monotonic", return_value=now + 20
+    ):
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+    assert cache.pop("b") == 2
+    assert len(cache) == 0
+
+
+def test_ttl_cache_byte_accounting():
+    cache = TTLCache(max_bytes=10)
+    cache.set("a", b"12345", size=5)
+    cache.set("b", b"12345", size=5)
+    # Entries larger than the cache are never stored
+    cache.set("c", b"x" * 11, size=11)
+    assert cache.get("c") is None
+    assert cache.size == 10
+    cache.set("d", b"123", size=3)
+    assert cache.get("a") is None
+    assert cache.size == 8
+    assert cache.pop_matching(lambda key: key in ("b", "d")) == 2
+    assert cache.size == 0
@@ -0,0 +1,60 @@
+import hashlib
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+import pytest
+
+from media_manager import MUploadFile
+
+
+class Stream:
+    """A stream that can only be read, like a socket."""
+
+    def __init__(self, content: bytes):
+        self.content = BytesIO(content)
+
+    def read(self, size: int = -1) -> bytes:
+        return self.content.read(size)
+
+
+def test_upload_file_sources(tmp_path):
+    path = tmp_path / "video.bin"
+    path.write_bytes(b"0123456789")
+    with MUploadFile(str(path)) as file:
+        assert file.filename == "video.bin"
+        assert file.size == 10
+        assert file.file.read() == b"0123456789"
+    assert MUploadFile(b"abc", filename="a.txt").size == 3
+    stream = BytesIO(b"headerbody")
+    stream.seek(6)
+    # The upload starts where the stream is
+    file = MUploadFile(stream)
+    assert file.size == 4
+    assert file.file.read() == b"body"
+    file.rewind()
+    assert file.file.read() == b"body"
+    with pytest.raises(AttributeError):
+        file.other = 1
+
+
+def test_upload_file_spools_streams():
+    file = MUploadFile(Stream(b"x" * 100), spool_size=10)
+    assert file.size == 100
+    assert file.file.read(50) == b"x" * 50
+    assert file.digest("sha256") == hashlib.sha256(b"x" * 100).hexdigest()
+    # The position is kept and the digests are cached
+    assert file.file.read() == b"x" * 50
+    file.file.close()
+    assert file.digests(["sha256"]) == {
+        "sha256": hashlib.sha256(b"x" * 100).hexdigest()
+    }
+    file.close()
+
+
+def test_upload_file_spools_large_bytes():
+    with MUploadFile(b"x" * 100, spool_size=10) as file:
+        # Written to a temporary file, not kept as bytes
+        assert isinstance(file.file, SpooledTemporaryFile)
+        assert file.size == 100
+        assert file.file.read() == b"x" * 100
+    assert isinstance(MUploadFile(b"x" * 10, spool_size=10).file, BytesIO)
@@ -0,0 +1,129 @@
+from io import BytesIO
+from unittest.mock import patch
+import hashlib
+
+import pytest
+
+from media_manager import Dedup_MediaManager, Local_MediaManager, MUploadFile
+
+
+def upload_path(file: MUploadFile) -> str:
+    return f"files/{file.filename}"
+
+
+@pytest.fixture
+def local_media_manager(tmp_path) -> Local_MediaManager:
+    return Local_MediaManager(
+        upload_path=upload_path,
+        root_folder=str(tmp_path / "root"),
+        add_environment_as_prefix=False,
+    )
+
+
+def test_dedup_shares_blobs(local_media_manager, tmp_path):
+    media_manager = Dedup_MediaManager(
+        local_media_manager, str(tmp_path / "blobs")
+    )
+    sha256 = hashlib.sha256(b"same").hexdigest()
+    blob = media_manager.blob_path(sha256)
+    with patch.object(
+        local_media_manager,
+        "_backend_upload",
+        wraps=local_media_manager._backend_upload,
+    ) as upload:
+        first = media_manager.sync_upload_file(
+            MUploadFile(BytesIO(b"same"), filename="a.txt")
+        )
+        second = media_manager.sync_upload_file(
+            MUploadFile(BytesIO(b"same"), filename="b.txt")
+        )
+        uploaded = [call.args[1] for call in upload.call_args_list]
+    # The content was transferred once
+    assert uploaded.count(blob) == 1
+    assert media_manager.sync_download_file(second).read() == b"same"
+    assert media_manager.sync_get_file_size(first) == 4
+    folder = str(tmp_path / "root" / "files")
+    assert [
+        (file["key"], file["size"], file["etag"])
+        for file in media_manager.sync_iter_files_in_folder(folder)
+    ] == [("a.txt", 4, sha256), ("b.txt", 4, sha256)]
+    media_manager.sync_delete_file(first)
+    assert local_media_manager.sync_file_exists(blob)
+    # Overwriting the last reference releases the blob
+    media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"other"), filename="b.txt")
+    )
+    assert not local_media_manager.sync_file_exists(blob)
+    assert media_manager.sync_download_file(second).read() == b"other"
+    assert media_manager.sync_get_folder_size(folder) == 5
+
+
+@pytest.mark.asyncio
+async def test_dedup_async_delete_folder(local_media_manager, tmp_path):
+    media_manager = Dedup_MediaManager(
+        local_media_manager, str(tmp_path / "blobs")
+    )
+    for name in ("a.txt", "b.txt"):
+        await media_manager.upload_file(
+            MUploadFile(BytesIO(b"same"), filename=name)
+        )
+    folder = str(tmp_path / "root" / "files")
+    deleted = await media_manager.delete_files_in_folder(folder)
+    assert len(deleted) == 2
+    blob = media_manager.blob_path(hashlib.sha256(b"same").hexdigest())
+    assert not await local_media_manager.file_exists(blob)
+
+
+def test_dedup_on_s3(moto_media_manager):
+    moto_media_manager.upload_path = upload_path
+    media_manager = Dedup_MediaManager(moto_media_manager, "dedup")
+    keys = [
+        media_manager.sync_upload_file(
+            MUploadFile(BytesIO(b"content"), filename=name)
+        )
+        for name in ("x.txt", "y.txt")
+    ]
+    blobs = moto_media_manager.sync_list_files_in_folder("dedup/blobs")
+    assert len(blobs) == 1
+    assert media_manager.sync_download_file(keys[1]).read() == b"content"
+    urls = media_manager.sync_signed_urls(keys)
+    assert set(urls) == set(keys)
+    assert media_manager.sync_delete_files(keys) == [
+        {"key": key} for key in keys
+    ]
+    assert moto_media_manager.sync_list_files_in_folder("dedup") == []
+
+
+def test_dedup_copy_shares_the_blob(local_media_manager, tmp_path):
+    media_manager = Dedup_MediaManager(
+        local_media_manager, str(tmp_path / "blobs")
+    )
+    source = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"same"), filename="a.txt")
+    )
+    destination = str(tmp_path / "root" / "copies" / "a.txt")
+    with patch.object(
+        local_media_manager,
+        "_backend_download_file",
+        wraps=local_media_manager._backend_download_file,
+    ) as download:
+        media_manager.sync_copy_file(source, destination)
+        # Only the pointer was read
+        assert download.call_count == 1
+    media_manager.sync_delete_file(source)
+    assert media_manager.sync_download_file(destination).read() == b"same"
+
+
+def test_dedup_blob_keeps_the_content_type(moto_media_manager):
+    moto_media_manager.upload_path = upload_path
+    media_manager = Dedup_MediaManager(moto_media_manager, "dedup_typed")
+    media_manager.sync_upload_file(
+        MUploadFile(
+            BytesIO(b"<p>"), filename="a.html", content_type="text/html"
+        )
+    )
+    blob_path = media_manager.blob_path(hashlib.sha256(b"<p>").hexdigest())
+    response = moto_media_manager.s3_client.head_object(
+        Bucket=moto_media_manager.bucket_name, Key=blob_path
+    )
+    assert response["ContentType"] == "text/html"
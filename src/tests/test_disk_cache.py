@@ -0,0 +1,149 @@
+import asyncio
+import time
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+
+from media_manager import (
+    DiskCache_MediaManager,
+    Local_MediaManager,
+    MUploadFile,
+)
+
+
+def upload_path(file: MUploadFile) -> str:
+    return f"{file.filename}"
+
+
+@pytest.fixture
+def local_media_manager(tmp_path) -> Local_MediaManager:
+    return Local_MediaManager(
+        upload_path=upload_path,
+        root_folder=str(tmp_path / "media"),
+        add_environment_as_prefix=False,
+    )
+
+
+def cache_manager(media_manager, tmp_path, **kwargs):
+    return DiskCache_MediaManager(
+        media_manager, cache_folder=str(tmp_path / "cache"), **kwargs
+    )
+
+
+def test_disk_cache_read_through(local_media_manager, tmp_path):
+    media_manager = cache_manager(local_media_manager, tmp_path)
+    key = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"watermark"), filename="watermark.png")
+    )
+    with patch.object(
+        local_media_manager,
+        "_backend_download_file",
+        wraps=local_media_manager._backend_download_file,
+    ) as download:
+        for _ in range(3):
+            assert media_manager.sync_download_file(key).read() == (
+                b"watermark"
+            )
+        assert download.call_count == 1
+        assert media_manager.sync_download_range(key, 1, 3).read() == b"ate"
+        assert b"".join(media_manager.sync_stream_file(key, 4)) == (
+            b"watermark"
+        )
+        # Writes through the manager invalidate the cached file
+        media_manager.sync_upload_file(
+            MUploadFile(BytesIO(b"new watermark"), filename="watermark.png")
+        )
+        assert media_manager.sync_download_file(key).read() == (
+            b"new watermark"
+        )
+        assert download.call_count == 2
+    stats = media_manager.cache_stats
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["size"] == len(b"new watermark")
+
+
+def test_disk_cache_revalidation(local_media_manager, tmp_path):
+    media_manager = cache_manager(
+        local_media_manager, tmp_path, revalidate_after=0
+    )
+    key = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"font"), filename="font.ttf")
+    )
+    assert media_manager.sync_download_file(key).read() == b"font"
+    assert media_manager.sync_download_file(key).read() == b"font"
+    assert media_manager.cache_stats["revalidations"] == 1
+    # Changed behind the cache
+    local_media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"new font"), filename="font.ttf")
+    )
+    assert media_manager.sync_download_file(key).read() == b"new font"
+    local_media_manager.sync_delete_file(key)
+    with pytest.raises(FileNotFoundError):
+        media_manager.sync_download_file(key)
+    assert media_manager.cache_stats["entries"] == 0
+
+
+def test_disk_cache_eviction_and_restart(local_media_manager, tmp_path):
+    media_manager = cache_manager(local_media_manager, tmp_path, max_size=10)
+    keys = [
+        local_media_manager.sync_upload_file(
+            MUploadFile(BytesIO(b"12345"), filename=f"{i}.txt")
+        )
+        for i in range(3)
+    ]
+    for key in keys:
+        media_manager.sync_download_file(key)
+    # The first file was evicted to make room for the third
+    stats = media_manager.cache_stats
+    assert stats["evictions"] == 1
+    assert stats["size"] == 10
+    restarted = cache_manager(local_media_manager, tmp_path, max_size=10)
+    assert restarted.cache_stats["entries"] == 2
+    with patch.object(
+        local_media_manager,
+        "_backend_download_file",
+        wraps=local_media_manager._backend_download_file,
+    ) as download:
+        restarted.sync_download_file(keys[2])
+        # Revalidated, not downloaded again
+        assert download.call_count == 0
+    assert restarted.cache_stats["revalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_coalesces_downloads(local_media_manager, tmp_path):
+    media_manager = cache_manager(local_media_manager, tmp_path)
+    key = await media_manager.upload_file(
+        MUploadFile(BytesIO(b"template"), filename="template.html")
+    )
+    download_file = local_media_manager._backend_download_file
+
+    def slow_download(file: str) -> BytesIO:
+        time.sleep(0.05)
+        return download_file(file)
+
+    with patch.object(
+        local_media_manager, "_backend_download_file", wraps=slow_download
+    ) as download:
+        responses = await asyncio.gather(
+            *(media_manager.download_file(key) for _ in range(50))
+        )
+        assert download.call_count == 1
+    assert all(response.read() == b"template" for response in responses)
+    await media_manager.aclose()
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_mmap_download(local_media_manager, tmp_path):
+    media_manager = cache_manager(local_media_manager, tmp_path)
+    key = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"template"), filename="template.html")
+    )
+    view = media_manager.sync_download_file(key, mmap=True)
+    assert isinstance(view, memoryview)
+    assert bytes(view) == b"template"
+    view = await media_manager.download_file(key, mmap=True)
+    assert bytes(view) == b"template"
+    await media_manager.aclose()
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from media_manager import Local_MediaManager, MUploadFile
+from media_manager.base.executor import BackendExecutor
+
+
+class SlowUpload_MediaManager(Local_MediaManager):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.release = threading.Event()
+
+    def _backend_upload(self, file: MUploadFile, complete_path, *args, **kw):
+        self.release.wait(timeout=5)
+
+
+class SlowStream_MediaManager(Local_MediaManager):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.release = threading.Event()
+        self.closed = threading.Event()
+
+    def _backend_stream_file(self, file, chunk_size, start=0, end=None):
+        try:
+            yield b"first"
+            self.release.wait(timeout=5)
+            yield b"second"
+        finally:
+            self.closed.set()
+
+
+def upload_path(file: MUploadFile) -> str:
+    return f"{file.filename}"
+
+
+@pytest.mark.asyncio
+async def test_upload_does_not_block_event_loop():
+    media_manager = SlowUpload_MediaManager(
+        upload_path=upload_path,
+        add_environment_as_prefix=False,
+        max_workers=2,
+    )
+    uploads = [
+        asyncio.create_task(
+            media_manager.upload_file(MUploadFile(b"", filename=f"{i}.txt"))
+        )
+        for i in range(4)
+    ]
+    # The event loop keeps running while every worker is busy
+    started = time.perf_counter()
+    await asyncio.sleep(0.05)
+    assert time.perf_counter() - started < 1
+    stats = media_manager.executor.stats
+    assert stats["max_workers"] == 2
+    assert stats["running"] == 2
+    assert stats["queued"] == 2
+    media_manager.release.set()
+    await asyncio.gather(*uploads)
+    stats = media_manager.executor.stats
+    assert stats["running"] == 0
+    assert stats["queued"] == 0
+    assert stats["completed"] == 4
+    media_manager.close()
+
+
+@pytest.mark.asyncio
+async def test_cancel_stream_while_reading_a_chunk():
+    media_manager = SlowStream_MediaManager(
+        upload_path=upload_path, add_environment_as_prefix=False
+    )
+    chunks = []
+
+    async def consume():
+        async for chunk in media_manager.stream_file("file.bin"):
+            chunks.append(chunk)
+
+    task = asyncio.create_task(consume())
+    while not chunks:
+        await asyncio.sleep(0.01)
+    # The second chunk is being read in the executor
+    task.cancel()
+    asyncio.get_running_loop().call_later(0.05, media_manager.release.set)
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert chunks == [b"first"]
+    assert media_manager.closed.is_set()
+    media_manager.close()
+
+
+@pytest.mark.asyncio
+async def test_executor_propagates_exceptions():
+    executor = BackendExecutor(max_workers=1)
+
+    def fail():
+        raise FileNotFoundError("missing")
+
+    with pytest.raises(FileNotFoundError):
+        await executor.run(fail)
+    assert executor.stats["completed"] == 1
+    executor.shutdown()
+
+
+def test_executor_rejects_invalid_max_workers():
+    with pytest.raises(ValueError):
+        BackendExecutor(max_workers=0)
@@ -0,0 +1,71 @@
+import os
+import threading
+from unittest.mock import patch
+
+from media_manager import Local_MediaManager, MediaManagerFactory, MUploadFile
+
+
+def upload_path(file: MUploadFile) -> str:
+    return f"test_upload_files/{file.filename}"
+
+
+def test_factory_caches_per_arguments():
+    factory = MediaManagerFactory(Local_MediaManager)
+    # Unhashable arguments are compared by identity
+    tags = ["media"]
+    media_manager = factory.get(upload_path, tags=tags)
+    assert factory.get(upload_path, tags=tags) is media_manager
+    assert factory.get(upload_path, tags=["media"]) is not media_manager
+    assert factory.get(upload_path) is not media_manager
+    assert len(factory) == 3
+    factory.clear()
+    assert len(factory) == 0
+
+
+def test_factory_evict_closes_the_manager():
+    factory = MediaManagerFactory(Local_MediaManager)
+    media_manager = factory.get(upload_path)
+    with patch.object(media_manager, "close") as close:
+        assert factory.evict(upload_path)
+        close.assert_called_once()
+    assert not factory.evict(upload_path)
+    assert factory.get(upload_path) is not media_manager
+
+
+def test_factory_is_per_process():
+    factory = MediaManagerFactory(Local_MediaManager)
+    media_manager = factory.get(upload_path)
+    with patch("os.getpid", return_value=os.getpid() + 1):
+        assert factory.get(upload_path) is not media_manager
+
+
+def test_factory_creates_once_across_threads():
+    created = []
+
+    def create(*args, **kwargs):
+        created.append(Local_MediaManager(*args, **kwargs))
+        return created[-1]
+
+    factory = MediaManagerFactory(create)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def get():
+        barrier.wait()
+        results.append(factory.get(upload_path))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)
+
+
+def test_factory_warm():
+    factory = MediaManagerFactory(Local_MediaManager)
+    with patch.object(Local_MediaManager, "warm") as warm:
+        media_manager = factory.warm(upload_path)
+        warm.assert_called_once()
+    assert factory.get(upload_path) is media_manager
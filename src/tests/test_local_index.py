@@ -0,0 +1,102 @@
+from io import BytesIO
+import hashlib
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from media_manager import Local_MediaManager, MUploadFile
+from media_manager.managers.local_index import LocalIndex, main
+
+
+def upload_path(file: MUploadFile) -> str:
+    return f"files/{file.filename}"
+
+
+@pytest.fixture
+def local_media_manager(tmp_path) -> Local_MediaManager:
+    media_manager = Local_MediaManager(
+        upload_path=upload_path,
+        root_folder=str(tmp_path / "root"),
+        add_environment_as_prefix=False,
+        index_path=str(tmp_path / "index.sqlite"),
+    )
+    yield media_manager
+    media_manager.close()
+
+
+def test_local_index_uploads_and_deletes(local_media_manager, tmp_path):
+    folder = str(tmp_path / "root" / "files")
+    key = local_media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"abc"), filename="a.txt")
+    )
+    local_media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"defg"), filename="b.txt")
+    )
+    [first, second] = local_media_manager.sync_iter_files_in_folder(folder)
+    assert first["key"] == "a.txt"
+    assert first["etag"] == hashlib.sha256(b"abc").hexdigest()
+    assert second["key"] == "b.txt"
+    assert local_media_manager.sync_file_exists(key)
+    assert local_media_manager.sync_get_folder_size(folder) == 7
+    assert local_media_manager.sync_get_file_info(key)["size"] == 3
+    local_media_manager.sync_delete_file(key)
+    assert not local_media_manager.sync_file_exists(key)
+    assert local_media_manager.sync_list_files_in_folder(folder) == ["b.txt"]
+
+
+@pytest.mark.asyncio
+async def test_local_index_reconcile(local_media_manager, tmp_path):
+    folder = tmp_path / "root" / "files"
+    key = await local_media_manager.upload_file(
+        MUploadFile(BytesIO(b"abc"), filename="a.txt")
+    )
+    # Changed behind the manager
+    os.remove(key)
+    (folder / "nested").mkdir()
+    (folder / "nested" / "c.txt").write_bytes(b"12345")
+    assert await local_media_manager.file_exists(key)
+    report = local_media_manager.reconcile_index(str(folder), hash_files=True)
+    assert report == {"added": 1, "updated": 0, "removed": 1}
+    assert not await local_media_manager.file_exists(key)
+    assert await local_media_manager.get_folder_size(str(folder)) == 5
+    (info,) = local_media_manager.sync_iter_files_in_folder(str(folder))
+    assert info["key"] == "nested/c.txt"
+    assert info["etag"] == hashlib.sha256(b"12345").hexdigest()
+    # Nothing changed since
+    assert local_media_manager.reconcile_index(str(folder)) == {
+        "added": 0,
+        "updated": 0,
+        "removed": 0,
+    }
+
+
+def test_local_index_cli(tmp_path, capsys):
+    folder = tmp_path / "files"
+    folder.mkdir()
+    (folder / "a.txt").write_bytes(b"abc")
+    index = str(tmp_path / "index.sqlite")
+    main([index, str(folder)])
+    assert capsys.readouterr().out == "added=1 updated=0 removed=0\n"
+    (folder / "a.txt").write_bytes(b"abcd")
+    main([index, str(folder), "--rebuild"])
+    assert capsys.readouterr().out == "added=1 updated=0 removed=0\n"
+    media_manager = Local_MediaManager(
+        add_environment_as_prefix=False, index_path=index
+    )
+    assert media_manager.sync_get_folder_size(str(folder)) == 4
+    media_manager.close()
+
+
+def test_local_index_close_every_thread(tmp_path):
+    index = LocalIndex(str(tmp_path / "index.sqlite"))
+    thread = threading.Thread(target=index.add, args=("a.txt", 1, 0.0))
+    thread.start()
+    thread.join()
+    connections = list(index._connections)
+    assert len(connections) == 2
+    index.close()
+    for connection in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
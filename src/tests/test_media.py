@@ -1,8 +1,12 @@
+import hashlib
 import os
+import socket
+from io import BytesIO
 
 import pytest
 
-from media_manager.managers.local import Local_MediaManager
+from media_manager.base.checksums import ChecksumError
+from media_manager.managers.local import Local_MediaManager, stored_checksums
 from src.media_manager import MediaManager, MUploadFile, AWS_MediaManager
 
 
@@ -221,3 +225,272 @@ async def test_sync_test_local_list_files_in_folder(testing_path: str):
     expected_files.sort()
     response.sort()
     assert response == expected_files
+
+
+@pytest.mark.asyncio
+async def test_local_download_range(testing_path: str):
+    media_manager = Local_MediaManager(add_environment_as_prefix=False)
+    file = os.path.join(testing_path, "test_file.pdf")
+    with open(file, "rb") as f:
+        content = f.read()
+    response = media_manager.sync_download_range(file, 10, 19)
+    assert response.read() == content[10:20]
+    response = await media_manager.download_range(file, 100)
+    assert response.read() == content[100:]
+    with pytest.raises(ValueError):
+        media_manager.sync_download_range(file, 10, 5)
+
+
+@pytest.mark.asyncio
+async def test_local_parallel_download_file(testing_path: str):
+    media_manager = Local_MediaManager(add_environment_as_prefix=False)
+    file = os.path.join(testing_path, "test_file.pdf")
+    with open(file, "rb") as f:
+        content = f.read()
+    response = media_manager.sync_download_file(
+        file, parallel=True, chunk_size=1000
+    )
+    assert response.read() == content
+    response = await media_manager.download_file(
+        file, parallel=True, chunk_size=1000, max_concurrency=4
+    )
+    assert response.read() == content
+
+
+@pytest.mark.asyncio
+async def test_local_stream_file(testing_path: str):
+    media_manager = Local_MediaManager(add_environment_as_prefix=False)
+    file = os.path.join(testing_path, "test_file.pdf")
+    with open(file, "rb") as f:
+        content = f.read()
+    chunks = list(media_manager.sync_stream_file(file, chunk_size=1000))
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert b"".join(chunks) == content
+    chunks = [
+        chunk
+        async for chunk in media_manager.stream_file(
+            file, chunk_size=7, start=3, end=30
+        )
+    ]
+    assert max(len(chunk) for chunk in chunks) == 7
+    assert b"".join(chunks) == content[3:31]
+
+
+def test_local_upload_is_streamed_and_atomic(
+    testing_path: str, create_folder_path: str
+):
+    media_manager = Local_MediaManager(
+        upload_path=lambda file: f"streamed/{file.filename}",
+        root_folder=create_folder_path,
+        add_environment_as_prefix=False,
+        fsync=True,
+    )
+    source = os.path.join(testing_path, "test_file.pdf")
+    # A real file is copied by the kernel
+    with open(source, "rb") as f:
+        complete_path = media_manager.sync_upload_file(
+            MUploadFile(f, filename="test_file.pdf")
+        )
+        assert f.read() == b""
+    with open(source, "rb") as f, open(complete_path, "rb") as uploaded:
+        assert uploaded.read() == f.read()
+
+    class BrokenStream(BytesIO):
+        def read(self, size=-1):
+            if self.tell() > 0:
+                raise ConnectionError("client disconnected")
+            return super().read(5)
+
+    with pytest.raises(ConnectionError):
+        media_manager.sync_upload_file(
+            MUploadFile(BrokenStream(b"0123456789"), filename="broken.txt")
+        )
+    folder = os.path.dirname(complete_path)
+    # Neither the partial upload nor the temporary file are left behind
+    assert os.listdir(folder) == ["test_file.pdf"]
+    os.remove(complete_path)
+    os.rmdir(folder)
+
+
+@pytest.mark.asyncio
+async def test_local_iter_files_in_folder(testing_path: str):
+    media_manager = Local_MediaManager(add_environment_as_prefix=False)
+    prefix = os.path.join(testing_path, "test_xml_full_history")
+    files = list(media_manager.sync_iter_files_in_folder(prefix))
+    assert len(files) == 5
+    assert all(file["size"] > 0 for file in files)
+    async_files = [
+        file async for file in media_manager.iter_files_in_folder(prefix)
+    ]
+    assert sorted(async_files, key=lambda file: file["key"]) == sorted(
+        files, key=lambda file: file["key"]
+    )
+
+
+def test_local_delete_files_reports_errors(create_folder_path: str):
+    media_manager = Local_MediaManager(
+        upload_path=lambda file: f"bulk/{file.filename}",
+        root_folder=create_folder_path,
+        add_environment_as_prefix=False,
+    )
+    keys = [
+        media_manager.sync_upload_file(
+            MUploadFile(BytesIO(b"data"), filename=f"{i}.txt")
+        )
+        for i in range(3)
+    ]
+    missing = os.path.join(create_folder_path, "bulk", "missing.txt")
+    deleted = media_manager.sync_delete_files([*keys, missing])
+    assert [file["key"] for file in deleted] == [*keys, missing]
+    assert all("error" not in file for file in deleted[:3])
+    assert "error" in deleted[3]
+    os.rmdir(os.path.dirname(missing))
+
+
+@pytest.mark.asyncio
+async def test_local_upload_and_download_many(create_folder_path: str):
+    media_manager = Local_MediaManager(
+        upload_path=lambda file: f"many/{file.filename}",
+        root_folder=create_folder_path,
+        add_environment_as_prefix=False,
+    )
+    files = [
+        MUploadFile(BytesIO(b"x" * i), filename=f"{i}.ts") for i in range(10)
+    ]
+    report = media_manager.sync_upload_many(files, max_concurrency=3)
+    assert len(report["files"]) == 10
+    assert report["errors"] == []
+    assert report["bytes_transferred"] == sum(range(10))
+    assert report["throughput"] > 0
+    missing = os.path.join(create_folder_path, "many", "missing.ts")
+    report = await media_manager.download_many([*report["files"], missing])
+    assert len(report["downloads"]) == 10
+    assert report["errors"][0]["key"] == missing
+    with pytest.raises(FileNotFoundError):
+        await media_manager.download_many([missing], fail_fast=True)
+    deleted = await media_manager.delete_files_in_folder(
+        os.path.join(create_folder_path, "many")
+    )
+    assert len(deleted) == 10
+    os.rmdir(os.path.join(create_folder_path, "many"))
+
+
+@pytest.mark.asyncio
+async def test_local_zero_copy_reads(testing_path: str, tmp_path):
+    media_manager = Local_MediaManager(add_environment_as_prefix=False)
+    file = os.path.join(testing_path, "test_file.pdf")
+    with open(file, "rb") as f:
+        content = f.read()
+    view = media_manager.sync_download_file(file, mmap=True)
+    assert view.readonly
+    assert view[10:20] == content[10:20]
+    view.release()
+    view = await media_manager.download_file(file, mmap=True)
+    assert bytes(view) == content
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    assert media_manager.sync_download_file(str(empty), mmap=True) == b""
+    # The raw handle can be sent to a socket by the kernel
+    sender, receiver = socket.socketpair()
+    with sender, receiver, await media_manager.open_file(file) as handle:
+        sent = sender.sendfile(handle, count=1000)
+        assert receiver.recv(sent) == content[:sent]
+
+
+@pytest.mark.asyncio
+async def test_local_recursive_listing(tmp_path):
+    media_manager = Local_MediaManager(add_environment_as_prefix=False)
+    keys = ["a-b.txt", "a/c.txt", "a/d/e.txt", "a0.txt", "b/f.txt"]
+    for key in keys:
+        path = tmp_path / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(key.encode())
+    # Uploads in progress are not listed
+    temp_file = tmp_path / "a" / f".g.txt.{'0' * 32}.tmp"
+    temp_file.write_bytes(b"partial")
+    prefix = str(tmp_path)
+    # Files only, in the same order as an S3 listing of the keys
+    assert media_manager.sync_list_files_in_folder(prefix) == sorted(keys)
+    files = list(media_manager.sync_iter_files_in_folder(prefix))
+    assert [file["size"] for file in files] == [
+        len(key) for key in sorted(keys)
+    ]
+    sharded = [
+        file["key"]
+        async for file in media_manager.iter_files_in_folder(
+            prefix, sharded=True, max_concurrency=2
+        )
+    ]
+    assert sorted(sharded) == sorted(keys)
+    assert media_manager.sync_list_files_in_folder(f"{prefix}/missing") == []
+    temp_file.unlink()
+    deleted = media_manager.sync_delete_files_in_folder(prefix)
+    assert sorted(file["key"] for file in deleted) == sorted(
+        os.path.join(prefix, key) for key in keys
+    )
+    assert all("error" not in file for file in deleted)
+    # The folders left empty are removed, the prefix is kept
+    assert os.listdir(prefix) == []
+
+
+@pytest.mark.asyncio
+async def test_local_checksums(tmp_path):
+    media_manager = Local_MediaManager(
+        upload_path=lambda file: file.filename,
+        root_folder=str(tmp_path),
+        add_environment_as_prefix=False,
+        checksums=("md5", "sha256", "crc32c"),
+    )
+    file = MUploadFile(BytesIO(b"123456789"), filename="digits.txt")
+    complete_path = await media_manager.upload_file(file)
+    assert file.checksums == {
+        "md5": hashlib.md5(b"123456789").hexdigest(),
+        "sha256": hashlib.sha256(b"123456789").hexdigest(),
+        "crc32c": "e3069283",
+    }
+    assert stored_checksums(complete_path) == file.checksums
+    response = await media_manager.download_file(complete_path)
+    assert response.read() == b"123456789"
+    # Changed behind the manager, the extended attributes stay
+    with open(complete_path, "r+b") as f:
+        f.write(b"0")
+    with pytest.raises(ChecksumError):
+        media_manager.sync_download_file(complete_path)
+    with pytest.raises(ValueError):
+        Local_MediaManager(checksums=("sha1",))
+
+
+@pytest.mark.asyncio
+async def test_local_copy_and_move(tmp_path):
+    media_manager = Local_MediaManager(
+        add_environment_as_prefix=False,
+        index_path=str(tmp_path / "index.sqlite"),
+        checksums=("sha256",),
+    )
+    source = tmp_path / "a" / "file.txt"
+    source.parent.mkdir()
+    source.write_bytes(b"content")
+    (tmp_path / "a" / "nested").mkdir()
+    (tmp_path / "a" / "nested" / "other.txt").write_bytes(b"other")
+    media_manager.reconcile_index(str(tmp_path / "a"))
+    copy = str(tmp_path / "b" / "copy.txt")
+    assert await media_manager.copy_file(str(source), copy) == copy
+    link = str(tmp_path / "b" / "link.txt")
+    media_manager.sync_copy_file(str(source), link, link=True)
+    assert os.path.samefile(source, link)
+    assert not os.path.samefile(source, copy)
+    moved = str(tmp_path / "c" / "moved.txt")
+    media_manager.sync_move_file(copy, moved)
+    assert not os.path.exists(copy)
+    assert media_manager.sync_download_file(moved).read() == b"content"
+    assert media_manager.sync_file_exists(moved)
+    assert not media_manager.sync_file_exists(copy)
+    copied = await media_manager.copy_folder(
+        str(tmp_path / "a"), str(tmp_path / "d"), max_concurrency=2
+    )
+    assert sorted(file["destination"] for file in copied) == [
+        str(tmp_path / "d" / "file.txt"),
+        str(tmp_path / "d" / "nested" / "other.txt"),
+    ]
+    assert media_manager.sync_get_folder_size(str(tmp_path / "d")) == 12
+    media_manager.close()
@@ -0,0 +1,101 @@
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+
+from media_manager import (
+    Local_MediaManager,
+    MemoryCache_MediaManager,
+    MUploadFile,
+)
+
+
+def upload_path(file: MUploadFile) -> str:
+    return f"manifests/{file.filename}"
+
+
+@pytest.fixture
+def local_media_manager(tmp_path) -> Local_MediaManager:
+    return Local_MediaManager(
+        upload_path=upload_path,
+        root_folder=str(tmp_path),
+        add_environment_as_prefix=False,
+    )
+
+
+def test_memory_cache_small_files(local_media_manager):
+    media_manager = MemoryCache_MediaManager(
+        local_media_manager, max_file_size=16
+    )
+    small = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"{}"), filename="manifest.json")
+    )
+    large = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"x" * 32), filename="large.bin")
+    )
+    with patch.object(
+        local_media_manager,
+        "_backend_download_file",
+        wraps=local_media_manager._backend_download_file,
+    ) as download:
+        for _ in range(2):
+            assert media_manager.sync_download_file(small).read() == b"{}"
+            assert media_manager.sync_download_file(large).read() == (
+                b"x" * 32
+            )
+        # Only the small file is cached
+        assert download.call_count == 3
+        media_manager.sync_upload_file(
+            MUploadFile(BytesIO(b"[]"), filename="manifest.json")
+        )
+        assert media_manager.sync_download_file(small).read() == b"[]"
+        assert download.call_count == 4
+    stats = media_manager.cache_stats["files"]
+    assert stats["hits"] == 1
+    assert stats["size"] == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_listings(local_media_manager, tmp_path):
+    media_manager = MemoryCache_MediaManager(local_media_manager)
+    folder = str(tmp_path / "manifests")
+    await media_manager.upload_file(
+        MUploadFile(BytesIO(b"a"), filename="a.json")
+    )
+    assert await media_manager.list_files_in_folder(folder) == ["a.json"]
+    with patch.object(
+        local_media_manager,
+        "_backend_list_files_in_folder",
+        wraps=local_media_manager._backend_list_files_in_folder,
+    ) as list_files:
+        assert await media_manager.list_files_in_folder(folder) == ["a.json"]
+        assert list_files.call_count == 0
+        # Uploading to the folder invalidates its listing
+        key = await media_manager.upload_file(
+            MUploadFile(BytesIO(b"b"), filename="b.json")
+        )
+        assert sorted(await media_manager.list_files_in_folder(folder)) == [
+            "a.json",
+            "b.json",
+        ]
+        assert list_files.call_count == 1
+        await media_manager.delete_file(key)
+        assert await media_manager.list_files_in_folder(folder) == ["a.json"]
+        await media_manager.delete_files_in_folder(folder)
+        assert await media_manager.list_files_in_folder(folder) == []
+        assert list_files.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_mmap_download(local_media_manager):
+    media_manager = MemoryCache_MediaManager(local_media_manager)
+    key = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"{}"), filename="manifest.json")
+    )
+    view = media_manager.sync_download_file(key, mmap=True)
+    assert isinstance(view, memoryview)
+    assert bytes(view) == b"{}"
+    view = await media_manager.download_file(key, mmap=True)
+    assert bytes(view) == b"{}"
+    # The mapped file was not cached
+    assert media_manager.files.stats["entries"] == 0
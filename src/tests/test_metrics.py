@@ -0,0 +1,88 @@
+from io import BytesIO
+
+import pytest
+
+from media_manager import Local_MediaManager, MUploadFile
+from media_manager.base.base import OperationEvent
+from media_manager.base.metrics import Histogram, MetricsCollector
+
+
+def upload_path(file: MUploadFile) -> str:
+    return f"metrics/{file.filename}"
+
+
+@pytest.fixture
+def local_media_manager(tmp_path) -> Local_MediaManager:
+    return Local_MediaManager(
+        upload_path=upload_path,
+        root_folder=str(tmp_path),
+        add_environment_as_prefix=False,
+    )
+
+
+@pytest.mark.asyncio
+async def test_instruments(local_media_manager):
+    media_manager = local_media_manager
+    events: list[OperationEvent] = []
+    collector = MetricsCollector()
+    media_manager.add_instrument(events.append)
+    media_manager.add_instrument(collector)
+    key = media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"x" * 100), filename="file.bin")
+    )
+    assert (await media_manager.download_file(key)).read() == b"x" * 100
+    with pytest.raises(FileNotFoundError):
+        media_manager.sync_download_file(f"{key}.missing")
+    assert [
+        (event["operation"], event["bytes"], event["error"])
+        for event in events
+    ] == [
+        ("upload_file", 100, None),
+        ("download_file", 100, None),
+        ("download_file", None, "FileNotFoundError"),
+    ]
+    assert events[0]["backend"] == "Local_MediaManager"
+    assert events[0]["throughput"] > 0
+    stats = collector.stats()["Local_MediaManager.download_file"]
+    assert (stats["count"], stats["errors"], stats["bytes"]) == (2, 1, 100)
+    assert stats["error_classes"] == {"FileNotFoundError": 1}
+
+    media_manager.remove_instrument(events.append)
+    media_manager.remove_instrument(collector)
+    media_manager.sync_delete_file(key)
+    assert len(events) == 3
+
+
+def test_instrument_errors_do_not_fail_the_call(local_media_manager):
+    def failing(event: OperationEvent) -> None:
+        raise RuntimeError("broken exporter")
+
+    local_media_manager.add_instrument(failing)
+    with pytest.warns(RuntimeWarning):
+        key = local_media_manager.sync_upload_file(
+            MUploadFile(BytesIO(b"content"), filename="file.txt")
+        )
+    local_media_manager.remove_instrument(failing)
+    assert local_media_manager.sync_download_file(key).read() == b"content"
+
+
+def test_histogram_percentiles():
+    histogram = Histogram((0.1, 1.0))
+    for value in [0.05] * 90 + [0.5] * 9 + [3.0]:
+        histogram.observe(value)
+    assert histogram.percentile(0.5) == 0.1
+    assert histogram.percentile(0.95) == 1.0
+    assert histogram.percentile(1.0) == 3.0
+
+
+def test_instruments_measure_mmap_downloads(local_media_manager):
+    collector = MetricsCollector()
+    local_media_manager.add_instrument(collector)
+    key = local_media_manager.sync_upload_file(
+        MUploadFile(BytesIO(b"content"), filename="file.txt")
+    )
+    view = local_media_manager.sync_download_file(key, mmap=True)
+    assert bytes(view) == b"content"
+    view.release()
+    stats = collector.stats()["Local_MediaManager.download_file"]
+    assert (stats["count"], stats["bytes"]) == (1, 7)
@@ -0,0 +1,176 @@
+import json
+import os
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+
+from media_manager import (
+    AWS_MediaManager,
+    Local_MediaManager,
+    MediaManagerSync,
+    MUploadFile,
+)
+from media_manager.base.utils import ChunkReader
+from media_manager.sync import SyncAction
+
+
+def write(path, content: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+@pytest.fixture
+def local_media_manager() -> Local_MediaManager:
+    return Local_MediaManager(add_environment_as_prefix=False)
+
+
+def test_sync_local(local_media_manager, tmp_path):
+    source, destination = str(tmp_path / "source"), str(tmp_path / "backup")
+    for name in ("a.txt", "b/c.txt", "b/d.txt"):
+        write(f"{source}/{name}", name.encode())
+    write(f"{destination}/b/c.txt", b"b/c.txt")
+    write(f"{destination}/old.txt", b"old")
+    os.utime(f"{destination}/b/c.txt", (1e9, 1e9))
+    sync = MediaManagerSync(
+        local_media_manager, local_media_manager, source, destination
+    )
+    assert [
+        (action["key"], action["action"]) for action in sync.diff()
+    ] == [
+        ("a.txt", "transfer"),
+        ("b/c.txt", "transfer"),
+        ("b/d.txt", "transfer"),
+        ("old.txt", "delete"),
+    ]
+    report = sync.run(delete=True, dry_run=True)
+    assert (report["transferred"], report["deleted"]) == (3, 1)
+    assert os.path.exists(f"{destination}/old.txt")
+
+    report = sync.run(delete=True)
+    assert report["errors"] == []
+    assert (report["transferred"], report["deleted"]) == (3, 1)
+    assert report["bytes_transferred"] == 19
+    assert sorted(
+        local_media_manager.sync_list_files_in_folder(destination)
+    ) == ["a.txt", "b/c.txt", "b/d.txt"]
+    with open(f"{destination}/b/d.txt", "rb") as f:
+        assert f.read() == b"b/d.txt"
+    # Nothing changed since
+    report = sync.run(delete=True)
+    assert (report["transferred"], report["unchanged"]) == (0, 3)
+
+
+def test_sync_checkpoint(local_media_manager, tmp_path):
+    source, destination = str(tmp_path / "source"), str(tmp_path / "backup")
+    names = [f"{index:02}.txt" for index in range(20)]
+    for name in names:
+        write(f"{source}/{name}", name.encode())
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    sync = MediaManagerSync(
+        local_media_manager,
+        local_media_manager,
+        source,
+        destination,
+        max_concurrency=4,
+        checkpoint_path=checkpoint_path,
+    )
+    upload = local_media_manager._backend_upload
+
+    def failing_upload(file, complete_path, *args, **kwargs):
+        if complete_path.endswith("12.txt"):
+            raise ConnectionError("network down")
+        return upload(file, complete_path, *args, **kwargs)
+
+    with patch.object(local_media_manager, "_backend_upload", failing_upload):
+        report = sync.run()
+    assert [error["key"] for error in report["errors"]] == ["12.txt"]
+    with open(checkpoint_path) as f:
+        assert json.load(f)["done_through"] == "11.txt"
+
+    # Resumes after the last key done
+    uploaded: list[str] = []
+    with patch.object(
+        local_media_manager, "_backend_upload", wraps=upload
+    ) as wrapped:
+        report = sync.run()
+        uploaded = [call.args[1] for call in wrapped.call_args_list]
+    assert report["errors"] == []
+    # The files after the error were transferred by the first run, the
+    # ones before it are not even compared
+    assert [os.path.basename(path) for path in uploaded] == ["12.txt"]
+    assert report["unchanged"] == 7
+    assert not os.path.exists(checkpoint_path)
+    assert sorted(
+        local_media_manager.sync_list_files_in_folder(destination)
+    ) == names
+
+    other = MediaManagerSync(
+        local_media_manager,
+        local_media_manager,
+        source,
+        str(tmp_path / "other"),
+        checkpoint_path=checkpoint_path,
+    )
+    sync._save_checkpoint("05.txt")
+    with pytest.raises(ValueError):
+        other.run()
+
+
+def test_sync_local_to_s3(
+    local_media_manager, moto_media_manager: AWS_MediaManager, tmp_path
+):
+    source = str(tmp_path / "source")
+    content = os.urandom(1024 * 1024)
+    write(f"{source}/large.bin", content)
+    write(f"{source}/folder/small.txt", b"small")
+    # A sibling prefix, not part of the destination folder
+    moto_media_manager._backend_upload(
+        MUploadFile(BytesIO(b"keep"), filename="keep.txt"),
+        "sync/backup-2024/keep.txt",
+    )
+    sync = MediaManagerSync(
+        local_media_manager, moto_media_manager, source, "sync/backup"
+    )
+    report = sync.run(delete=True)
+    assert (report["transferred"], report["errors"]) == (2, [])
+    assert report["deleted"] == 0
+    assert moto_media_manager.sync_file_exists("sync/backup-2024/keep.txt")
+    assert (
+        moto_media_manager.sync_download_file("sync/backup/large.bin").read()
+        == content
+    )
+    # The objects are newer than the local files
+    assert sync.run()["unchanged"] == 2
+
+    # And back, streamed from S3
+    back = MediaManagerSync(
+        moto_media_manager,
+        local_media_manager,
+        "sync/backup",
+        str(tmp_path / "restore"),
+        chunk_size=64 * 1024,
+    )
+    actions: list[SyncAction] = list(back.diff())
+    assert [action["key"] for action in actions] == [
+        "folder/small.txt",
+        "large.bin",
+    ]
+    assert back.run()["bytes_transferred"] == len(content) + 5
+    with open(tmp_path / "restore" / "large.bin", "rb") as f:
+        assert f.read() == content
+
+
+def test_chunk_reader_parts():
+    content = os.urandom(10_000)
+    # Small chunks, parts spanning many of them, and a big chunk
+    chunks = [content[i : i + 7] for i in range(0, 9_002, 7)]
+    chunks.append(content[9_002:])
+    reader = ChunkReader(chunks)
+    parts = [reader.read(1_000) for _ in range(5)]
+    parts += [reader.read(300) for _ in range(10)]
+    parts.append(reader.read())
+    assert [len(part) for part in parts[:15]] == [1_000] * 5 + [300] * 10
+    assert b"".join(parts) == content
+    assert reader.read(10) == b""